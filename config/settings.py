@@ -120,7 +120,66 @@ X_FRAME_OPTIONS = 'DENY'
 RATE_LIMIT_REQUESTS = 100
 RATE_LIMIT_WINDOW = 60
 RATE_LIMIT_SKIP_PATHS = ['/admin/', '/static/', '/media/']
+# Límites propios por prefijo de ruta: (requests, ventana en segundos)
+RATE_LIMIT_ROUTES = {
+    '/api/search/': (30, 60),  # cada búsqueda corre el modelo + dos escaneos de índice
+}
+RATE_LIMIT_LEASE_SIZE = 10  # Requests reservadas por viaje a la caché (máx. 1/10 del límite; 1 = un viaje por request)
+
+# Control de admisión de búsquedas (por proceso)
+SEARCH_MAX_ENCODES = 2  # Inferencias del modelo de embeddings simultáneas
+SEARCH_MAX_DB_QUERIES = 4  # Consultas de búsqueda simultáneas en la BD
+SEARCH_MAX_WAITING = 16  # Búsquedas en espera por etapa; más allá se rechazan
+SEARCH_ENCODE_WAIT = 0.25  # Segundos de espera por el modelo antes de degradar a búsqueda léxica
+SEARCH_DB_WAIT = 2.0  # Segundos de espera por la BD antes de responder 503
 MAX_REQUEST_SIZE = 10 * 1024 * 1024
+BILL_UPLOAD_MAX_SIZE = MAX_REQUEST_SIZE  # Tamaño máximo de un PDF/DOCX de versión de medida
+
+# --- NOTICIAS RSS ---
+RSS_FETCH_WORKERS = 8  # Descargas simultáneas
+RSS_PER_HOST_LIMIT = 2  # Conexiones simultáneas máximas por host
+RSS_FETCH_TIMEOUT = 15  # Segundos máximos por fuente (descarga completa)
+RSS_EARLY_STOP_RUN = 3  # Entradas ya vistas seguidas para dejar de parsear un feed
+RSS_POLL_MIN_MINUTES = 5  # Intervalo mínimo de sondeo por fuente
+RSS_POLL_MAX_MINUTES = 240  # Intervalo máximo (fuentes inactivas)
+RSS_POLL_TARGET_ARTICLES = 1  # Artículos nuevos esperados por sondeo
+RSS_POLL_SMOOTHING = 0.3  # Peso de la última observación en la tasa (EMA)
+RSS_SCHEDULER_TICK_SECONDS = 60  # Cada cuánto se buscan fuentes vencidas
+
+# --- SUTRA (scraping legislativo) ---
+SUTRA_RATE_LIMIT = 2.0  # Requests por segundo en total (todos los workers)
+SUTRA_MAX_IN_FLIGHT = 4  # Requests simultáneas máximas
+SUTRA_TIMEOUT = 20  # Segundos por request
+SUTRA_RETRIES = 3  # Reintentos ante errores de conexión, 429 y 5xx
+SUTRA_RETRY_BACKOFF = 0.5  # Backoff exponencial: 0.5s, 1s, 2s...
+SUTRA_FRONTIER_GAP = 5  # Hueco máximo tolerado en la numeración al buscar la frontera
+SUTRA_HTTP_CACHE = True  # Caché en disco con revalidación condicional (ETag/Last-Modified)
+SUTRA_HTTP_CACHE_DIR = str(BASE_DIR / 'cache' / 'sutra')
+SUTRA_HTTP_CACHE_MAX_AGE = 0  # Segundos sin revalidar (0 = revalidar siempre)
+SUTRA_HTTP_CACHE_OFFLINE = os.getenv('SUTRA_OFFLINE', 'False') == 'True'  # Solo servir desde la caché
+
+# --- IA (Gemini) ---
+AI_MODEL_BACKEND = os.getenv('AI_MODEL_BACKEND', 'gemini')  # 'gemini' o 'local' (sustituto sin red)
+GEMINI_MODEL = 'gemini-2.0-flash'
+GEMINI_RPM = 10  # Requests por minuto permitidas por la cuota
+GEMINI_TPM = 250000  # Tokens por minuto permitidos por la cuota
+AI_BATCH_TOKEN_BUDGET = 6000  # Tokens estimados (prompt + respuesta) por lote de títulos
+AI_BATCH_MAX_ITEMS = 25  # Títulos máximos por lote
+AI_MAX_RETRIES = 3  # Reintentos de un lote tras un 429
+AI_RETRY_BACKOFF = 15  # Segundos de pausa tras el primer 429 (se duplica)
+AI_SUMMARY_WORKERS = 2  # Resúmenes generándose a la vez por proceso
+AI_SUMMARY_STALE_SECONDS = 900  # Trabajo 'running' sin latido tras este tiempo se re-encola (mínimo 2× la pausa máxima por 429)
+AI_PRESUMMARY_LIMIT = 50  # Artículos resumidos en bloque por corrida
+AI_PRESUMMARY_SCAN = 500  # Artículos pendientes más recientes evaluados para priorizar
+AI_PRESUMMARY_INTERVAL_MINUTES = 10  # Frecuencia del pre-resumen en el scheduler
+
+# --- EXTRACCIÓN DE TEXTO DE VERSIONES (PDF/DOCX) ---
+EXTRACTION_JOBS = 1  # Documentos extrayéndose a la vez por proceso
+EXTRACTION_PROCESSES = None  # Procesos por documento (None = CPUs, hasta 4)
+EXTRACTION_PAGES_PER_TASK = 16  # Páginas por tarea del pool
+EXTRACTION_STALE_SECONDS = 900  # Extracción 'running' sin terminar tras este tiempo se re-encola
+EXTRACTION_STREAMING_PAGES = 200  # PDFs con más páginas se extraen en modo streaming (una página a la vez)
+EXTRACTION_MEMORY_LIMIT_MB = 512  # Techo de memoria del proceso de extracción streaming
 
 # --- EMBEDDINGS ---
 EMBEDDING_PROVIDER = 'sentence_transformers'
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def database(request):
+    """BD de prueba si hay un servidor disponible (el resto de la suite corre sin BD)."""
+    try:
+        request.getfixturevalue('transactional_db')
+    except Exception as e:
+        pytest.skip(f"Sin base de datos: {type(e).__name__}")
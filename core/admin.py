@@ -1,12 +1,13 @@
 from django.contrib import admin
 
-from .models import (Article, Bill, BillVersion, Event, Keyword,
-                     MonitoredCommission, MonitoredMeasure, NewsPreset,
-                     NewsSource)
+from .models import (AIResultCache, Article, Bill, BillVersion,
+                     BillVersionDiff, Event, Keyword, MonitoredCommission,
+                     MonitoredMeasure, NewsPreset, NewsSource, SutraFrontier)
 
 # Esto hace que aparezcan las tablas en el panel
 admin.site.register(Bill)
 admin.site.register(BillVersion)
+admin.site.register(BillVersionDiff)
 admin.site.register(Article)
 admin.site.register(NewsSource)
 admin.site.register(Event)
@@ -15,4 +16,6 @@ admin.site.register(Event)
 admin.site.register(NewsPreset)
 admin.site.register(MonitoredMeasure)
 admin.site.register(MonitoredCommission)
-admin.site.register(Keyword)
\ No newline at end of file
+admin.site.register(Keyword)
+admin.site.register(SutraFrontier)
+admin.site.register(AIResultCache)
@@ -0,0 +1,253 @@
+"""
+Cliente de Modelos de IA con Control de Cuota
+=============================================
+
+Punto único para las llamadas a Gemini (JSON estructurado o texto libre):
+
+- ``QuotaManager``: dos token buckets (requests/min y tokens/min) dimensionados
+  para que ninguna ventana de 60 s supere ``GEMINI_RPM`` / ``GEMINI_TPM``. Cada
+  llamada espera solo lo necesario, en vez de dormir un tiempo fijo; ante un
+  429 (``ResourceExhausted``) se pausa toda la cuota con backoff exponencial.
+- ``GeminiModelClient``: ``generate_json(prompt)`` / ``generate_text(prompt)``
+  sobre ``google.generativeai``
+- ``LocalModelClient``: sustituto determinista sin red (tests, CI, demos);
+  contesta el mismo formato que el prompt pide
+
+El backend se elige con ``AI_MODEL_BACKEND`` ('gemini' o 'local').
+
+Uso:
+    from core.ai_client import get_ai_client, get_quota_manager
+
+    quota = get_quota_manager()
+    quota.acquire(estimated_tokens)
+    text = get_ai_client().generate_json(prompt)
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from django.conf import settings
+
+from core.utils.throttle import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_MODEL = 'gemini-2.0-flash'
+# Marcador tras el cual los prompts por lotes incluyen la lista JSON de entradas
+ITEMS_MARKER = 'ENTRADAS (JSON):'
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación barata de tokens (~4 caracteres por token en español/inglés)."""
+    return max(1, len(text or '') // 4)
+
+
+def pack_by_budget(items: Iterable[T], cost: Callable[[T], int], token_budget: int,
+                   max_items: int, base_tokens: int = 0) -> List[List[T]]:
+    """
+    Agrupa ``items`` (en orden) en lotes cuyo costo estimado, más
+    ``base_tokens`` de instrucciones, cabe en ``token_budget``. Un item que
+    por sí solo excede el presupuesto va en su propio lote (no se trunca).
+    """
+    batches, current, used = [], [], base_tokens
+    for item in items:
+        item_cost = cost(item)
+        if current and (used + item_cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], base_tokens
+        current.append(item)
+        used += item_cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Pausa máxima tras un 429 (la espera más larga entre dos intentos de una llamada)
+MAX_BACKOFF_SECONDS = 300
+
+
+class QuotaExhausted(Exception):
+    """El proveedor rechazó la llamada por cuota (HTTP 429)."""
+
+
+class QuotaManager:
+    """
+    Reparte la cuota por minuto del modelo entre todas las llamadas del proceso.
+
+    Con capacidad ``C`` y tasa ``r`` un token bucket admite como máximo
+    ``C + 60·r`` unidades en cualquier ventana de 60 s; por eso la tasa se
+    reduce a ``(límite - C) / 60``. Las requests se espacian uniformemente
+    (``C = 1``) y los tokens admiten una ráfaga de un cuarto de minuto.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        rpm = rpm or getattr(settings, 'GEMINI_RPM', 10)
+        tpm = tpm or getattr(settings, 'GEMINI_TPM', 250000)
+        self.requests = TokenBucket(max(rpm - 1, 0.5) / 60.0, capacity=1)
+        token_burst = max(1.0, tpm / 4)
+        self.tokens = TokenBucket((tpm - token_burst) / 60.0, capacity=token_burst)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._strikes = 0
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Bloquea hasta que haya cuota para una request de ``tokens``; retorna los segundos esperados."""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                pause = self._paused_until - time.monotonic()
+            if pause <= 0:
+                break
+            time.sleep(pause)
+        self.requests.acquire()
+        # Una request mayor que la ráfaga no se puede partir: se cobra la ráfaga completa
+        self.tokens.acquire(min(float(tokens), self.tokens.capacity))
+        return time.monotonic() - started
+
+    def backoff(self) -> float:
+        """Pausa todas las llamadas tras un 429 (15 s, 30 s, 60 s... hasta 5 min)."""
+        with self._lock:
+            base = getattr(settings, 'AI_RETRY_BACKOFF', 15)
+            delay = min(base * (2 ** self._strikes), MAX_BACKOFF_SECONDS)
+            self._strikes += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"Cuota de IA agotada; pausando llamadas {delay:.0f}s")
+        return delay
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._strikes = 0
+
+    def call(self, fn: Callable[[], T], tokens: int, stats: Optional[dict] = None) -> T:
+        """
+        Ejecuta ``fn()`` dentro de la cuota; tras un 429 pausa con backoff y
+        reintenta hasta ``AI_MAX_RETRIES`` veces (luego propaga ``QuotaExhausted``).
+        ``stats`` acumula ``requests`` y ``quota_wait`` (segundos esperando cuota).
+        """
+        max_retries = getattr(settings, 'AI_MAX_RETRIES', 3)
+        for attempt in range(max_retries + 1):
+            waited = self.acquire(tokens)
+            if stats is not None:
+                stats['requests'] = stats.get('requests', 0) + 1
+                stats['quota_wait'] = stats.get('quota_wait', 0.0) + waited
+            try:
+                result = fn()
+            except QuotaExhausted:
+                if attempt == max_retries:
+                    raise
+                self.backoff()
+                continue
+            self.succeeded()
+            return result
+
+
+class GeminiModelClient:
+    """Llamadas a Gemini (``generate_json`` pide respuesta ``application/json``)."""
+
+    def __init__(self, model_name: Optional[str] = None):
+        import google.generativeai as genai
+
+        if getattr(settings, 'GOOGLE_API_KEY', None):
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.model_name = model_name or getattr(settings, 'GEMINI_MODEL', DEFAULT_MODEL)
+        self._model = genai.GenerativeModel(self.model_name)
+
+    @property
+    def available(self) -> bool:
+        return bool(getattr(settings, 'GOOGLE_API_KEY', None))
+
+    def _generate(self, prompt: str, **kwargs) -> str:
+        from google.api_core.exceptions import ResourceExhausted
+
+        try:
+            response = self._model.generate_content(prompt, **kwargs)
+        except ResourceExhausted as e:
+            raise QuotaExhausted(str(e)) from e
+        return getattr(response, 'text', str(response))
+
+    def generate_json(self, prompt: str) -> str:
+        return self._generate(prompt, generation_config={"response_mime_type": "application/json"})
+
+    def generate_text(self, prompt: str) -> str:
+        return self._generate(prompt)
+
+
+class LocalModelClient:
+    """
+    Sustituto determinista de Gemini, sin red ni cuota.
+
+    ``generate_json`` lee las entradas que el prompt incluye tras
+    ``ITEMS_MARKER`` y responde ``[{"id", "score", "reason"}]`` puntuando
+    cuántos términos legales contiene cada título (o ``[{"id", "summary"}]``
+    si las entradas traen ``text``); ``generate_text`` devuelve un resumen
+    extractivo. Guarda los prompts recibidos en ``calls``.
+    """
+
+    model_name = 'local'
+    available = True
+    LEGAL_TERMS = re.compile(
+        r'\b(ley|enmendar|enmienda|derogar|código|reglamento|impuesto|contribución|presupuesto|penal)\w*',
+        re.IGNORECASE,
+    )
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_json(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        _, _, tail = prompt.partition(ITEMS_MARKER)
+        items = json.loads(tail.strip() or '[]')
+        answers = []
+        for item in items:
+            if 'text' in item:
+                # Lote de resúmenes: [{"id", "summary"}]
+                answers.append({'id': item['id'], 'summary': self._extract(item['text'] or item.get('title', ''))})
+                continue
+            hits = len(self.LEGAL_TERMS.findall(item.get('title', '')))
+            answers.append({
+                'id': item['id'],
+                'score': min(10, 1 + 2 * hits),
+                'reason': f"{hits} términos legales relevantes" if hits else "Sin términos legales relevantes",
+            })
+        return json.dumps(answers, ensure_ascii=False)
+
+    def generate_text(self, prompt: str) -> str:
+        """Resumen extractivo: las primeras palabras del contenido del prompt."""
+        self.calls.append(prompt)
+        return self._extract(prompt.rpartition('Contenido:')[2] or prompt)
+
+    @staticmethod
+    def _extract(content: str) -> str:
+        return 'Resumen: ' + ' '.join(content.split()[:40])
+
+
+_client = None
+_quota: Optional[QuotaManager] = None
+_lock = threading.Lock()
+
+
+def get_ai_client():
+    """Cliente del backend configurado (``AI_MODEL_BACKEND``), compartido en el proceso."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                backend = getattr(settings, 'AI_MODEL_BACKEND', 'gemini')
+                _client = LocalModelClient() if backend == 'local' else GeminiModelClient()
+    return _client
+
+
+def get_quota_manager() -> QuotaManager:
+    """Cuota compartida por todas las llamadas de IA del proceso."""
+    global _quota
+    if _quota is None:
+        with _lock:
+            if _quota is None:
+                _quota = QuotaManager()
+    return _quota
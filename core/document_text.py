@@ -0,0 +1,250 @@
+"""
+Extracción de Texto de Documentos de Medidas (PDF / DOCX)
+=========================================================
+
+- PDF: las páginas se reparten en rangos de ``EXTRACTION_PAGES_PER_TASK``
+  entre un pool de procesos (``EXTRACTION_PROCESSES``); documentos cortos se
+  extraen en el mismo proceso
+- DOCX: los párrafos forman una sola "página"
+- El texto se une una sola vez (``join_pages``) y se registra dónde empieza
+  cada página, para ubicar un cambio del comparador en el PDF
+- Modo streaming (documentos muy grandes, ``stream_extract``): un proceso
+  aparte cuenta las páginas y, si pasan del umbral, lee una página a la vez,
+  la escribe de inmediato a un archivo JSON Lines y respeta un techo de
+  memoria; el proceso web nunca abre el PDF y arma el texto leyendo el
+  archivo línea por línea (``join_pages_jsonl``)
+
+Formato JSON Lines: una página por línea (string JSON) y al final
+``{"pages": N}``; sin esa última línea el archivo está incompleto.
+
+Este módulo no depende de Django: los procesos del pool lo importan solos.
+
+Uso:
+    from core.document_text import extract_document
+
+    text, offsets = extract_document('/ruta/proyecto.pdf', processes=4)
+"""
+
+import gc
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_PAGES_PER_TASK = 16
+# Páginas leídas con el mismo PdfReader antes de descartarlo (libera su caché de objetos)
+RECYCLE_READER_PAGES = 50
+
+
+class MemoryLimitExceeded(MemoryError):
+    """La extracción superó el techo de memoria configurado."""
+
+
+def rss_mb() -> float:
+    """Memoria residente actual del proceso, en MB (pico si no hay /proc)."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb() -> float:
+    """
+    Pico de memoria residente del proceso, en MB. ``VmHWM`` se reinicia con
+    el exec de un proceso 'spawn'; ``ru_maxrss`` (sin /proc) en Linux
+    arrastra el pico del proceso padre.
+    """
+    try:
+        with open('/proc/self/status') as handle:
+            for line in handle:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pdf_page_texts(path: str, start: int, stop: int) -> List[str]:
+    """Texto de las páginas ``[start, stop)`` (se ejecuta en un proceso del pool)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+def pdf_page_count(path: str) -> int:
+    from pypdf import PdfReader
+
+    with open(path, 'rb') as handle:
+        return len(PdfReader(handle).pages)
+
+
+def extract_pdf_pages(path: str, processes: int = 1, pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+                      page_count: Optional[int] = None) -> List[str]:
+    """Texto de cada página del PDF, en orden (``page_count`` si ya se conoce)."""
+    count = pdf_page_count(path) if page_count is None else page_count
+    ranges = [(start, min(start + pages_per_task, count)) for start in range(0, count, pages_per_task)]
+    if processes <= 1 or len(ranges) <= 1:
+        return [text for start, stop in ranges for text in _pdf_page_texts(path, start, stop)]
+
+    # 'spawn': el proceso web tiene hilos (scheduler, colas) y un fork podría heredar locks tomados
+    with ProcessPoolExecutor(max_workers=min(processes, len(ranges)), mp_context=get_context('spawn')) as pool:
+        chunks = pool.map(_pdf_page_texts, [path] * len(ranges), [r[0] for r in ranges], [r[1] for r in ranges])
+        return [text for chunk in chunks for text in chunk]
+
+
+def extract_docx_pages(path: str) -> List[str]:
+    import docx
+
+    return ['\n'.join(p.text for p in docx.Document(path).paragraphs if p.text)]
+
+
+def join_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """
+    Une las páginas (cada una seguida de un salto de línea; las vacías se
+    omiten) y retorna ``(texto, offsets)``: el carácter donde empieza cada
+    página en el texto (una página vacía apunta a donde empezaría).
+    """
+    parts, offsets, position = [], [], 0
+    for text in pages:
+        offsets.append(position)
+        if text:
+            parts.append(text)
+            parts.append('\n')
+            position += len(text) + 1
+    return ''.join(parts), offsets
+
+
+def iter_pdf_pages(path: str, memory_limit_mb: Optional[float] = None,
+                   rss: Callable[[], float] = rss_mb) -> Iterator[str]:
+    """
+    Genera el texto de cada página, una a la vez, leyendo el archivo a
+    medida que hace falta. El ``PdfReader`` se descarta cada
+    ``RECYCLE_READER_PAGES`` páginas, o antes si la memoria pasa del 80 % de
+    ``memory_limit_mb``; si aun así supera el techo se lanza
+    ``MemoryLimitExceeded``.
+    """
+    from pypdf import PdfReader
+
+    reader, index, count = None, 0, None
+    # Con una ruta, PdfReader copia el archivo entero a memoria; con el archivo abierto lo lee a medida
+    with open(path, 'rb') as handle:
+        while count is None or index < count:
+            if reader is None:
+                reader = PdfReader(handle)
+                count = len(reader.pages)
+                if not count:
+                    return
+            yield reader.pages[index].extract_text() or ''
+            index += 1
+            over = memory_limit_mb and rss() > memory_limit_mb * 0.8
+            if over or index % RECYCLE_READER_PAGES == 0:
+                reader = None
+                gc.collect()
+                if memory_limit_mb and rss() > memory_limit_mb:
+                    raise MemoryLimitExceeded(
+                        f"Extracción sobre el techo de {memory_limit_mb:.0f} MB en la página {index}"
+                    )
+
+
+def write_pages_jsonl(pages: Iterable[str], handle) -> int:
+    """Escribe las páginas (en texto) a ``handle`` a medida que llegan; retorna cuántas."""
+    count = 0
+    for text in pages:
+        handle.write(json.dumps(text, ensure_ascii=False) + '\n')
+        count += 1
+    handle.write(json.dumps({'pages': count}) + '\n')
+    return count
+
+
+def read_pages_jsonl(lines: Iterable[str]) -> Optional[List[str]]:
+    """Páginas de un archivo JSON Lines, o None si está incompleto o dañado."""
+    pages = []
+    try:
+        for line in lines:
+            item = json.loads(line)
+            if isinstance(item, dict):
+                return pages if item.get('pages') == len(pages) else None
+            pages.append(item)
+    except ValueError:
+        return None
+    return None
+
+
+def join_pages_jsonl(lines: Iterable[str]) -> Optional[Tuple[str, List[int]]]:
+    """
+    ``join_pages`` directo de un archivo JSON Lines, leyendo una página a la
+    vez (sin armar la lista de páginas). None si está incompleto o dañado.
+    """
+    buffer, offsets, position = io.StringIO(), [], 0
+    try:
+        for line in lines:
+            item = json.loads(line)
+            if isinstance(item, dict):
+                if item.get('pages') != len(offsets):
+                    return None
+                return buffer.getvalue(), offsets
+            offsets.append(position)
+            if item:
+                buffer.write(item)
+                buffer.write('\n')
+                position += len(item) + 1
+    except ValueError:
+        return None
+    return None
+
+
+def _stream_to_file(path: str, out_path: str, memory_limit_mb: float, min_pages: int = 0) -> Dict:
+    """Extracción streaming (se ejecuta en un proceso aparte)."""
+    import resource
+
+    count = pdf_page_count(path)
+    if count <= min_pages:
+        return {'pages': count, 'streamed': False, 'peak_rss_mb': peak_rss_mb()}
+
+    # Respaldo duro: memoria virtual hasta el doble del techo (la residente se vigila por página)
+    limit = int(memory_limit_mb * 2 * 2 ** 20)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+    with open(out_path, 'w', encoding='utf-8') as handle:
+        count = write_pages_jsonl(iter_pdf_pages(path, memory_limit_mb), handle)
+    return {'pages': count, 'streamed': True, 'peak_rss_mb': peak_rss_mb()}
+
+
+def stream_extract(path: str, out_path: str, memory_limit_mb: float = 512, min_pages: int = 0) -> Dict:
+    """
+    Extrae el PDF página por página en un proceso aparte con techo de memoria
+    y escribe el resultado en ``out_path`` (JSON Lines). Si el PDF tiene
+    ``min_pages`` páginas o menos no se extrae ni se escribe nada
+    (``streamed=False``). Retorna ``{'pages', 'streamed', 'peak_rss_mb'}``
+    (pico de memoria del proceso de extracción); ``MemoryLimitExceeded`` si
+    la extracción pasó del techo.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(_stream_to_file, path, out_path, memory_limit_mb, min_pages).result()
+
+
+def extract_pages(path: str, processes: int = 1, pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+                  page_count: Optional[int] = None) -> List[str]:
+    """Texto por página de un PDF o DOCX; ValueError con otro formato."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.pdf':
+        return extract_pdf_pages(path, processes, pages_per_task, page_count)
+    if extension == '.docx':
+        return extract_docx_pages(path)
+    raise ValueError(f"Formato no soportado: {extension or path}")
+
+
+def extract_document(path: str, processes: int = 1,
+                     pages_per_task: int = DEFAULT_PAGES_PER_TASK) -> Tuple[str, List[int]]:
+    """``(texto, offsets por página)`` de un PDF o DOCX."""
+    return join_pages(extract_pages(path, processes, pages_per_task))
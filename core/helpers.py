@@ -1,60 +1,52 @@
-import os
 import logging
-import difflib
-from typing import Dict, List, Any
-from pathlib import Path
-
-import google.generativeai as genai
-from django.conf import settings
-from google.api_core.exceptions import ResourceExhausted, PermissionDenied
+from typing import Dict, Any
 
 # Config logger
 logger = logging.getLogger(__name__)
 
-# Configure genai with API key from Django settings when available
-if getattr(settings, "GOOGLE_API_KEY", None):
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
-
-# MODELO SELECCIONADO (Basado en tu lista disponible)
-MODEL_NAME = 'gemini-2.0-flash'
-
 def normalize_text(text: str) -> str:
     """Normalize text for comparison/search."""
     if not text: return ""
     return " ".join(text.split()).strip()
 
 def generate_diff_html(text1: str, text2: str) -> str:
-    """Produce an HTML visual diff between two texts."""
-    a_lines = (text1 or "").splitlines()
-    b_lines = (text2 or "").splitlines()
-    return difflib.HtmlDiff(wrapcolumn=80).make_file(a_lines, b_lines, context=True, numlines=3)
+    """
+    Produce an HTML visual diff between two texts: only the changed units
+    (with a few words of context), so its size follows the change, not the document.
+    """
+    from core.utils.legal_diff import diff_legal_texts, render_diff_html
+    return render_diff_html(diff_legal_texts(text1 or "", text2 or ""), text1 or "", text2 or "")
 
 def analyze_legal_diff(text_old: str, text_new: str) -> Dict[str, Any]:
-    """Analyze differences between two legal texts."""
-    t1 = normalize_text(text_old)
-    t2 = normalize_text(text_new)
-    sm = difflib.SequenceMatcher(a=t1, b=t2)
-    
+    """
+    Analyze differences between two legal texts (structure-aware: aligned by
+    Artículo/Sección/inciso, word-level inside changed units). Positions are
+    character offsets in the original texts.
+    """
+    from core.utils.legal_diff import diff_legal_texts, iter_word_changes, render_diff_html
+    diff = diff_legal_texts(text_old or "", text_new or "")
+
     added, removed, changed = [], [], []
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        if tag == "insert": added.append({"text": t2[j1:j2], "pos": j1})
-        elif tag == "delete": removed.append({"text": t1[i1:i2], "pos": i1})
-        elif tag == "replace": changed.append({"from": t1[i1:i2], "to": t2[j1:j2], "pos_from": i1})
+    for unit, tag, old, new, pos_old, pos_new in iter_word_changes(diff, text_old or "", text_new or ""):
+        if tag == "insert": added.append({"text": new, "pos": pos_new, "unit": unit.label})
+        elif tag == "delete": removed.append({"text": old, "pos": pos_old, "unit": unit.label})
+        elif tag == "replace": changed.append({"from": old, "to": new, "pos_from": pos_old, "unit": unit.label})
 
     return {
         "added": added, "removed": removed, "changed": changed,
-        "html": generate_diff_html(text_old, text_new),
+        "html": render_diff_html(diff, text_old or "", text_new or ""),
+        "units": diff.stats,
         "summary": {"added_count": len(added), "removed_count": len(removed), "changed_count": len(changed)},
     }
 
 def check_sutra_status(measure_id):
-    """Check the status of a measure on SUTRA."""
-    import requests, urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    clean_id = str(measure_id).lower().replace("p. de la c.", "pc").replace(" ", "").replace(".", "")
-    url = f"https://sutra.oslpr.org/osl/es/medidas/{clean_id}"
+    """Check the status of a measure on SUTRA (through the shared, rate-limited client)."""
+    from core.sutra_client import get_sutra_client
+    from core.utils.http_cache import CACHE_HEADER
     try:
-        res = requests.get(url, timeout=10, verify=False, headers={'User-Agent': 'Mozilla/5.0'})
+        res = get_sutra_client().get_measure(measure_id, timeout=10)
+        if res.headers.get(CACHE_HEADER) == 'STALE':
+            return (False, "SUTRA no responde (copia guardada)")
         return (res.status_code == 200, "En línea" if res.status_code == 200 else f"Error {res.status_code}")
     except Exception as e:
         return (False, str(e))
@@ -64,41 +56,27 @@ def fetch_latest_news(limit: int = 10):
     return sync_all_rss_sources(max_entries=limit)
 
 def generate_ai_summary(article_id):
-    """Generate an AI summary using the configured Gemini model."""
-    from core.models import Article
+    """Generate an AI summary synchronously (same job path, dedup and quota as the summary queue)."""
+    from core.utils.summary_jobs import DONE, enqueue_summary
     try:
-        article = Article.objects.get(id=article_id)
-        if not getattr(settings, "GOOGLE_API_KEY", None): return "Error: API Key missing."
-        
-        model = genai.GenerativeModel(MODEL_NAME)
-        prompt = f"Resume esta noticia para un abogado: {article.title}. Contenido: {article.snippet[:2000]}"
-        
-        response = model.generate_content(prompt)
-        article.ai_summary = getattr(response, 'text', str(response))
-        article.save()
-        return True
+        state = enqueue_summary(article_id, run_inline=True)
+        return bool(state) and state['status'] == DONE
     except Exception as e:
         logger.error(f"AI Summary Error: {e}")
         return False
 
 def analyze_bill_relevance(bill):
-    """Get relevance score using Gemini."""
+    """Get relevance score using Gemini (batched analyzer with title cache and quota control)."""
+    from core.utils.bill_analysis import BillRelevanceAnalyzer
     try:
-        if not getattr(settings, "GOOGLE_API_KEY", None): return {"score": 0, "analysis": "API key missing"}
-        
         # Skip if already analyzed
         if getattr(bill, 'ai_score', 0): 
             return {"score": bill.ai_score, "analysis": bill.ai_analysis, "skipped": True}
 
-        model = genai.GenerativeModel(MODEL_NAME)
-        prompt = (f"Analyze this Puerto Rico legislative measure: {bill.title}. "
-                  "Return ONLY a JSON object with keys: 'score' (int 1-10) and 'reason' (string).")
-        
-        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-        
-        import json
-        data = json.loads(response.text)
-        return {"score": int(data.get('score', 0)), "analysis": data.get('reason', '')[:500]}
+        analyzer = BillRelevanceAnalyzer()
+        if not getattr(analyzer.client, 'available', True): return {"score": 0, "analysis": "API key missing"}
+        result = analyzer.analyze_titles([bill.title])
+        return next(iter(result.values()), {"score": 0, "analysis": "API Error"})
     except Exception as e:
         logger.error(f"Bill Analysis Error: {e}")
         return {"score": 0, "analysis": "API Error"}
@@ -0,0 +1,46 @@
+"""
+Parser anterior de páginas de SUTRA (BeautifulSoup + html.parser).
+
+Referencia para ``benchmark sutra_parse`` y ``test_sutra_parser.py``: el
+parser lxml de ``core.scraper`` debe dar el mismo resultado en los fixtures.
+El guion bajo evita que Django lo liste como comando.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+
+def parse_bill_html_bs4(content, url=''):
+    """Parseo anterior de ``LegisScraper.scrape_bill`` (BeautifulSoup + html.parser), como referencia."""
+    soup = BeautifulSoup(content, 'html.parser')
+
+    h1_tag = soup.find('h1')
+    if not h1_tag:
+        return None
+    full_header = h1_tag.get_text(strip=True)
+    match = re.search(r'\((.*?)\)', full_header)
+    number = match.group(1) if match else full_header[:20]
+
+    title = "Descripción no disponible"
+    for text in soup.find_all(string=True):
+        t = text.strip()
+        if (t.startswith("Para ") or t.startswith("Ley ")) and len(t) > 20:
+            title = t
+            break
+    if title == "Descripción no disponible":
+        title = full_header
+
+    h2_tag = soup.find('h2')
+    status = h2_tag.get_text(strip=True) if h2_tag else "Desconocido"
+
+    commission = "Sin asignar"
+    body_text = soup.get_text(" ", strip=True)
+    match_com = re.search(r'(Comisión de [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?: [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*)', body_text)
+    if match_com:
+        commission = match_com.group(1)
+    elif "Referido a" in body_text:
+        partes = body_text.split("Referido a")
+        if len(partes) > 1:
+            commission = partes[1].split('.')[0][:50].strip()
+
+    return {'number': number, 'title': title, 'status': status, 'commission': commission, 'sutra_url': url}
@@ -0,0 +1,448 @@
+"""
+Comando de Django: Benchmarks de Rendimiento
+============================================
+
+Mide escenarios críticos del pipeline con datos sintéticos. Todo lo que
+se escribe en la base de datos ocurre dentro de una transacción que se
+revierte al final, así que es seguro ejecutarlo contra una BD real.
+
+Uso:
+    python manage.py benchmark rss_ingest
+    python manage.py benchmark rss_ingest --sources 50 --entries 50
+    python manage.py benchmark near_duplicates --corpus 1000000
+    python manage.py benchmark sutra_parse --repeat 200
+    python manage.py benchmark legal_diff --pages 100
+    python manage.py benchmark legal_diff --old v1.pdf --new v2.pdf
+    python manage.py benchmark rate_limit --threads 16 --requests 20000
+    python manage.py benchmark rate_limit --cache-latency 0.3
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.middleware.security import RateLimitMiddleware
+
+
+class _Rollback(Exception):
+    """Fuerza el rollback de la transacción del benchmark."""
+
+
+@contextmanager
+def count_queries():
+    """Cuenta sentencias SQL ejecutadas (sin el tope de 9000 de ``queries_log``)."""
+    counter = {'n': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['n'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def legal_diff_charlevel(text_old, text_new):
+    """Diff anterior de ``analyze_legal_diff`` (SequenceMatcher por caracteres sobre el texto normalizado), como referencia."""
+    import difflib
+
+    t1, t2 = ' '.join(text_old.split()), ' '.join(text_new.split())
+    return [op for op in difflib.SequenceMatcher(a=t1, b=t2).get_opcodes() if op[0] != 'equal']
+
+
+LEGAL_WORDS = (
+    'ley persona secretario departamento gobierno puerto rico municipio reglamento disposición '
+    'agencia término multa delito contribución servicio público artículo sección inciso conforme '
+    'establecido mediante dispuesto cualquier aquella deberá podrá según párrafo presente estado'
+).split()
+
+
+def synthetic_bill_pair(pages, seed=0, articles_per_page=3):
+    """
+    Par (viejo, nuevo) de un proyecto sintético de ``pages`` páginas (~3,500
+    caracteres c/u) con incisos; el nuevo enmienda ~3 % de los artículos,
+    inserta dos (renumerando los siguientes) y elimina uno.
+    """
+    rng = random.Random(seed)
+
+    def words(n):
+        return ' '.join(rng.choice(LEGAL_WORDS) for _ in range(n))
+
+    articles = []
+    for _ in range(pages * articles_per_page):
+        body = [f"{words(6).capitalize()}.", words(90) + '.']
+        body += [f"({chr(97 + k)}) {words(rng.randint(20, 40))}." for k in range(rng.randint(0, 3))]
+        articles.append(body)
+
+    amended = [list(body) for body in articles]
+    for idx in rng.sample(range(len(amended)), max(1, len(amended) * 3 // 100)):
+        tokens = amended[idx][1].split()
+        for _ in range(3):
+            tokens[rng.randrange(len(tokens))] = rng.choice(LEGAL_WORDS)
+        amended[idx][1] = ' '.join(tokens)
+    del amended[rng.randrange(len(amended))]
+    for _ in range(2):
+        amended.insert(rng.randrange(len(amended)), [f"{words(6).capitalize()}.", words(90) + '.'])
+
+    def render(bill):
+        lines = ['LEY', 'Para enmendar la legislación vigente. EXPOSICIÓN DE MOTIVOS', words(200) + '.',
+                 'DECRÉTASE POR LA ASAMBLEA LEGISLATIVA DE PUERTO RICO:']
+        for number, body in enumerate(bill, start=1):
+            lines.append(f"Artículo {number}.- {body[0]}")
+            lines.extend(body[1:])
+        return '\n'.join(lines)
+
+    return render(articles), render(amended)
+
+
+def read_document_text(path):
+    """Texto de un PDF (pypdf) o de un archivo de texto."""
+    if path.lower().endswith('.pdf'):
+        from pypdf import PdfReader
+
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(path).pages)
+    with open(path, encoding='utf-8') as handle:
+        return handle.read()
+
+
+class LegacyRateLimitMiddleware(RateLimitMiddleware):
+    """``RateLimitMiddleware`` anterior (get / modificar dict / set por request), como referencia."""
+
+    def _check_rate_limit(self, ip_address, path=''):
+        cache = self.limiter.cache
+        cache_key = f'rate_limit:{ip_address}'
+        data = cache.get(cache_key, {'count': 0, 'reset_time': time.time() + self.rate_window})
+        if time.time() >= data['reset_time']:
+            data = {'count': 0, 'reset_time': time.time() + self.rate_window}
+        data['count'] += 1
+        cache.set(cache_key, data, self.rate_window)
+        return data['count'] <= self.rate_limit, 0
+
+
+class RoundTripCache:
+    """Envuelve la caché: cuenta los viajes y simula la latencia de red de una caché remota."""
+
+    def __init__(self, backend, latency):
+        self.backend, self.latency, self.trips = backend, latency, 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def call(*args, **kwargs):
+            with self._lock:
+                self.trips += 1
+            if self.latency:
+                time.sleep(self.latency)
+            return method(*args, **kwargs)
+        return call
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta benchmarks de rendimiento con datos sintéticos (sin efectos en la BD)'
+
+    SCENARIOS = ['rss_ingest', 'near_duplicates', 'sutra_parse', 'legal_diff', 'rate_limit']
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=self.SCENARIOS, help='Escenario a medir')
+        parser.add_argument(
+            '--sources',
+            type=int,
+            default=50,
+            help='rss_ingest: número de fuentes sintéticas (default: 50)',
+        )
+        parser.add_argument(
+            '--entries',
+            type=int,
+            default=50,
+            help='rss_ingest: entradas por fuente (default: 50)',
+        )
+        parser.add_argument(
+            '--corpus',
+            type=int,
+            default=1_000_000,
+            help='near_duplicates: huellas en el índice (default: 1000000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='sutra_parse: veces que se parsea cada fixture (default: 200)',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=100,
+            help='legal_diff: páginas del proyecto sintético (default: 100)',
+        )
+        parser.add_argument(
+            '--legacy-pages',
+            type=int,
+            default=10,
+            help='legal_diff: páginas para el diff por caracteres anterior, cuadrático (default: 10; 0 = omitir)',
+        )
+        parser.add_argument('--old', help='legal_diff: PDF/texto de la versión anterior (en vez del sintético)')
+        parser.add_argument('--new', help='legal_diff: PDF/texto de la versión nueva')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='rate_limit: hilos concurrentes (default: 16)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='rate_limit: requests en total (default: 20000)',
+        )
+        parser.add_argument(
+            '--cache-latency',
+            type=float,
+            default=0.0,
+            help='rate_limit: ms de red simulados por viaje a la caché (default: 0; Redis en otra máquina ~0.2-0.5)',
+        )
+        parser.add_argument(
+            '--real-embeddings',
+            action='store_true',
+            help='Usar el modelo real de embeddings en vez de vectores simulados',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('=' * 80)
+        self.stdout.write(self.style.HTTP_INFO(f"⏱️  BENCHMARK: {options['scenario']}"))
+        self.stdout.write('=' * 80)
+        getattr(self, f"bench_{options['scenario']}")(options)
+        self.stdout.write('=' * 80)
+
+    def _report(self, label, seconds, queries=None, extra=''):
+        q = f"{queries:6d} queries" if queries is not None else ''
+        self.stdout.write(f"  {label:60s} {seconds * 1000:9.1f} ms  {q} {extra}")
+
+    # --- Escenario: ingesta RSS ---
+
+    def bench_rss_ingest(self, options):
+        if not options['real_embeddings']:
+            # Debe fijarse antes de la primera instancia del singleton
+            os.environ.setdefault('LW_CI_MOCK_EMBEDDINGS', '1')
+
+        n_sources, n_entries = options['sources'], options['entries']
+        self.stdout.write(f"Fuentes: {n_sources} × entradas: {n_entries} = {n_sources * n_entries} artículos\n")
+
+        for label, ingest in (('Por entrada (exists + create)', self._ingest_per_entry),
+                              ('En bloque (link__in + bulk_create)', self._ingest_bulk)):
+            try:
+                with transaction.atomic():
+                    batches = self._synthetic_batches(n_sources, n_entries)
+                    for phase in ('1ª sync (todo nuevo)', '2ª sync (todo duplicado)'):
+                        with count_queries() as queries:
+                            started = time.perf_counter()
+                            created = ingest(batches)
+                            elapsed = time.perf_counter() - started
+                        self._report(f"{label} · {phase}", elapsed, queries['n'], f"(+{created})")
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+    def _synthetic_batches(self, n_sources, n_entries):
+        from core.models import NewsSource
+
+        now = timezone.now()
+        rng = random.Random(7)
+        vocab = ("cámara senado gobernador ley medida energía salud educación presupuesto municipio "
+                 "tribunal agencia contrato vivienda agua carreteras turismo policía fondos federal "
+                 "reforma permisos tarifa hospital escuela alcalde audiencia informe enmienda").split()
+        batches = []
+        for s in range(n_sources):
+            source = NewsSource.objects.create(name=f"bench-{s}", url=f"https://bench{s}.example/rss")
+            entries = [
+                {
+                    'title': f"Noticia {s}-{e}: " + ' '.join(rng.choices(vocab, k=8)),
+                    'link': f"https://bench{s}.example/noticia/{e}",
+                    'summary': ' '.join(rng.choices(vocab, k=30)),
+                    'published': (now - timedelta(minutes=e)).strftime('%a, %d %b %Y %H:%M:%S +0000'),
+                }
+                for e in range(n_entries)
+            ]
+            batches.append((source, entries))
+        return batches
+
+    def _ingest_per_entry(self, batches):
+        """Ruta anterior: dos round trips por entrada + señal de embedding por artículo."""
+        from core.models import Article
+        from core.utils.rss_sync import parse_date
+
+        created = 0
+        for source, entries in batches:
+            for entry in entries:
+                if Article.objects.filter(link=entry['link']).exists():
+                    continue
+                Article.objects.create(
+                    title=entry['title'],
+                    link=entry['link'],
+                    snippet=entry['summary'],
+                    published_at=parse_date(entry['published']),
+                    source=source,
+                )
+                created += 1
+        return created
+
+    def _ingest_bulk(self, batches):
+        from core.utils.rss_sync import ingest_entries
+
+        return sum(ingest_entries(batches).values())
+
+    # --- Escenario: casi-duplicados ---
+
+    def bench_near_duplicates(self, options):
+        """Costo por artículo de SimHash + búsqueda LSH contra un corpus grande (sin BD)."""
+        from services.near_duplicates import NearDuplicateIndex, simhash
+
+        corpus = options['corpus']
+        rng = random.Random(42)
+        index = NearDuplicateIndex()
+
+        started = time.perf_counter()
+        index.load((i, rng.getrandbits(64), i) for i in range(1, corpus + 1))
+        self._report(f"Carga del índice ({corpus} huellas)", time.perf_counter() - started)
+
+        texts = [
+            f"Cámara aprueba proyecto {n} sobre energía renovable y tarifas de la AEE. "
+            f"La medida {n} pasa ahora al Senado para su consideración final en {rng.choice(['marzo', 'abril'])}."
+            for n in range(1000)
+        ]
+        started = time.perf_counter()
+        fingerprints = [simhash(t) for t in texts]
+        hashing = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for article_id, fingerprint in enumerate(fingerprints, start=corpus + 1):
+            match = index.find(fingerprint)
+            index.add(article_id, fingerprint, match[1] if match else article_id)
+        lookup = time.perf_counter() - started
+
+        per_article = (hashing + lookup) / len(texts)
+        self._report("SimHash (1000 artículos)", hashing)
+        self._report("Búsqueda + alta LSH (1000 artículos)", lookup)
+        self._report("Por artículo", per_article,
+                     extra='✅' if per_article < 0.001 else '⚠️  (> 1 ms)')
+
+    # --- Escenario: parseo de páginas de SUTRA ---
+
+    def bench_sutra_parse(self, options):
+        """Tiempo de parseo por página: BeautifulSoup (anterior) vs lxml + XPath, sobre fixtures grabados."""
+        from pathlib import Path
+
+        from core.management.commands._sutra_reference import parse_bill_html_bs4
+        from core.scraper import parse_bill_html
+
+        fixtures = sorted((Path(settings.BASE_DIR) / 'fixtures' / 'sutra').glob('*.html'))
+        pages = [path.read_bytes() for path in fixtures]
+        repeat = options['repeat']
+        self.stdout.write(f"Fixtures: {len(pages)} páginas × {repeat} repeticiones\n")
+
+        mismatches = [p.name for p, page in zip(fixtures, pages) if parse_bill_html(page) != parse_bill_html_bs4(page)]
+        timings = {}
+        for label, parse in (('BeautifulSoup (html.parser)', parse_bill_html_bs4), ('lxml + XPath', parse_bill_html)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for page in pages:
+                    parse(page)
+            timings[label] = time.perf_counter() - started
+            self._report(f"{label} · por página", timings[label] / (repeat * len(pages)))
+
+        speedup = timings['BeautifulSoup (html.parser)'] / timings['lxml + XPath']
+        self.stdout.write(f"  Aceleración: {speedup:.1f}×")
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"  ⚠️  Resultados distintos en: {', '.join(mismatches)}"))
+        else:
+            self.stdout.write("  ✅ Mismos resultados en todos los fixtures")
+
+    # --- Escenario: diff de versiones de medidas ---
+
+    def bench_legal_diff(self, options):
+        """Diff de dos versiones de ~100 páginas: por caracteres (anterior) vs estructural + por palabras."""
+        from core.utils.legal_diff import diff_legal_texts, render_diff_html
+
+        if options['old'] and options['new']:
+            old, new = read_document_text(options['old']), read_document_text(options['new'])
+            legacy_pair = (old, new) if options['legacy_pages'] else None
+        else:
+            old, new = synthetic_bill_pair(options['pages'])
+            legacy_pair = synthetic_bill_pair(options['legacy_pages']) if options['legacy_pages'] else None
+        self.stdout.write(f"Textos: {len(old):,} / {len(new):,} caracteres\n")
+
+        started = time.perf_counter()
+        diff = diff_legal_texts(old, new)
+        elapsed = time.perf_counter() - started
+        stats = diff.stats
+        self._report("Estructural + palabras", elapsed,
+                     extra=f"{stats['units']} unidades · {stats['changed']} cambiadas · "
+                           f"{stats['added']} agregadas · {stats['removed']} eliminadas")
+
+        started = time.perf_counter()
+        html = render_diff_html(diff, old, new)
+        self._report("HTML de unidades cambiadas", time.perf_counter() - started, extra=f"{len(html):,} bytes")
+
+        if legacy_pair:
+            started = time.perf_counter()
+            legal_diff_charlevel(*legacy_pair)
+            legacy = time.perf_counter() - started
+            self._report(f"Por caracteres (anterior) · {len(legacy_pair[0]):,} caracteres", legacy)
+            started = time.perf_counter()
+            diff_legal_texts(*legacy_pair)
+            self._report(f"Estructural · {len(legacy_pair[0]):,} caracteres", time.perf_counter() - started)
+
+    # --- Escenario: rate limiting ---
+
+    def bench_rate_limit(self, options):
+        """Costo del middleware por request bajo concurrencia y requests admitidas de más (conteos perdidos)."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from django.test import RequestFactory, override_settings
+
+        threads, total = options['threads'], options['requests']
+        limit = total // 2
+        factory = RequestFactory()
+        backend = settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]
+        self.stdout.write(f"{total:,} requests de una IP · {threads} hilos · límite {limit:,} · caché {backend} "
+                          f"(+{options['cache_latency']} ms por viaje)\n")
+
+        from core.middleware.rate_limit import SlidingWindowLimiter
+
+        variants = [('get/set (anterior)', LegacyRateLimitMiddleware, None),
+                    ('Ventana deslizante atómica (1 viaje/request)', RateLimitMiddleware, SlidingWindowLimiter),
+                    (f"Dos niveles (lotes de {getattr(settings, 'RATE_LIMIT_LEASE_SIZE', 10)})",
+                     RateLimitMiddleware, None)]
+        for label, middleware_class, limiter_class in variants:
+            with override_settings(RATE_LIMIT_REQUESTS=limit, RATE_LIMIT_WINDOW=3600, RATE_LIMIT_ROUTES={}):
+                middleware = middleware_class(lambda request: None)
+            if limiter_class:
+                middleware.limiter = limiter_class()
+            shared = RoundTripCache(middleware.limiter.cache, options['cache_latency'] / 1000)
+            middleware.limiter.cache = shared
+            # IP única por corrida: no hereda contadores de otra
+            request = factory.get('/api/bills/', HTTP_X_FORWARDED_FOR=f'bench-{time.time_ns()}')
+
+            def run(n):
+                return sum(middleware.process_request(request) is None for _ in range(n))
+
+            chunks = [total // threads + (1 if i < total % threads else 0) for i in range(threads)]
+            logging.disable(logging.WARNING)  # un aviso por cada 429
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    admitted = sum(pool.map(run, chunks))
+                elapsed = time.perf_counter() - started
+            finally:
+                logging.disable(logging.NOTSET)
+            self._report(label, elapsed,
+                         extra=f"{elapsed / total * 1e6:6.1f} µs/request · {shared.trips:,} viajes a la caché · "
+                               f"admitidas {admitted:,} ({admitted - limit:+,} sobre el límite)")
@@ -1,10 +1,12 @@
-import time
 import logging
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from core.models import Bill, MonitoredMeasure
+from core.models import Bill, MonitoredMeasure, SutraFrontier
 from core.scraper import LegisScraper
-from core.utils import analyze_bill_relevance
+from core.utils import get_keyword_matcher
+from core.utils.bill_analysis import BillRelevanceAnalyzer
+from core.utils.bill_changes import apply_scraped_bill, notify_bill_change
+from core.utils.keyword_matcher import describe_hits
+from core.utils.sutra_frontier import SutraUnavailable, discover_new_numbers, measure_exists
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +27,28 @@ class Command(BaseCommand):
             default=10,
             help='Cantidad de medidas consecutivas a escanear'
         )
+        parser.add_argument(
+            '--discover',
+            action='store_true',
+            help='Descubrir la medida más reciente (frontera) y escanear solo las nuevas '
+                 '(a lo sumo --count) en vez del rango --start-id/--count'
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='No consultar SUTRA: re-parsear solo desde la caché HTTP en disco'
+        )
+        parser.add_argument(
+            '--chamber',
+            choices=['C', 'S'],
+            default='C',
+            help='Cámara a escanear: C (PC) o S (PS) (default: C)'
+        )
 
     def handle(self, *args, **options):
         start_id = options['start_id']
         count = options['count']
+        prefix_id = f"P{options['chamber']}"
         
         # Cleanup any previous bad saves with 'Error 404' in title
         try:
@@ -43,12 +63,16 @@ class Command(BaseCommand):
         
         if monitored_count == 0:
             self.stdout.write("⚠️ No hay medidas en seguimiento. Agregue una desde el Dashboard para comenzar.")
-            self.stdout.write(f"Iniciando escaneo secuencial desde PC{start_id} hasta PC{start_id + count - 1}...")
+            if not options['discover']:
+                self.stdout.write(f"Iniciando escaneo secuencial desde {prefix_id}{start_id} hasta {prefix_id}{start_id + count - 1}...")
         else:
             self.stdout.write(f"✓ {monitored_count} medidas en seguimiento activo.")
 
         # Initialize scraper
-        scraper = LegisScraper()
+        scraper = LegisScraper(offline=options['offline'] or None)
+
+        # Matcher compilado con todos los términos monitoreados (una pasada por medida)
+        matcher = get_keyword_matcher()
         
         # Get monitored measure IDs (if any)
         monitored_measures = list(
@@ -62,9 +86,13 @@ class Command(BaseCommand):
         for measure_id in monitored_measures:
             measures_to_process.append(('monitored', measure_id))
         
-        # Add sequential scan range
-        for i in range(start_id, start_id + count):
-            measure_id = f"PC{i}"
+        # Add sequential scan range (or only the numbers beyond the known frontier)
+        if options['discover']:
+            scan_range = self._discover(scraper, options['chamber'], prefix_id, count)
+        else:
+            scan_range = range(start_id, start_id + count)
+        for i in scan_range:
+            measure_id = f"{prefix_id}{i}"
             if measure_id not in monitored_measures:
                 measures_to_process.append(('sequential', measure_id))
 
@@ -75,19 +103,24 @@ class Command(BaseCommand):
         skip_count = 0
         error_count = 0
 
-        for scan_type, measure_id in measures_to_process:
+        pending_analysis = []
+
+        # Scraping concurrente con límite de tasa global; resultados en orden
+        scraped = scraper.scrape_many([measure_id for _, measure_id in measures_to_process])
+
+        for (scan_type, _), (measure_id, bill_data, scrape_error) in zip(measures_to_process, scraped):
             prefix = "🎯" if scan_type == 'monitored' else "🔍"
             self.stdout.write(f"{prefix} Procesando: {measure_id}")
 
             try:
-                # Scrape bill data directly - let scraper handle URL validation
-                bill_data = scraper.scrape_bill(measure_id)
-                
+                if scrape_error is not None:
+                    raise scrape_error
+
                 # If scraper returns None (404 or failure), skip saving
                 if bill_data is None:
                     self.stdout.write(f"  ⏭️  No se encontraron datos válidos para {measure_id}")
                     skip_count += 1
-                    time.sleep(1)
+                    self.stdout.write("-" * 80)
                     continue
 
                 # Extract and validate scraped data
@@ -96,43 +129,28 @@ class Command(BaseCommand):
                 
                 self.stdout.write(f"  📄 Título: {bill_title[:60]}...")
 
-                # Persist to database (only fields present in Bill model)
-                bill, created = Bill.objects.update_or_create(
-                    number=bill_number,
-                    defaults={
-                        'title': bill_title,
-                        'last_updated': timezone.now(),
-                    }
-                )
-
-                action = "creado" if created else "actualizado"
-                self.stdout.write(f"  💾 Bill {action}: {bill.number}")
-
-                # Fase 7: Análisis de IA (Gemini)
-                try:
-                    # Avoid duplicate AI calls: if already has a positive ai_score, skip.
-                    try:
-                        existing_score = int(getattr(bill, 'ai_score', 0) or 0)
-                    except Exception:
-                        existing_score = 0
-
-                    ai_called = False
-                    if existing_score > 0:
-                        self.stdout.write("  ⏩ Saltando IA (ya analizado)")
-                    else:
-                        self.stdout.write("  🤖 Analizando con IA...")
-                        result = analyze_bill_relevance(bill)
-                        ai_called = True
-                        if result and isinstance(result, dict):
-                            score = int(result.get('score', 0))
-                            analysis = result.get('analysis', '')
-                            bill.ai_score = score
-                            bill.ai_analysis = analysis
-                            bill.relevance_why = (analysis[:500] if analysis else '')
-                            bill.save(update_fields=['ai_score', 'ai_analysis', 'relevance_why'])
-                            self.stdout.write(f"  🤖 AI score: {score}")
-                except Exception as e:
-                    logger.error("AI analysis failed for %s: %s", bill.number, e, exc_info=True)
+                # Persist only if the page content changed (fingerprint on Bill)
+                change = apply_scraped_bill(bill_number, {**bill_data, 'title': bill_title})
+                bill = change.bill
+
+                if change.unchanged:
+                    self.stdout.write(f"  💤 Sin cambios: {bill.number}")
+                else:
+                    action = "creado" if change.created else f"actualizado ({', '.join(sorted(change.changed))})"
+                    self.stdout.write(f"  💾 Bill {action}: {bill.number}")
+                    if notify_bill_change(change):
+                        self.stdout.write(f"  🔔 Cambio de estatus notificado: {bill.status}")
+
+                    hits = matcher.scan(f"{bill_title} {bill_data.get('commission', '')}")
+                    if hits:
+                        self.stdout.write(f"  🏷️  Coincidencias: {'; '.join(describe_hits(hits))}")
+
+                # Fase 7: Análisis de IA (Gemini), por lotes al final del escaneo.
+                # También sin cambios en SUTRA: un análisis fallido (score 0) se reintenta.
+                if change.needs_analysis:
+                    pending_analysis.append(bill)
+                else:
+                    self.stdout.write("  ⏩ Saltando IA (ya analizado)")
 
                 success_count += 1
 
@@ -141,18 +159,10 @@ class Command(BaseCommand):
                 logger.error(f"Robot error en {measure_id}: {e}", exc_info=True)
                 error_count += 1
 
-            # Rate limiting to avoid overwhelming SUTRA server
-            try:
-                if 'ai_called' in locals() and ai_called:
-                    self.stdout.write("  ⏳ Pausa de seguridad (10s) para cuidar la cuota...")
-                    time.sleep(10)
-                else:
-                    time.sleep(1)
-            except Exception:
-                # Fallback single-second wait on any unexpected issue
-                time.sleep(1)
             self.stdout.write("-" * 80)
 
+        ai_stats = self._analyze(pending_analysis)
+
         # Final summary
         self.stdout.write("\n" + "=" * 80)
         self.stdout.write(self.style.SUCCESS(f"✅ Escaneo completado"))
@@ -160,4 +170,63 @@ class Command(BaseCommand):
         self.stdout.write(f"  • Saltados: {skip_count}")
         self.stdout.write(f"  • Errores: {error_count}")
         self.stdout.write(f"  • Total procesados: {len(measures_to_process)}")
-        self.stdout.write("=" * 80)
\ No newline at end of file
+        metrics = scraper.client.metrics.snapshot()
+        self.stdout.write(
+            f"  • SUTRA: {metrics['requests']} requests, {metrics['errors']} errores de red, "
+            f"{metrics['retries']} reintentos, {metrics['avg_latency_ms']:.0f} ms promedio, "
+            f"{metrics['peak_in_flight']} simultáneas máx."
+        )
+        if ai_stats:
+            self.stdout.write(
+                f"  • IA: {ai_stats['analyzed']} analizadas en {ai_stats['requests']} requests, "
+                f"{ai_stats['cached']} desde caché, {ai_stats['failed']} sin resultado, "
+                f"{ai_stats['quota_wait']:.0f}s esperando cuota"
+            )
+        if scraper.cache_adapter is not None:
+            stats = scraper.cache_adapter.stats
+            self.stdout.write(
+                f"  • Caché HTTP: {stats['hit']} directas, {stats['revalidated']} revalidadas (304), "
+                f"{stats['stale']} copias viejas, {stats['miss']} descargas"
+            )
+        self.stdout.write("=" * 80)
+
+    def _analyze(self, bills):
+        """Analiza con IA las medidas pendientes en lotes (caché por título + cuota compartida)."""
+        if not bills:
+            return None
+        self.stdout.write(f"🤖 Analizando con IA {len(bills)} medidas por lotes...")
+        analyzer = BillRelevanceAnalyzer()
+        try:
+            results = analyzer.analyze_bills(bills)
+        except Exception as e:
+            logger.error("AI analysis failed: %s", e, exc_info=True)
+            return None
+        for bill in bills:
+            result = results.get(bill.pk)
+            if not result:
+                continue
+            bill.ai_score = result['score']
+            bill.ai_analysis = result['analysis']
+            bill.relevance_why = result['analysis'][:500]
+            bill.save(update_fields=['ai_score', 'ai_analysis', 'relevance_why'])
+            self.stdout.write(f"  🤖 {bill.number}: AI score {bill.ai_score}")
+        return analyzer.stats
+
+    def _discover(self, scraper, chamber, prefix_id, max_new):
+        """Busca la frontera de la cámara (exponencial + binaria) y retorna los números nuevos."""
+        def exists(number):
+            return measure_exists(scraper.client, f"{prefix_id}{number}")
+
+        self.stdout.write(f"🧭 Buscando la medida más reciente en SUTRA ({prefix_id})...")
+        try:
+            new_numbers = discover_new_numbers(chamber, exists, max_new=max_new)
+        except SutraUnavailable as e:
+            # Una caída no es un 404: no se toca la frontera ni se escanea nada nuevo
+            self.stdout.write(self.style.ERROR(f"❌ SUTRA no responde, búsqueda cancelada: {e}"))
+            return range(0)
+        frontier = SutraFrontier.objects.get(chamber=chamber)
+        self.stdout.write(
+            f"🧭 Frontera: {prefix_id}{frontier.highest_number} ({frontier.probes} requests) · "
+            f"{len(new_numbers)} medidas nuevas"
+        )
+        return new_numbers
@@ -0,0 +1,37 @@
+"""
+Comando de Django: Pre-resumir Artículos en Bloque
+==================================================
+
+Genera ``ai_summary`` para los artículos pendientes, en orden de prioridad
+(presets primero), varios snippets por llamada al modelo y reutilizando
+resúmenes de notas con el mismo ``content_hash``.
+
+Uso:
+    python manage.py presummarize_articles
+    python manage.py presummarize_articles --limit 200
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils.bulk_summaries import presummarize_new_articles
+
+
+class Command(BaseCommand):
+    help = 'Resume en bloque los artículos nuevos (presets primero, caché por content_hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=getattr(settings, 'AI_PRESUMMARY_LIMIT', 50),
+            help='Artículos máximos a resumir en esta corrida',
+        )
+
+    def handle(self, *args, **options):
+        stats = presummarize_new_articles(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats['updated']} artículos resumidos: {stats['summarized']} por el modelo en "
+            f"{stats['requests']} requests, {stats['cached']} desde caché, {stats['failed']} sin resumen "
+            f"({stats['quota_wait']:.0f}s esperando cuota)"
+        ))
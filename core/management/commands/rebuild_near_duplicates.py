@@ -0,0 +1,64 @@
+"""
+Comando de Django: Reconstruir Clusters de Casi-Duplicados
+==========================================================
+
+Calcula la huella SimHash de los artículos existentes y reasigna
+``duplicate_of`` recorriendo el corpus en orden de inserción, de modo que
+el canónico de cada cluster es siempre el artículo más antiguo.
+
+Uso:
+    python manage.py rebuild_near_duplicates
+    python manage.py rebuild_near_duplicates --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import Article
+from services.near_duplicates import (NearDuplicateIndex, reset_near_duplicate_index,
+                                      simhash, to_signed)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula huellas SimHash y clusters de artículos casi duplicados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Artículos por bulk_update (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        index = NearDuplicateIndex()
+        pending = []
+        total = duplicates = 0
+
+        queryset = Article.objects.order_by('id').values_list('id', 'title', 'snippet')
+        for pk, title, snippet in queryset.iterator(chunk_size=batch_size):
+            fingerprint = simhash(f"{title} {snippet or ''}")
+            cluster_id = None
+            if fingerprint is not None:
+                match = index.find(fingerprint)
+                cluster_id = match[1] if match else None
+                index.add(pk, fingerprint, cluster_id or pk)
+            duplicates += cluster_id is not None
+            pending.append(Article(
+                id=pk,
+                simhash=to_signed(fingerprint) if fingerprint is not None else None,
+                duplicate_of_id=cluster_id,
+            ))
+            total += 1
+            if len(pending) >= batch_size:
+                Article.objects.bulk_update(pending, ['simhash', 'duplicate_of'])
+                pending = []
+
+        if pending:
+            Article.objects.bulk_update(pending, ['simhash', 'duplicate_of'])
+
+        # El índice en memoria de este proceso debe recargarse desde la BD
+        reset_near_duplicate_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} artículos procesados, {duplicates} marcados como casi-duplicados"
+        ))
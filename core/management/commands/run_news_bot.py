@@ -5,6 +5,8 @@ from django.utils import timezone
 
 from core.models import Article
 from core.utils import sync_all_rss_sources
+from core.utils.feed_schedule import sync_due_sources
+from core.utils.rss_sync import feed_cache_stats
 
 
 class Command(BaseCommand):
@@ -27,6 +29,16 @@ class Command(BaseCommand):
             type=int,
             help='Eliminar artículos con más de N días (ej: 7)'
         )
+        parser.add_argument(
+            '--due',
+            action='store_true',
+            help='Sincronizar solo las fuentes cuyo sondeo adaptativo venció'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Mostrar tasa de aciertos del GET condicional por fuente'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("=== ROBOT DE NOTICIAS RSS ===\n"))
@@ -45,10 +57,13 @@ class Command(BaseCommand):
             clean_first = not options['no_clean']
             max_entries = options['max_entries']
             
-            new_articles = sync_all_rss_sources(
-                max_entries=max_entries, 
-                clean_first=clean_first
-            )
+            if options['due']:
+                new_articles = sync_due_sources(max_entries=max_entries)
+            else:
+                new_articles = sync_all_rss_sources(
+                    max_entries=max_entries, 
+                    clean_first=clean_first
+                )
             
             if new_articles > 0:
                 self.stdout.write(self.style.SUCCESS(f"\n✅ Se agregaron {new_articles} artículos nuevos"))
@@ -59,4 +74,14 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"\n❌ Error durante sincronización: {e}"))
             raise
 
+        # 3. REPORTE DE CACHÉ CONDICIONAL (OPCIONAL)
+        if options['stats']:
+            self.stdout.write("\n📊 GET condicional por fuente (304 / sin cambios / descargas | artículos/h, intervalo):")
+            for row in feed_cache_stats():
+                self.stdout.write(
+                    f"   {row['name'][:30]:30s} {row['not_modified']:5d} / {row['unchanged']:5d} / "
+                    f"{row['fetches']:5d}  → {row['hit_rate'] * 100:5.1f}%"
+                    f"  | {row['publish_rate']:5.2f}/h, cada {row['poll_interval']} min"
+                )
+
         self.stdout.write(self.style.SUCCESS("\n=== PROCESO COMPLETADO ==="))
@@ -1,10 +1,13 @@
 import time
+from datetime import timedelta
 
+from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from core.models import SystemSettings
+from core.utils.feed_schedule import sync_due_sources
 
 
 class Command(BaseCommand):
@@ -14,6 +17,9 @@ class Command(BaseCommand):
         self.stdout.write("--- 🧠 INICIANDO CEREBRO AUTOMATIZADO ---")
         self.stdout.write("--- Basado en configuración del Panel de Control ---")
         
+        tick = getattr(settings, 'RSS_SCHEDULER_TICK_SECONDS', 60)
+        next_robot_at = None
+
         while True:
             try:
                 # Obtener la configuración (o crear una por defecto si no existe)
@@ -27,35 +33,25 @@ class Command(BaseCommand):
                     time.sleep(60)
                     continue
                 
-                # 2. Calcular fecha y hora actual (Puerto Rico)
-                now = timezone.localtime(timezone.now())
-                current_time = now.time()
-                current_weekday = str(now.weekday()) # 0=Lunes, 6=Domingo
-                
-                # 3. Lógica de Decisión
-                # ¿Es día laborable configurado?
-                dias_laborables = config.active_days.split(',')
-                es_dia_trabajo = current_weekday in dias_laborables
-                
-                # ¿Estamos en horario intensivo?
-                es_horario_trabajo = config.high_freq_start <= current_time <= config.high_freq_end
+                # 2. Noticias: cada fuente tiene su propio intervalo adaptativo,
+                #    así que se revisan las vencidas en cada tick
+                nuevas = sync_due_sources()
+                if nuevas:
+                    self.stdout.write(f"📰 {nuevas} noticias nuevas")
                 
-                # Determinar intervalo
-                if es_dia_trabajo and es_horario_trabajo:
-                    modo = "🔥 INTENSIVO"
-                    intervalo = config.high_freq_interval
-                else:
-                    modo = "🌙 PASIVO"
-                    intervalo = config.low_freq_interval
-                
-                # 4. Ejecutar Robot
-                self.stdout.write(f"[{now.strftime('%H:%M')}] Modo: {modo} | Próximo: {intervalo} min.")
-                
-                call_command('ejecutar_robot')
+                # 3. Robot SUTRA: intervalo global según modo intensivo/pasivo (hora de PR)
+                now = timezone.localtime(timezone.now())
+                if next_robot_at is None or now >= next_robot_at:
+                    modo = "🔥 INTENSIVO" if config.is_high_freq(now) else "🌙 PASIVO"
+                    intervalo = config.current_interval(now)
+                    self.stdout.write(f"[{now.strftime('%H:%M')}] Modo: {modo} | Próximo: {intervalo} min.")
+                    
+                    call_command('ejecutar_robot')
+                    next_robot_at = now + timedelta(minutes=intervalo)
                 
-                # 5. Dormir según el intervalo decidido
-                time.sleep(intervalo * 60)
+                # 4. Dormir hasta el próximo tick
+                time.sleep(tick)
                 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Error crítico en loop: {e}"))
-                time.sleep(30)
\ No newline at end of file
+                time.sleep(30)
@@ -9,11 +9,12 @@ Uso:
     python manage.py sync_bills --limit 50
     python manage.py sync_bills --chamber S --start 500
     python manage.py sync_bills --ids "P. de la C. 1001" "P. del S. 250"
+    python manage.py sync_bills --discover --chamber S
 """
 
 from django.core.management.base import BaseCommand, CommandError
 
-from core.utils.sutra_sync import sync_sutra_bills, sync_specific_bills
+from core.utils.sutra_sync import sync_new_bills, sync_specific_bills, sync_sutra_bills
 
 
 class Command(BaseCommand):
@@ -43,6 +44,13 @@ class Command(BaseCommand):
             help='Número inicial de medida (default: 1000)'
         )
         
+        parser.add_argument(
+            '--discover',
+            action='store_true',
+            help='Descubrir la frontera de la cámara y sincronizar solo lo nuevo (a lo sumo --limit) '
+                 'más las medidas monitoreadas'
+        )
+        
         parser.add_argument(
             '--ids',
             nargs='+',
@@ -65,6 +73,10 @@ class Command(BaseCommand):
                 # Sincronización específica
                 self.stdout.write(f"Modo: Sincronización específica de {len(specific_ids)} medidas")
                 synced_count = sync_specific_bills(specific_ids)
+            elif options['discover']:
+                chamber_name = 'Cámara de Representantes' if chamber == 'C' else 'Senado'
+                self.stdout.write(f"Modo: Descubrimiento de medidas nuevas ({chamber_name})")
+                synced_count = sync_new_bills(chamber=chamber, limit=limit)
             else:
                 # Sincronización por rango
                 chamber_name = 'Cámara de Representantes' if chamber == 'C' else 'Senado'
@@ -0,0 +1,198 @@
+"""
+Sliding-window rate limiter built on atomic cache counters.
+
+Each (scope, client) pair keeps one integer counter per fixed window in the
+Django cache. A request increments the current window's counter with
+``cache.incr`` (atomic on Redis, Memcached and LocMemCache), so concurrent
+requests never lose counts. The rate is estimated as a sliding window:
+
+    estimate = previous_count * (1 - elapsed / window) + current_count
+
+The previous window's counter is final once that window is over, so it is
+read from the cache once per window per process and then kept locally: the
+hot path is a single ``incr`` round trip (plus one ``add`` when a window's
+counter is first created).
+
+``LeasedLimiter`` adds a per-process tier on top: instead of one ``incr``
+per request it leases a block of request numbers at once
+(``incr(key, size)``) and hands them out locally, so the shared cache is
+touched once per ``size`` requests. Each leased number is only used if it
+fits under the limit, hence:
+
+- Over-admission: none. A number n is admitted only if
+  ``previous * weight + n <= limit``, the same test the one-tier limiter
+  applies to its n-th request, so a client never gets more than ``limit``
+  (minus the weighted previous window) per window, however many processes
+  serve it.
+- Under-admission: numbers leased by one process are invisible to the
+  others. With P processes a client spreading requests over all of them
+  may be refused up to ``(P - 1) * (size - 1)`` requests early in a
+  window (two threads refilling the same key at once count as two
+  processes). Leases shrink near the limit and ``size`` is capped at a
+  tenth of the limit to keep this small.
+- Refusals are cached locally until ``retry_after``: a client over its
+  limit costs no cache round trips either.
+
+Usage:
+    limiter = LeasedLimiter(lease_size=10)
+    allowed, retry_after = limiter.hit('search:203.0.113.7', limit=30, window=60)
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from django.core.cache import cache as default_cache
+
+KEY_PREFIX = 'rate_limit'
+# Finalized previous-window counts kept per process before the memo is reset
+MAX_MEMO_KEYS = 10000
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter limiter over a Django cache backend."""
+
+    def __init__(self, cache=None, clock: Callable[[], float] = time.time):
+        self.cache = cache or default_cache
+        self.clock = clock
+        self._previous: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, key: str, window: int, index: int) -> str:
+        return f'{KEY_PREFIX}:{key}:{window}:{index}'
+
+    def _incr(self, cache_key: str, window: int, delta: int = 1) -> int:
+        """Atomically add ``delta`` requests to ``cache_key``, creating it if needed."""
+        try:
+            return self.cache.incr(cache_key, delta)
+        except ValueError:
+            # Counter missing (new window or evicted). Only one add() wins;
+            # the others fall back to incr on the counter it created.
+            if self.cache.add(cache_key, delta, timeout=window * 2):
+                return delta
+            return self.cache.incr(cache_key, delta)
+
+    def _previous_count(self, cache_key: str) -> int:
+        """Count of an already-closed window (read once, then memoized)."""
+        count = self._previous.get(cache_key)
+        if count is None:
+            count = int(self.cache.get(cache_key) or 0)
+            with self._lock:
+                if len(self._previous) >= MAX_MEMO_KEYS:
+                    self._previous.clear()
+                self._previous[cache_key] = count
+        return count
+
+    def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        """
+        Count one request for ``key`` and check it against ``limit`` requests
+        per ``window`` seconds.
+
+        Returns:
+            (allowed, retry_after): retry_after is the number of seconds until
+            the estimate drops back under the limit (0 when allowed).
+        """
+        now = self.clock()
+        index = int(now // window)
+        elapsed = now - index * window
+        current = self._incr(self._key(key, window, index), window)
+        previous = self._previous_count(self._key(key, window, index - 1))
+        weight = 1 - elapsed / window
+        if previous * weight + current <= limit:
+            return True, 0
+        return False, self._retry_after(previous, current, limit, window, elapsed)
+
+    @staticmethod
+    def _retry_after(previous: int, current: int, limit: int, window: int, elapsed: float) -> int:
+        if current > limit or not previous:
+            # This window alone is over the limit: wait at least until it closes
+            wait = window - elapsed
+        else:
+            # previous * (1 - t / window) + current <= limit
+            wait = window * (1 - (limit - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+
+@dataclass
+class _Lease:
+    """Request numbers ``[next, end]`` of window ``index`` still usable by this process."""
+
+    index: int
+    next: int
+    end: int
+    headroom: int  # allowance left after ``end`` when leased (guides the next lease size)
+    denied_until: float = 0.0
+
+
+class LeasedLimiter(SlidingWindowLimiter):
+    """
+    Two-tier limiter: a local lease of request numbers per key, refilled
+    from the shared counter in blocks of up to ``lease_size``.
+    """
+
+    def __init__(self, cache=None, clock: Callable[[], float] = time.time, lease_size: int = 10):
+        super().__init__(cache, clock)
+        self.lease_size = max(1, lease_size)
+        self._leases: Dict[str, _Lease] = {}
+
+    def _next_lease_size(self, limit: int, lease: Optional[_Lease], index: int) -> int:
+        size = max(1, min(self.lease_size, limit // 10))
+        if lease is not None and lease.index == index:
+            # Near the limit lease less, so fewer numbers sit unused in this process
+            size = max(1, min(size, lease.headroom // 2))
+        return size
+
+    def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        now = self.clock()
+        index = int(now // window)
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.index == index:
+                if now < lease.denied_until:
+                    return False, max(1, math.ceil(lease.denied_until - now))
+                if lease.next <= lease.end:
+                    lease.next += 1
+                    return True, 0
+        return self._lease(key, limit, window, now, index, lease)
+
+    def _lease(self, key: str, limit: int, window: int, now: float, index: int,
+               lease: Optional[_Lease]) -> Tuple[bool, int]:
+        """Reserve a block of request numbers in the shared counter and take the first."""
+        elapsed = now - index * window
+        size = self._next_lease_size(limit, lease, index)
+        end = self._incr(self._key(key, window, index), window, size)
+        start = end - size + 1
+        previous = self._previous_count(self._key(key, window, index - 1))
+        # Highest request number admissible right now
+        allowance = math.floor(limit - previous * (1 - elapsed / window))
+
+        with self._lock:
+            if len(self._leases) >= MAX_MEMO_KEYS:
+                self._leases.clear()
+            if start <= allowance:
+                usable = min(end, allowance)
+                self._leases[key] = _Lease(index, start + 1, usable, allowance - usable)
+                return True, 0
+            retry_after = self._retry_after(previous, start, limit, window, elapsed)
+            self._leases[key] = _Lease(index, start, start - 1, 0, now + retry_after)
+            return False, retry_after
+
+
+def resolve_route_limit(path: str, routes: Dict[str, Tuple[int, int]],
+                        default: Tuple[int, int]) -> Tuple[str, int, int]:
+    """
+    Pick the limit for ``path``: the longest matching prefix in ``routes``
+    (``{'/api/search/': (requests, window)}``), else ``default``.
+
+    Returns:
+        (scope, limit, window); each scope has its own counters.
+    """
+    match: Optional[str] = None
+    for prefix in routes:
+        if path.startswith(prefix) and (match is None or len(prefix) > len(match)):
+            match = prefix
+    if match is None:
+        return 'default', default[0], default[1]
+    limit, window = routes[match]
+    return match, limit, window
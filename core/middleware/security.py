@@ -1,26 +1,33 @@
 """
 Security middleware for rate limiting, request validation, and security headers.
 """
-from django.core.cache import cache
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
-import time
+from typing import Tuple
 import logging
 
+from core.middleware.rate_limit import LeasedLimiter, resolve_route_limit
+
 logger = logging.getLogger(__name__)
 
 
 class RateLimitMiddleware(MiddlewareMixin):
     """
     Rate limiting middleware using Django cache.
-    Limits requests per IP address over a time window.
+    Limits requests per IP address with a sliding window of atomic counters
+    (see ``core.middleware.rate_limit``). Each process leases blocks of
+    ``RATE_LIMIT_LEASE_SIZE`` requests from the shared cache, so most
+    requests are checked locally. Routes listed in ``RATE_LIMIT_ROUTES``
+    get their own, usually tighter, limit.
     """
     
     def __init__(self, get_response):
         super().__init__(get_response)
         self.rate_limit = getattr(settings, 'RATE_LIMIT_REQUESTS', 100)
         self.rate_window = getattr(settings, 'RATE_LIMIT_WINDOW', 60)  # seconds
+        self.route_limits = getattr(settings, 'RATE_LIMIT_ROUTES', {})
+        self.limiter = LeasedLimiter(lease_size=getattr(settings, 'RATE_LIMIT_LEASE_SIZE', 10))
     
     def process_request(self, request):
         """Check rate limit before processing request."""
@@ -32,12 +39,15 @@ class RateLimitMiddleware(MiddlewareMixin):
         ip_address = self._get_client_ip(request)
         
         # Check rate limit
-        if not self._check_rate_limit(ip_address):
+        allowed, retry_after = self._check_rate_limit(ip_address, request.path)
+        if not allowed:
             logger.warning(f"Rate limit exceeded for IP: {ip_address}")
-            return JsonResponse(
+            response = JsonResponse(
                 {'error': 'Rate limit exceeded. Please try again later.'},
                 status=429
             )
+            response['Retry-After'] = str(retry_after)
+            return response
         
         return None
     
@@ -55,33 +65,21 @@ class RateLimitMiddleware(MiddlewareMixin):
             ip = request.META.get('REMOTE_ADDR', '')
         return ip
     
-    def _check_rate_limit(self, ip_address: str) -> bool:
+    def _check_rate_limit(self, ip_address: str, path: str = '') -> Tuple[bool, int]:
         """
-        Check if IP address is within rate limits.
+        Count one request and check it against the limit for its route.
         
         Args:
             ip_address: Client IP address
+            path: Request path, used to pick a per-route limit
         
         Returns:
-            True if within limits, False if exceeded
+            (allowed, retry_after): retry_after in seconds, 0 when allowed
         """
-        cache_key = f'rate_limit:{ip_address}'
-        
-        # Get current request count and timestamp
-        data = cache.get(cache_key, {'count': 0, 'reset_time': time.time() + self.rate_window})
-        
-        # Reset if window expired
-        if time.time() >= data['reset_time']:
-            data = {'count': 0, 'reset_time': time.time() + self.rate_window}
-        
-        # Increment count
-        data['count'] += 1
-        
-        # Update cache
-        cache.set(cache_key, data, self.rate_window)
-        
-        # Check limit
-        return data['count'] <= self.rate_limit
+        scope, limit, window = resolve_route_limit(
+            path, self.route_limits, (self.rate_limit, self.rate_window)
+        )
+        return self.limiter.hit(f'{scope}:{ip_address}', limit, window)
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_bill_ai_analysis_bill_ai_score_bill_relevance_why'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newssource',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 del último feed procesado', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='etag',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='fetch_count',
+            field=models.PositiveIntegerField(default=0, help_text='Descargas intentadas'),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='not_modified_count',
+            field=models.PositiveIntegerField(default=0, help_text='Respuestas 304 Not Modified'),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='unchanged_count',
+            field=models.PositiveIntegerField(default=0, help_text='Descargas 200 con contenido idéntico'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_newssource_conditional_get'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Artículo canónico del cluster si este es un casi-duplicado', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='core.article'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, help_text='Huella SimHash de 64 bits (con signo) de título + snippet', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_article_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newssource',
+            name='last_polled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='poll_interval',
+            field=models.PositiveIntegerField(default=30, help_text='Intervalo de sondeo actual (minutos)'),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='publish_rate',
+            field=models.FloatField(default=0.0, help_text='Artículos nuevos por hora (media móvil exponencial)'),
+        ),
+    ]
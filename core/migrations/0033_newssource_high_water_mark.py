@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_newssource_adaptive_polling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newssource',
+            name='last_seen_link',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='newssource',
+            name='last_seen_published',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_newssource_high_water_mark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SutraFrontier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chamber', models.CharField(choices=[('C', 'Cámara'), ('S', 'Senado')], max_length=1, unique=True)),
+                ('highest_number', models.PositiveIntegerField(default=0)),
+                ('probes', models.PositiveIntegerField(default=0, help_text='Requests usadas en el último descubrimiento')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_sutrafrontier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='commission',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 de los campos normalizados del último scrape', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='status',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_airesultcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='summary_error',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary_requested_at',
+            field=models.DateTimeField(blank=True, help_text='Cuándo se encoló/tomó el último trabajo de resumen', null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary_status',
+            field=models.CharField(blank=True, choices=[('', 'Sin solicitar'), ('queued', 'En cola'), ('running', 'Generando'), ('done', 'Listo'), ('failed', 'Falló')], db_index=True, default='', max_length=10),
+        ),
+    ]
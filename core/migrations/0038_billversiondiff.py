@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_article_summary_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillVersionDiff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(help_text='SHA-256 de ambos textos + versión del motor', max_length=64)),
+                ('units', models.JSONField(default=list)),
+                ('stats', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('new_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='diffs_as_new', to='core.billversion')),
+                ('old_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='diffs_as_old', to='core.billversion')),
+            ],
+            options={
+                'unique_together': {('old_version', 'new_version')},
+            },
+        ),
+    ]
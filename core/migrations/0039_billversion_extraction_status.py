@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_billversiondiff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billversion',
+            name='extraction_error',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='billversion',
+            name='extraction_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='billversion',
+            name='extraction_status',
+            field=models.CharField(blank=True, choices=[('', 'Sin archivo'), ('pending', 'En cola'), ('running', 'Extrayendo'), ('done', 'Listo'), ('failed', 'Falló')], db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='billversion',
+            name='page_offsets',
+            field=models.JSONField(blank=True, default=list, help_text='Carácter de full_text donde empieza cada página'),
+        ),
+    ]
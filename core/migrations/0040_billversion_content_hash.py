@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_billversion_extraction_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billversion',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 del archivo (almacenamiento por contenido)', max_length=64),
+        ),
+    ]
@@ -3,6 +3,7 @@ from datetime import time
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from pgvector.django import VectorField, HnswIndex
 
 # --- 1. GESTIÓN DE NOTICIAS ---
@@ -12,6 +13,31 @@ class NewsSource(models.Model):
     icon_class = models.CharField(max_length=50, default="fas fa-newspaper")
     is_active = models.BooleanField(default=True)
 
+    # GET condicional: validadores de la última descarga exitosa
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=100, blank=True, default="")
+    content_hash = models.CharField(max_length=64, blank=True, default="", help_text="SHA-256 del último feed procesado")
+    fetch_count = models.PositiveIntegerField(default=0, help_text="Descargas intentadas")
+    not_modified_count = models.PositiveIntegerField(default=0, help_text="Respuestas 304 Not Modified")
+    unchanged_count = models.PositiveIntegerField(default=0, help_text="Descargas 200 con contenido idéntico")
+
+    # MARCA DE AGUA: entrada más reciente ya procesada (corte temprano del parseo)
+    last_seen_link = models.URLField(max_length=500, blank=True, default="")
+    last_seen_published = models.DateTimeField(null=True, blank=True)
+
+    # SONDEO ADAPTATIVO: intervalo según la tasa de publicación observada
+    publish_rate = models.FloatField(default=0.0, help_text="Artículos nuevos por hora (media móvil exponencial)")
+    poll_interval = models.PositiveIntegerField(default=30, help_text="Intervalo de sondeo actual (minutos)")
+    last_polled_at = models.DateTimeField(null=True, blank=True)
+    next_poll_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    @property
+    def cache_hit_rate(self):
+        """Fracción de descargas que no requirieron parseo (304 o hash idéntico)."""
+        if not self.fetch_count:
+            return 0.0
+        return (self.not_modified_count + self.unchanged_count) / self.fetch_count
+
     def __str__(self): return self.name
 
 class Article(models.Model):
@@ -22,12 +48,37 @@ class Article(models.Model):
     snippet = models.TextField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True)
     ai_summary = models.TextField(blank=True, null=True)
+    SUMMARY_STATUS_CHOICES = [
+        ('', 'Sin solicitar'),
+        ('queued', 'En cola'),
+        ('running', 'Generando'),
+        ('done', 'Listo'),
+        ('failed', 'Falló'),
+    ]
+    summary_status = models.CharField(max_length=10, choices=SUMMARY_STATUS_CHOICES, blank=True, default="", db_index=True)
+    summary_requested_at = models.DateTimeField(null=True, blank=True, help_text="Cuándo se encoló/tomó el último trabajo de resumen")
+    summary_error = models.CharField(max_length=255, blank=True, default="")
     content_hash = models.CharField(max_length=32, blank=True, null=True, help_text="Hash MD5 del contenido")
     relevance_score = models.FloatField(
         default=0.0,
         help_text="Score de relevancia calculado (0-100)"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # DETECCIÓN DE CASI-DUPLICADOS (notas sindicadas con distinta URL)
+    simhash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Huella SimHash de 64 bits (con signo) de título + snippet"
+    )
+    duplicate_of = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        help_text="Artículo canónico del cluster si este es un casi-duplicado"
+    )
     
     # CAMPO PARA BÚSQUEDA FULL-TEXT (PostgreSQL tsvector)
     search_vector = SearchVectorField(
@@ -52,11 +103,18 @@ class Article(models.Model):
             # NOTA: Índice HNSW para embeddings se crea manualmente (ver create_hnsw_index.sql)
         ]
     
+    @staticmethod
+    def compute_content_hash(snippet):
+        """Hash MD5 del snippet (None si está vacío). También se usa en inserciones en bloque."""
+        if not snippet:
+            return None
+        import hashlib
+        return hashlib.md5(snippet.encode('utf-8')).hexdigest()
+
     def save(self, *args, **kwargs):
         # Calcular hash del contenido si existe snippet
         if self.snippet:
-            import hashlib
-            self.content_hash = hashlib.md5(self.snippet.encode('utf-8')).hexdigest()
+            self.content_hash = self.compute_content_hash(self.snippet)
         # Ejemplo de manejo perezoso de PDF/DOCX: importar solo cuando se usa
         # (evita fallos en import time si librerías no están instaladas)
         # Si en el futuro se necesita procesar archivos, importar `pypdf`/`docx` dentro del bloque.
@@ -101,62 +159,90 @@ class Bill(models.Model):
     ai_score = models.IntegerField(default=0)
     ai_analysis = models.TextField(blank=True, null=True)
     relevance_why = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=255, blank=True, default="")
+    commission = models.CharField(max_length=255, blank=True, default="")
+    content_hash = models.CharField(max_length=64, blank=True, default="", help_text="SHA-256 de los campos normalizados del último scrape")
 
     def __str__(self): return self.number
 
+class AIResultCache(models.Model):
+    """Resultados de IA reutilizables, indexados por el hash de la entrada normalizada."""
+    kind = models.CharField(max_length=50)  # Ej: bill_relevance
+    key_hash = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    model_name = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('kind', 'key_hash')
+
+    def __str__(self): return f"{self.kind}:{self.key_hash[:12]}"
+
 class BillVersion(models.Model):
+    EXTRACTION_STATUS_CHOICES = [
+        ('', 'Sin archivo'),
+        ('pending', 'En cola'),
+        ('running', 'Extrayendo'),
+        ('done', 'Listo'),
+        ('failed', 'Falló'),
+    ]
+
     bill = models.ForeignKey(Bill, related_name='versions', on_delete=models.CASCADE)
     version_name = models.CharField(max_length=100) # Ej: Entirillado, Aprobado
     pdf_file = models.FileField(upload_to='bills_pdfs/')
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True, help_text="SHA-256 del archivo (almacenamiento por contenido)")
     full_text = models.TextField(blank=True, null=True)
+    page_offsets = models.JSONField(default=list, blank=True, help_text="Carácter de full_text donde empieza cada página")
+    extraction_status = models.CharField(max_length=10, choices=EXTRACTION_STATUS_CHOICES, blank=True, default="", db_index=True)
+    extraction_error = models.CharField(max_length=255, blank=True, default="")
+    extraction_requested_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        # 1. Guardar el archivo primero
+        # Archivo nuevo: se guarda por su SHA-256 (el mismo contenido se comparte entre versiones)
+        if self.pdf_file and not self.pdf_file._committed:
+            from core.utils.document_store import cached_text, store_document
+            name, self.content_hash = store_document(self.pdf_file)
+            self.pdf_file = name
+            # Contenido ya extraído antes (re-subida o mismo archivo en otra medida): sin extracción
+            cached = None if self.full_text else cached_text(self.content_hash)
+            if cached is not None:
+                self.full_text, self.page_offsets = cached
+                self.extraction_status = 'done'
+        # El texto se extrae en segundo plano (core.utils.extraction_jobs); aquí solo se marca pendiente
+        if self.pdf_file and not self.full_text and not self.extraction_status:
+            self.extraction_status = 'pending'
         super().save(*args, **kwargs)
-        
-        # 2. Extraer texto automáticamente según el formato
-        if self.pdf_file and not self.full_text:
-            try:
-                file_path = self.pdf_file.path
-                extracted_text = ""
-                
-                # A. SI ES PDF
-                if file_path.lower().endswith('.pdf'):
-                    try:
-                        from pypdf import PdfReader
-                        reader = PdfReader(file_path)
-                        for page in reader.pages:
-                            text = page.extract_text()
-                            if text:
-                                extracted_text += text + "\n"
-                    except ImportError:
-                        # pypdf not installed in this environment; skip extraction
-                        pass
-                
-                # B. SI ES WORD (.DOCX) - NUEVO
-                elif file_path.lower().endswith('.docx'):
-                    try:
-                        import docx
-                        doc = docx.Document(file_path)
-                        for para in doc.paragraphs:
-                            if para.text:
-                                extracted_text += para.text + "\n"
-                    except ImportError:
-                        # python-docx not installed; skip extraction
-                        pass
-                
-                # Guardar el texto extraído
-                if extracted_text:
-                    self.full_text = extracted_text
-                    super().save(update_fields=['full_text'])
-                    
-            except Exception as e:
-                print(f"Error leyendo archivo {self.pdf_file.name}: {e}")
 
     def __str__(self): return f"{self.bill.number} - {self.version_name}"
 
+class BillVersionDiff(models.Model):
+    """Diff precalculado entre dos versiones (opcodes por unidad, no HTML; ver core.utils.legal_diff)."""
+    old_version = models.ForeignKey(BillVersion, related_name='diffs_as_old', on_delete=models.CASCADE)
+    new_version = models.ForeignKey(BillVersion, related_name='diffs_as_new', on_delete=models.CASCADE)
+    source_hash = models.CharField(max_length=64, help_text="SHA-256 de ambos textos + versión del motor")
+    units = models.JSONField(default=list)  # Solo unidades con cambios: [key, label, tag, old, new, ops]
+    stats = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('old_version', 'new_version')
+
+    def __str__(self): return f"{self.old_version_id} → {self.new_version_id}"
+
 # --- 3. CONFIGURACIÓN Y MONITOREO ---
+class SutraFrontier(models.Model):
+    """Número de medida más alto que existe en SUTRA, por cámara (descubrimiento incremental)."""
+    CHAMBER_CHOICES = [('C', 'Cámara'), ('S', 'Senado')]
+
+    chamber = models.CharField(max_length=1, choices=CHAMBER_CHOICES, unique=True)
+    highest_number = models.PositiveIntegerField(default=0)
+    probes = models.PositiveIntegerField(default=0, help_text="Requests usadas en el último descubrimiento")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Frontera {self.get_chamber_display()}: {self.highest_number}"
+
 class SystemSettings(models.Model):
     """Configuración del servicio de monitoreo automático"""
     is_active = models.BooleanField(default=True, help_text="Activar/desactivar el servicio globalmente")
@@ -173,6 +259,26 @@ class SystemSettings(models.Model):
     def __str__(self):
         return f"Config Sistema ({'Activo' if self.is_active else 'Pausado'})"
 
+    def is_high_freq(self, now=None):
+        """True si ``now`` (hora local de PR) cae en un día activo dentro del horario intensivo."""
+        now = timezone.localtime(now or timezone.now())
+        active_days = [d.strip() for d in self.active_days.split(',')]
+        return (str(now.weekday()) in active_days
+                and self.high_freq_start <= now.time() <= self.high_freq_end)
+
+    def current_interval(self, now=None):
+        """Intervalo global (minutos) según el modo intensivo/pasivo."""
+        return self.high_freq_interval if self.is_high_freq(now) else self.low_freq_interval
+
+    def polling_multiplier(self, now=None):
+        """
+        Factor para los intervalos de sondeo por fuente: 1 en horario intensivo,
+        ``low_freq_interval / high_freq_interval`` fuera de él.
+        """
+        if self.is_high_freq(now) or self.high_freq_interval <= 0:
+            return 1.0
+        return max(1.0, self.low_freq_interval / self.high_freq_interval)
+
 class Keyword(models.Model):
     term = models.CharField(max_length=100)
     def __str__(self): return self.term
@@ -8,6 +8,7 @@ import sys
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +17,52 @@ scheduler = None
 
 def sync_news_task():
     """
-    Tarea que sincroniza noticias RSS automáticamente.
-    Se ejecuta cada 30 minutos.
+    Tarea que sincroniza las fuentes RSS cuyo sondeo venció.
+    Cada fuente tiene su propio intervalo adaptativo (ver core.utils.feed_schedule);
+    el scheduler solo revisa cada ``RSS_SCHEDULER_TICK_SECONDS``.
     """
-    from core.utils import sync_all_rss_sources
+    from core.utils.feed_schedule import sync_due_sources
     
-    logger.info("🤖 Iniciando sincronización automática de noticias...")
     try:
-        new_count = sync_all_rss_sources(max_entries=15, clean_first=True)
-        logger.info(f"✅ Sincronización completada: {new_count} artículos nuevos")
+        new_count = sync_due_sources(max_entries=15)
+        if new_count:
+            logger.info(f"✅ Sincronización completada: {new_count} artículos nuevos")
     except Exception as e:
         logger.error(f"❌ Error en sincronización automática: {e}")
 
+def resume_summaries_task():
+    """Re-encola trabajos de resumen IA perdidos (reinicio del proceso, worker caído)."""
+    from core.utils.summary_jobs import resume_summary_jobs
+
+    try:
+        resumed = resume_summary_jobs()
+        if resumed:
+            logger.info(f"🤖 {resumed} trabajos de resumen re-encolados")
+    except Exception as e:
+        logger.error(f"❌ Error re-encolando resúmenes: {e}")
+
+def resume_extractions_task():
+    """Re-encola extracciones de texto de versiones perdidas (reinicio del proceso)."""
+    from core.utils.extraction_jobs import resume_extraction_jobs
+
+    try:
+        resumed = resume_extraction_jobs()
+        if resumed:
+            logger.info(f"📄 {resumed} extracciones de texto re-encoladas")
+    except Exception as e:
+        logger.error(f"❌ Error re-encolando extracciones: {e}")
+
+def presummarize_task():
+    """Resume en bloque los artículos nuevos (ver core.utils.bulk_summaries)."""
+    from core.utils.bulk_summaries import presummarize_new_articles
+
+    try:
+        stats = presummarize_new_articles(limit=getattr(settings, 'AI_PRESUMMARY_LIMIT', 50))
+        if stats['updated']:
+            logger.info(f"🤖 {stats['updated']} artículos pre-resumidos ({stats['requests']} requests)")
+    except Exception as e:
+        logger.error(f"❌ Error en pre-resumen de artículos: {e}")
+
 def start_scheduler():
     """
     Inicia el scheduler de tareas automáticas.
@@ -46,19 +81,54 @@ def start_scheduler():
     # Usar scheduler en memoria (sin DjangoJobStore para evitar warning)
     scheduler = BackgroundScheduler()
     
-    # Tarea: Sincronizar noticias cada 30 minutos
+    # Tarea: Sondear las fuentes RSS vencidas (intervalo adaptativo por fuente)
+    tick = getattr(settings, 'RSS_SCHEDULER_TICK_SECONDS', 60)
     scheduler.add_job(
         sync_news_task,
-        trigger=IntervalTrigger(minutes=30),
-        id="sync_news_every_30min",
-        name="Sincronizar Noticias RSS",
+        trigger=IntervalTrigger(seconds=tick),
+        id="sync_due_news_sources",
+        name="Sincronizar Noticias RSS (fuentes vencidas)",
         replace_existing=True,
         max_instances=1,  # Solo una instancia a la vez
+        coalesce=True,
+    )
+
+    # Tarea: Recuperar trabajos de resumen IA en cola/abandonados
+    scheduler.add_job(
+        resume_summaries_task,
+        trigger=IntervalTrigger(seconds=60),
+        id="resume_summary_jobs",
+        name="Recuperar trabajos de resumen IA",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Tarea: Recuperar extracciones de texto de versiones perdidas
+    scheduler.add_job(
+        resume_extractions_task,
+        trigger=IntervalTrigger(seconds=60),
+        id="resume_extraction_jobs",
+        name="Recuperar extracciones de texto de versiones",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Tarea: Pre-resumir artículos nuevos en bloque
+    scheduler.add_job(
+        presummarize_task,
+        trigger=IntervalTrigger(minutes=getattr(settings, 'AI_PRESUMMARY_INTERVAL_MINUTES', 10)),
+        id="presummarize_articles",
+        name="Pre-resumir artículos nuevos",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
     )
     
     try:
-        print("⏰ Scheduler iniciado - Sincronización automática cada 30 minutos")
-        logger.info("⏰ Scheduler iniciado - Sincronización automática cada 30 minutos")
+        print(f"⏰ Scheduler iniciado - Sondeo adaptativo de fuentes RSS (revisión cada {tick}s)")
+        logger.info(f"⏰ Scheduler iniciado - Sondeo adaptativo de fuentes RSS (revisión cada {tick}s)")
         scheduler.start()
     except Exception as e:
         logger.error(f"Error iniciando scheduler: {e}")
@@ -1,26 +1,145 @@
 import re
 import logging
 
+import lxml.html
 import requests
-import urllib3
-from bs4 import BeautifulSoup
+from lxml import etree
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from core.sutra_client import SUTRA_BASE_URL, SutraClient, get_sutra_client, normalize_measure_id
 
 logger = logging.getLogger(__name__)
 
+# "Comisión de Salud", "Comisión de Hacienda y Presupuesto"...
+COMMISSION_RE = re.compile(r'(Comisión de [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?: [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*)')
+
+# Text nodes that may hold the title / commission, filtered in C by libxml2
+_TITLE_CANDIDATES = etree.XPath(
+    "//body//text()[starts-with(normalize-space(), 'Para ') or starts-with(normalize-space(), 'Ley ')]"
+)
+_COMMISSION_CANDIDATES = etree.XPath("//body//text()[contains(., 'Comisión de')]")
+_REFERRAL_CANDIDATES = etree.XPath("//body//text()[contains(., 'Referido a')]")
+
+
+def _element_text(element, sep=''):
+    """Stripped text of ``element`` (same as BeautifulSoup ``get_text(sep, strip=True)``)."""
+    return sep.join(t.strip() for t in element.itertext() if t.strip())
+
+
+def _text_owner(text):
+    """
+    Element whose text contains ``text``. For a *tail* string (text after a
+    child, e.g. ``<li><b>fecha</b> Referido a...</li>``) lxml's ``getparent()``
+    is the preceding sibling, so go one level up.
+    """
+    element = text.getparent()
+    return element.getparent() if text.is_tail else element
+
+
+def _parse_document(content):
+    """Parse HTML bytes with lxml, preferring UTF-8 when it decodes cleanly."""
+    try:
+        content.decode('utf-8')
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+    except UnicodeDecodeError:
+        parser = lxml.html.HTMLParser()
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def parse_bill_html(content, url=''):
+    """
+    Extract number/title/status/commission from a SUTRA measure page.
+
+    Uses lxml with targeted XPath so only candidate text nodes are visited,
+    instead of materializing every string of the page.
+    Returns None when the page has no ``<h1>`` (not a measure page).
+    """
+    doc = _parse_document(content)
+
+    # 1. NÚMERO
+    h1_tag = doc.find('.//h1')
+    if h1_tag is None:
+        return None
+    full_header = _element_text(h1_tag)
+    match = re.search(r'\((.*?)\)', full_header)
+    number = match.group(1) if match else full_header[:20]
+
+    # 2. TÍTULO: first text starting with "Para " / "Ley " long enough to be a description
+    title = full_header
+    for text in _TITLE_CANDIDATES(doc):
+        t = text.strip()
+        if (t.startswith("Para ") or t.startswith("Ley ")) and len(t) > 20:
+            title = t
+            break
+
+    # 3. ESTATUS
+    h2_tag = doc.find('.//h2')
+    status = _element_text(h2_tag) if h2_tag is not None else "Desconocido"
+
+    # 4. COMISIÓN: "Comisión de ..." or, failing that, the phrase after "Referido a"
+    commission = "Sin asignar"
+    for text in _COMMISSION_CANDIDATES(doc):
+        match_com = COMMISSION_RE.search(_element_text(_text_owner(text), ' '))
+        if match_com:
+            commission = match_com.group(1)
+            break
+    else:
+        for text in _REFERRAL_CANDIDATES(doc):
+            partes = _element_text(_text_owner(text), ' ').split("Referido a")
+            if len(partes) > 1:
+                commission = partes[1].split('.')[0][:50].strip()
+                break
+
+    return {
+        'number': number,
+        'title': title,
+        'status': status,
+        'commission': commission,
+        'sutra_url': url
+    }
+
+
 class LegisScraper:
     """
     Scraper for SUTRA OSLPR legislative measures.
     Handles robust ID normalization and data extraction.
+
+    All HTTP goes through ``SutraClient`` (shared pool, retries, rate limit,
+    disk cache and metrics); by default the process-wide client is used.
     """
     
-    def __init__(self):
-        self.base_url = "https://sutra.oslpr.org/medidas"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, client=None, offline=None):
+        if client is None:
+            # Offline runs get their own client so the shared one keeps hitting the network
+            client = SutraClient(offline=True) if offline else get_sutra_client()
+        self.client = client
+        self.base_url = f"{SUTRA_BASE_URL}/medidas"
+
+    @property
+    def session(self):
+        return self.client.session
+
+    @property
+    def cache_adapter(self):
+        return self.client.cache_adapter
+
+    @property
+    def max_in_flight(self):
+        return self.client.max_in_flight
+
+    def fetch_many(self, fetch, measure_ids):
+        """
+        Run ``fetch(measure_id)`` concurrently over ``measure_ids``.
+
+        Requests made through ``self.client`` share its token bucket, so SUTRA
+        sees at most ``SUTRA_RATE_LIMIT`` requests/s and ``SUTRA_MAX_IN_FLIGHT``
+        open requests regardless of latency or how many callers are active.
+        Yields ``(measure_id, result, error)`` in input order.
+        """
+        return self.client.map(fetch, measure_ids)
+
+    def scrape_many(self, measure_ids):
+        """Concurrent ``scrape_bill`` over ``measure_ids`` (see ``fetch_many``)."""
+        return self.fetch_many(self.scrape_bill, measure_ids)
     
     def normalize_measure_id(self, measure_id):
         """
@@ -31,10 +150,7 @@ class LegisScraper:
             '160071' -> '160071' (keep as-is for numeric IDs)
             'PS0979' -> 'ps0979'
         """
-        clean_id = str(measure_id).lower()
-        clean_id = clean_id.replace('p. de la c.', 'pc')
-        clean_id = clean_id.replace(' ', '').replace('.', '')
-        return clean_id
+        return normalize_measure_id(measure_id)
     
     def scrape_bill(self, measure_id):
         """
@@ -42,14 +158,12 @@ class LegisScraper:
         Returns None on 404 or failure.
         Returns dict with 'number' and 'title' keys on success.
         """
-        # Normalize the ID for URL construction
-        normalized_id = self.normalize_measure_id(measure_id)
-        url = f"{self.base_url}/{normalized_id}"
+        url = self.client.measure_url(measure_id)
         
         logger.info(f"Scraping {url} for measure {measure_id}")
         
         try:
-            response = self.session.get(url, timeout=20, verify=False)
+            response = self.client.get(url)
             
             # Check status codes first
             if response.status_code == 404:
@@ -61,62 +175,7 @@ class LegisScraper:
                 return None
             
             # Status is 200, parse content
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 1. NÚMERO
-            h1_tag = soup.find('h1')
-            if h1_tag:
-                full_header = h1_tag.get_text(strip=True)
-                match = re.search(r'\((.*?)\)', full_header)
-                number = match.group(1) if match else full_header[:20]
-            else:
-                return None
-
-            # 2. TÍTULO
-            title = "Descripción no disponible"
-            all_texts = soup.find_all(string=True)
-            for text in all_texts:
-                t = text.strip()
-                if (t.startswith("Para ") or t.startswith("Ley ")) and len(t) > 20:
-                    title = t
-                    break
-            if title == "Descripción no disponible":
-                title = full_header
-
-            # 3. ESTATUS
-            h2_tag = soup.find('h2')
-            status = h2_tag.get_text(strip=True) if h2_tag else "Desconocido"
-
-            # --- 4. NUEVO: COMISIÓN ---
-            # Buscamos la frase "Referido a..." o cualquier mención de Comisión
-            commission = "Sin asignar"
-            
-            # Buscamos en todo el texto visible
-            body_text = soup.get_text(" ", strip=True)
-            
-            # Expresión regular para encontrar "Comisión de [Algo]"
-            # Busca: Comisión de Salud, Comisión de Hacienda, etc.
-            match_com = re.search(r'(Comisión de [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?: [A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*)', body_text)
-            
-            if match_com:
-                commission = match_com.group(1)
-            elif "Referido a" in body_text:
-                # Intento alternativo: buscar la frase cercana a "Referido"
-                try:
-                    partes = body_text.split("Referido a")
-                    if len(partes) > 1:
-                        subparte = partes[1].split('.')[0] # Tomar hasta el punto
-                        commission = subparte[:50].strip() # Limitar largo
-                except:
-                    pass
-
-            return {
-                'number': number,
-                'title': title,
-                'status': status,
-                'commission': commission,
-                'sutra_url': url
-            }
+            return parse_bill_html(response.content, url)
 
         except requests.Timeout:
             logger.error(f"Timeout scraping {measure_id}")
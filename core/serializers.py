@@ -28,11 +28,16 @@ class ArticleSearchResultSerializer(serializers.Serializer):
     rrf_score = serializers.FloatField(read_only=True)
     semantic_rank = serializers.IntegerField(read_only=True, allow_null=True)
     keyword_rank = serializers.IntegerField(read_only=True, allow_null=True)
+
+    # Casi-duplicados (notas sindicadas)
+    cluster_id = serializers.IntegerField(read_only=True, required=False)
+    duplicates = serializers.IntegerField(read_only=True, required=False)
     
     class Meta:
         fields = [
             'id', 'title', 'snippet', 'link', 'published_at', 'source', 
-            'ai_summary', 'rrf_score', 'semantic_rank', 'keyword_rank'
+            'ai_summary', 'rrf_score', 'semantic_rank', 'keyword_rank',
+            'cluster_id', 'duplicates'
         ]
 
 
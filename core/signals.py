@@ -3,19 +3,38 @@ Señales para generación automática de embeddings
 =================================================
 
 Este módulo registra señales Django para automatizar la generación
-de embeddings semánticos cuando se crean o actualizan artículos.
+de embeddings semánticos cuando se crean o actualizan artículos,
+invalidar el matcher compilado de keywords cuando cambian los términos y
+encolar la extracción de texto y precalcular los diffs cuando llega una
+versión nueva de una medida.
 """
 
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from core.models import Article
+from core.models import (Article, BillVersion, Keyword, MonitoredCommission,
+                         MonitoredMeasure)
+from core.utils.extraction_jobs import PENDING, enqueue_extraction
+from core.utils.keyword_matcher import invalidate_keyword_matcher
+from core.utils.version_diffs import precompute_version_diffs
 from services.embedding_service import EmbeddingGenerator
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_save, sender=Keyword)
+@receiver(post_delete, sender=Keyword)
+@receiver(post_save, sender=MonitoredMeasure)
+@receiver(post_delete, sender=MonitoredMeasure)
+@receiver(post_save, sender=MonitoredCommission)
+@receiver(post_delete, sender=MonitoredCommission)
+def invalidate_matcher_on_term_change(sender, instance, **kwargs):
+    """Invalida el matcher compilado de keywords cuando cambian los términos."""
+    invalidate_keyword_matcher()
+
+
 @receiver(post_save, sender=Article)
 def auto_generate_embedding(sender, instance, created, **kwargs):
     """
@@ -59,3 +78,23 @@ def auto_generate_embedding(sender, instance, created, **kwargs):
     except Exception as e:
         # NO propagamos el error para evitar que falle el guardado del artículo
         logger.error(f"Error generando embedding para Article {instance.id}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=BillVersion)
+def precompute_diffs_on_new_text(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Precalcula los diffs de la versión contra las demás de su medida cuando
+    su texto queda disponible (al crearla con texto o tras la extracción).
+    """
+    if not instance.full_text:
+        return
+    if not created and not (update_fields and 'full_text' in update_fields):
+        return
+    transaction.on_commit(lambda: precompute_version_diffs(instance))
+
+
+@receiver(post_save, sender=BillVersion)
+def queue_text_extraction(sender, instance, created, **kwargs):
+    """Envía la extracción de texto a la cola en segundo plano (al confirmar la transacción)."""
+    if created and instance.extraction_status == PENDING:
+        transaction.on_commit(lambda: enqueue_extraction(instance.pk))
@@ -0,0 +1,208 @@
+"""
+Cliente Unificado de SUTRA
+==========================
+
+Un solo cliente HTTP para todo lo que consulta SUTRA (robot, ``sync_bills``
+y el verificador de estado), para que el pool de conexiones, el límite de
+tasa y las métricas sean globales en el proceso en vez de por ruta de código:
+
+- Sesión keep-alive con pool del tamaño de ``SUTRA_MAX_IN_FLIGHT``
+- Normalización única de IDs ('P. de la C. 1234', 'PC1234' → 'pc1234')
+- Reintentos con backoff exponencial para errores de conexión, 429 y 5xx
+  (``SUTRA_RETRIES``, ``SUTRA_RETRY_BACKOFF``; respeta ``Retry-After``)
+- Token bucket (``SUTRA_RATE_LIMIT`` req/s) + tope de requests simultáneas
+- Caché HTTP en disco con revalidación condicional (ver ``core.utils.http_cache``)
+- Métricas: requests, errores, reintentos, latencia, estados HTTP y de caché
+
+Uso:
+    from core.sutra_client import get_sutra_client
+
+    client = get_sutra_client()
+    response = client.get_measure('P. de la C. 1234')
+    print(client.metrics.snapshot())
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import requests
+import urllib3
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.utils.http_cache import CACHE_HEADER, CachingAdapter, HttpCache
+from core.utils.throttle import TokenBucket, run_throttled
+
+# SUTRA tiene certificados antiguos
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+SUTRA_BASE_URL = "https://sutra.oslpr.org"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def normalize_measure_id(measure_id) -> str:
+    """
+    Normaliza un ID de medida para URLs y comparaciones.
+
+    Examples:
+        'PC160071' -> 'pc160071'
+        'P. de la C. 1234' -> 'pc1234'
+        'P. del S. 250' -> 'ps250'
+        '160071' -> '160071'
+    """
+    clean_id = str(measure_id).lower()
+    clean_id = clean_id.replace('p. de la c.', 'pc').replace('p. del s.', 'ps')
+    return clean_id.replace(' ', '').replace('.', '')
+
+
+class SutraMetrics:
+    """Contadores thread-safe de las requests a SUTRA."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.retries = 0
+            self.latency_total = 0.0
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.status = Counter()
+            self.cache = Counter()
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, elapsed: float, response: Optional[requests.Response] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latency_total += elapsed
+            if response is None:
+                self.errors += 1
+                return
+            self.status[response.status_code] += 1
+            self.cache[response.headers.get(CACHE_HEADER, 'MISS')] += 1
+            retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+            self.retries += len(retries or ())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'avg_latency_ms': (self.latency_total / self.requests * 1000) if self.requests else 0.0,
+                'peak_in_flight': self.peak_in_flight,
+                'status': dict(self.status),
+                'cache': dict(self.cache),
+            }
+
+
+class SutraClient:
+    """
+    Cliente HTTP compartido para SUTRA.
+
+    Args:
+        rate: requests por segundo (default ``SUTRA_RATE_LIMIT``)
+        max_in_flight: requests simultáneas y tamaño del pool (default ``SUTRA_MAX_IN_FLIGHT``)
+        offline: servir solo desde la caché en disco (default ``SUTRA_HTTP_CACHE_OFFLINE``)
+    """
+
+    def __init__(self, rate: Optional[float] = None, max_in_flight: Optional[int] = None,
+                 offline: Optional[bool] = None):
+        self.rate = rate or getattr(settings, 'SUTRA_RATE_LIMIT', 2.0)
+        self.max_in_flight = max_in_flight or getattr(settings, 'SUTRA_MAX_IN_FLIGHT', 4)
+        self.timeout = getattr(settings, 'SUTRA_TIMEOUT', 20)
+        if offline is None:
+            offline = getattr(settings, 'SUTRA_HTTP_CACHE_OFFLINE', False)
+
+        retry = Retry(
+            total=getattr(settings, 'SUTRA_RETRIES', 3),
+            backoff_factor=getattr(settings, 'SUTRA_RETRY_BACKOFF', 0.5),
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter_kwargs = {'pool_connections': 1, 'pool_maxsize': self.max_in_flight, 'max_retries': retry}
+
+        self.cache_adapter = None
+        if getattr(settings, 'SUTRA_HTTP_CACHE', True) or offline:
+            self.cache_adapter = CachingAdapter(
+                HttpCache(getattr(settings, 'SUTRA_HTTP_CACHE_DIR', 'cache/sutra')),
+                max_age=getattr(settings, 'SUTRA_HTTP_CACHE_MAX_AGE', 0),
+                offline=offline,
+                **adapter_kwargs,
+            )
+            adapter = self.cache_adapter
+        else:
+            adapter = HTTPAdapter(**adapter_kwargs)
+
+        self.session = requests.Session()
+        self.session.mount(SUTRA_BASE_URL, adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+        self.bucket = TokenBucket(self.rate, capacity=1)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.metrics = SutraMetrics()
+
+    normalize_measure_id = staticmethod(normalize_measure_id)
+
+    def measure_url(self, measure_id) -> str:
+        return f"{SUTRA_BASE_URL}/medidas/{normalize_measure_id(measure_id)}"
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET limitado por tasa y concurrencia; los errores de red se propagan."""
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', False)
+        self.bucket.acquire()
+        with self._slots:
+            self.metrics.started()
+            started = time.monotonic()
+            response = None
+            try:
+                response = self.session.get(url, **kwargs)
+                return response
+            finally:
+                self.metrics.finished(time.monotonic() - started, response)
+
+    def get_measure(self, measure_id, **kwargs) -> requests.Response:
+        return self.get(self.measure_url(measure_id), **kwargs)
+
+    def map(self, fetch, measure_ids):
+        """
+        ``fetch(measure_id)`` en paralelo (hasta ``max_in_flight``), en orden de entrada.
+
+        El límite de tasa lo aplica ``get``, así que lo comparten todas las
+        llamadas concurrentes del proceso. Entrega ``(measure_id, resultado, error)``.
+        """
+        return run_throttled(fetch, measure_ids, rate=None, max_in_flight=self.max_in_flight)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[SutraClient] = None
+_client_lock = threading.Lock()
+
+
+def get_sutra_client() -> SutraClient:
+    """Cliente compartido del proceso (pool, límite de tasa y métricas globales)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SutraClient()
+    return _client
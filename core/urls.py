@@ -42,7 +42,9 @@ urlpatterns = [
     path('api/search/', views.DocumentSearchView.as_view(), name='api_search'),
     path('api/search/stats/', views.SearchStatsView.as_view(), name='api_search_stats'),
     path('api/resumir/<int:article_id>/', views.api_resumir_noticia, name='api_resumir_noticia'),
+    path('api/resumir/<int:article_id>/estado/', views.api_resumen_estado, name='api_resumen_estado'),
     path('api/generate-keywords/', views.generate_keywords_ai, name='generate_keywords_ai'),
+    path('api/comparador/<int:diff_id>/hunks/', views.api_diff_hunks, name='api_diff_hunks'),
 
     # --- ⚙️ Gestión de Fuentes y Perfiles ---
     path('api/sources/add/', views.api_add_source, name='api_add_source'),
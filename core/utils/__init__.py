@@ -1,8 +1,10 @@
 # Exponer funciones utilitarias para facilitar imports
 from .paths import PROJECT_ROOT
 from .rss_sync import sync_all_rss_sources
+from .keyword_matcher import get_keyword_matcher
 
 __all__ = [
     "PROJECT_ROOT",
     "sync_all_rss_sources",
+    "get_keyword_matcher",
 ]
\ No newline at end of file
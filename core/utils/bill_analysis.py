@@ -0,0 +1,219 @@
+"""
+Análisis de Relevancia de Medidas por Lotes
+===========================================
+
+En vez de un prompt por medida (y una pausa fija de 10 s después de cada
+uno), los títulos se agrupan en lotes que caben en un presupuesto de tokens
+(``AI_BATCH_TOKEN_BUDGET``, a lo sumo ``AI_BATCH_MAX_ITEMS`` títulos) y cada
+lote es una sola request que devuelve un arreglo JSON ``[{id, score, reason}]``.
+
+- Caché: los resultados se guardan en ``AIResultCache`` bajo el SHA-256 del
+  título normalizado, así que un título ya visto (la misma medida en otra
+  corrida, o una medida gemela en la otra cámara) no vuelve a la API
+- Cuota: cada lote espera en el ``QuotaManager`` compartido; un 429 pausa la
+  cuota con backoff y el lote se reintenta
+- Respuestas incompletas: los títulos que el modelo omitió se reintentan solos
+
+Uso:
+    from core.utils.bill_analysis import BillRelevanceAnalyzer
+
+    results = BillRelevanceAnalyzer().analyze_bills(bills)   # {bill.pk: {'score', 'analysis'}}
+"""
+
+import hashlib
+import json
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.ai_client import (ITEMS_MARKER, estimate_tokens, get_ai_client,
+                            get_quota_manager, pack_by_budget)
+
+logger = logging.getLogger(__name__)
+
+CACHE_KIND = 'bill_relevance'
+# Tokens de respuesta estimados por título (score + una oración)
+OUTPUT_TOKENS_PER_ITEM = 60
+
+PROMPT_TEMPLATE = (
+    "Eres un analista legislativo de Puerto Rico. Para cada medida de la lista, "
+    "evalúa su relevancia para un bufete de abogados.\n"
+    "Devuelve SOLO un arreglo JSON con un objeto por medida, con las claves: "
+    "'id' (el mismo id recibido), 'score' (entero 1-10) y 'reason' (una oración).\n"
+    f"{ITEMS_MARKER}\n"
+)
+
+_WS_RE = re.compile(r'\s+')
+
+
+def normalize_title(title: str) -> str:
+    """Minúsculas, espacios colapsados y sin puntuación final (clave de caché)."""
+    return _WS_RE.sub(' ', str(title or '')).strip().lower().rstrip('.;: ')
+
+
+def title_hash(title: str) -> str:
+    return hashlib.sha256(normalize_title(title).encode('utf-8')).hexdigest()
+
+
+def build_prompt(titles: List[str]) -> str:
+    """Prompt de un lote; los ids son posiciones cortas ("0", "1"...) para no gastar tokens."""
+    payload = [{'id': str(i), 'title': title} for i, title in enumerate(titles)]
+    return PROMPT_TEMPLATE + json.dumps(payload, ensure_ascii=False)
+
+
+def pack_batches(items: List[Tuple[str, str]], token_budget: int, max_items: int) -> List[List[Tuple[str, str]]]:
+    """
+    Agrupa ``(id, título)`` en lotes cuyo prompt + respuesta estimados caben en
+    ``token_budget``. Un título que por sí solo excede el presupuesto va en su
+    propio lote (no se trunca).
+    """
+    def cost(item):
+        return estimate_tokens(json.dumps({'id': '00', 'title': item[1]}, ensure_ascii=False)) + OUTPUT_TOKENS_PER_ITEM
+
+    return pack_by_budget(items, cost, token_budget, max_items, base_tokens=estimate_tokens(PROMPT_TEMPLATE))
+
+
+def parse_response(text: str) -> Dict[str, Dict]:
+    """``{id: {'score', 'analysis'}}`` a partir del arreglo JSON del modelo (ignora entradas inválidas)."""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        # Algunos modelos envuelven el arreglo: {"results": [...]}
+        data = next((v for v in data.values() if isinstance(v, list)), [data])
+    results = {}
+    for entry in data:
+        if not isinstance(entry, dict) or 'id' not in entry:
+            continue
+        try:
+            score = max(0, min(10, int(entry.get('score', 0))))
+        except (TypeError, ValueError):
+            continue
+        results[str(entry['id'])] = {'score': score, 'analysis': str(entry.get('reason', ''))[:500]}
+    return results
+
+
+class DatabaseResultCache:
+    """Caché persistente en ``AIResultCache``."""
+
+    def __init__(self, kind: str = CACHE_KIND):
+        self.kind = kind
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        from core.models import AIResultCache
+
+        rows = AIResultCache.objects.filter(kind=self.kind, key_hash__in=list(keys))
+        return {row.key_hash: row.payload for row in rows}
+
+    def set_many(self, results: Dict[str, Dict], model_name: str = '') -> None:
+        from core.models import AIResultCache
+
+        AIResultCache.objects.bulk_create(
+            [AIResultCache(kind=self.kind, key_hash=key, payload=payload, model_name=model_name)
+             for key, payload in results.items()],
+            ignore_conflicts=True,
+        )
+
+
+class MemoryResultCache:
+    """Caché en memoria con la misma interfaz (corridas de prueba, tests)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_many(self, results: Dict[str, Dict], model_name: str = '') -> None:
+        self.data.update(results)
+
+
+class BillRelevanceAnalyzer:
+    """
+    Analiza títulos de medidas por lotes, con caché y control de cuota.
+
+    Args:
+        client: cliente de modelo (default ``get_ai_client()``)
+        quota: ``QuotaManager`` (default el compartido del proceso)
+        cache: almacén de resultados (default ``DatabaseResultCache``)
+    """
+
+    def __init__(self, client=None, quota=None, cache=None,
+                 token_budget: Optional[int] = None, max_items: Optional[int] = None):
+        self.client = client or get_ai_client()
+        self.quota = quota or get_quota_manager()
+        self.cache = cache if cache is not None else DatabaseResultCache()
+        self.token_budget = token_budget or getattr(settings, 'AI_BATCH_TOKEN_BUDGET', 6000)
+        self.max_items = max_items or getattr(settings, 'AI_BATCH_MAX_ITEMS', 25)
+        self.stats = {'requests': 0, 'cached': 0, 'analyzed': 0, 'failed': 0, 'quota_wait': 0.0}
+
+    def _call(self, batch: List[Tuple[str, str]]) -> Optional[Dict[str, Dict]]:
+        """
+        Una request para ``batch`` (reintenta tras 429). Retorna ``{hash: resultado}``
+        de lo contestado, o None si la request falló (cuota agotada, red, JSON inválido).
+        """
+        prompt = build_prompt([title for _, title in batch])
+        tokens = estimate_tokens(prompt) + OUTPUT_TOKENS_PER_ITEM * len(batch)
+        try:
+            answers = parse_response(self.quota.call(lambda: self.client.generate_json(prompt), tokens, self.stats))
+        except Exception as e:
+            logger.error(f"Bill Analysis Error (lote de {len(batch)}): {e}")
+            return None
+        return {key: answers[str(i)] for i, (key, _) in enumerate(batch) if str(i) in answers}
+
+    def analyze_titles(self, titles: Iterable[str]) -> Dict[str, Dict]:
+        """
+        ``{title_hash: {'score', 'analysis'}}`` para cada título analizado (o en caché).
+        Si una request falla se detiene: los títulos restantes quedan sin analizar
+        para la próxima corrida en vez de reintentarse uno por uno.
+        """
+        by_hash = {}
+        for title in titles:
+            if title:
+                by_hash.setdefault(title_hash(title), title)
+        if not by_hash:
+            return {}
+
+        results = self.cache.get_many(by_hash)
+        self.stats['cached'] += len(results)
+        pending = [(key, title) for key, title in by_hash.items() if key not in results]
+        if pending and not getattr(self.client, 'available', True):
+            logger.warning(f"Sin API key de IA: {len(pending)} títulos quedan sin analizar")
+            self.stats['failed'] += len(pending)
+            return results
+
+        remaining = len(pending)
+        for batch in pack_batches(pending, self.token_budget, self.max_items):
+            answered = self._call(batch)
+            failed = answered is None
+            answered = answered or {}
+            # Títulos omitidos en una respuesta válida: un intento individual más
+            if not failed and len(batch) > 1:
+                for item in batch:
+                    if item[0] in answered:
+                        continue
+                    single = self._call([item])
+                    if single is None:
+                        failed = True
+                        break
+                    answered.update(single)
+            fresh = {key: answered[key] for key, _ in batch if key in answered}
+            self.stats['analyzed'] += len(fresh)
+            remaining -= len(fresh)
+            if fresh:
+                self.cache.set_many(fresh, getattr(self.client, 'model_name', ''))
+                results.update(fresh)
+            if failed:
+                logger.warning(f"Análisis de IA interrumpido: {remaining} títulos quedan para la próxima corrida")
+                break
+        self.stats['failed'] += remaining
+        return results
+
+    def analyze_bills(self, bills) -> Dict[int, Dict]:
+        """``{bill.pk: {'score', 'analysis'}}``; las medidas sin resultado se omiten."""
+        bills = list(bills)
+        results = self.analyze_titles(bill.title for bill in bills)
+        return {
+            bill.pk: results[title_hash(bill.title)]
+            for bill in bills if bill.title and title_hash(bill.title) in results
+        }
@@ -0,0 +1,141 @@
+"""
+Detección de Cambios en Medidas Scrapeadas
+==========================================
+
+Cada scrape de SUTRA se reduce a una huella (SHA-256) de sus campos
+normalizados, guardada en ``Bill.content_hash``. Si la huella no cambió,
+no se escribe nada (``last_updated`` refleja cambios reales, no corridas
+del robot); si cambió, se guardan solo los campos distintos y se dispara
+el trabajo que depende de ellos:
+
+- ``title``: se invalida el análisis de IA para que se vuelva a calcular
+- ``status``: se notifica a los webhooks de medidas si la medida es monitoreada
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Set
+
+from core.models import Bill, MonitoredMeasure, UserProfile
+from core.sutra_client import normalize_measure_id
+
+logger = logging.getLogger(__name__)
+
+TRACKED_FIELDS = ('title', 'status', 'commission')
+# Campos cuyo cambio obliga a repetir el análisis de IA
+AI_INPUT_FIELDS = {'title'}
+
+_WS_RE = re.compile(r'\s+')
+
+
+def normalize_fields(data: Dict) -> Dict[str, str]:
+    """Campos rastreados del scrape con espacios colapsados (solo los presentes)."""
+    fields = {}
+    for name in TRACKED_FIELDS:
+        value = data.get(name)
+        if value is not None:
+            fields[name] = _WS_RE.sub(' ', str(value)).strip()
+    return fields
+
+
+def fingerprint(fields: Dict[str, str]) -> str:
+    payload = '\x1f'.join(f"{name}={fields.get(name, '')}" for name in TRACKED_FIELDS)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def changed_fields(bill, fields: Dict[str, str]) -> Set[str]:
+    """Campos de ``fields`` cuyo valor difiere del guardado en ``bill``."""
+    return {name for name, value in fields.items() if (getattr(bill, name) or '') != value}
+
+
+def _measure_key(measure_id: str) -> str:
+    """Clave común para 'PC1234', 'pc1234' y 'P. de la C. 1234'."""
+    return normalize_measure_id(measure_id)
+
+
+@dataclass
+class BillChange:
+    bill: Bill
+    created: bool = False
+    changed: Set[str] = field(default_factory=set)
+    # Primera huella de una medida existente: se guarda sin notificar
+    baseline: bool = False
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.created and not self.changed
+
+    @property
+    def needs_analysis(self) -> bool:
+        """Nueva, con el título cambiado o sin análisis de IA válido (p. ej. falló por cuota)."""
+        return self.created or bool(self.changed & AI_INPUT_FIELDS) or not int(self.bill.ai_score or 0)
+
+
+def apply_scraped_bill(number: str, data: Dict) -> BillChange:
+    """
+    Guarda el resultado de un scrape solo si cambió.
+
+    Los campos ausentes del scrape (p. ej. ``commission`` cuando la página
+    no la trae) no se tocan.
+    """
+    scraped = normalize_fields(data)
+    bill = Bill.objects.filter(number=number).first()
+
+    if bill is None:
+        bill = Bill(number=number, **scraped)
+        bill.content_hash = fingerprint(scraped)
+        bill.save()
+        return BillChange(bill, created=True, changed=set(scraped))
+
+    merged = {name: getattr(bill, name) or '' for name in TRACKED_FIELDS}
+    merged.update(scraped)
+    new_hash = fingerprint(merged)
+    if bill.content_hash == new_hash:
+        return BillChange(bill)
+
+    baseline = not bill.content_hash
+    changed = changed_fields(bill, scraped)
+    for name in changed:
+        setattr(bill, name, scraped[name])
+    bill.content_hash = new_hash
+    update_fields = set(changed) | {'content_hash', 'last_updated'}
+
+    if changed & AI_INPUT_FIELDS:
+        bill.ai_score = 0
+        bill.ai_analysis = None
+        bill.relevance_why = ''
+        update_fields |= {'ai_score', 'ai_analysis', 'relevance_why'}
+
+    bill.save(update_fields=list(update_fields))
+    return BillChange(bill, changed=changed, baseline=baseline)
+
+
+def notify_bill_change(change: BillChange) -> int:
+    """
+    Avisa por los webhooks de medidas cuando cambia el estatus de una medida
+    monitoreada. Retorna el número de webhooks notificados.
+    """
+    from core.notificaciones import enviar_discord
+
+    if change.created or change.baseline or 'status' not in change.changed:
+        return 0
+
+    bill = change.bill
+    monitored = {
+        _measure_key(sutra_id)
+        for sutra_id in MonitoredMeasure.objects.filter(is_active=True).values_list('sutra_id', flat=True)
+    }
+    if _measure_key(bill.number) not in monitored:
+        return 0
+
+    mensaje = f"📜 **{bill.number}** cambió de estatus: {bill.status}\n{bill.title[:200]}"
+    sent = 0
+    webhooks = (UserProfile.objects.exclude(webhook_measures__isnull=True)
+                .exclude(webhook_measures='').values_list('webhook_measures', flat=True))
+    for webhook in webhooks:
+        if enviar_discord(webhook, mensaje):
+            sent += 1
+    logger.info(f"Cambio de estatus en {bill.number}: {sent} webhooks notificados")
+    return sent
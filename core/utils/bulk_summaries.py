@@ -0,0 +1,281 @@
+"""
+Pre-resumen en Bloque de Artículos Nuevos
+=========================================
+
+Genera ``ai_summary`` en segundo plano para los artículos recién ingestados,
+así el segmento de peso C del ``search_vector`` deja de estar vacío:
+
+- Prioridad: primero los que coinciden con presets activos (``NewsPreset``),
+  luego los que coinciden con keywords/medidas/comisiones monitoreadas y por
+  último el resto, del más reciente al más viejo
+- Lotes: varios snippets por request (``AI_BATCH_TOKEN_BUDGET``,
+  ``AI_BATCH_MAX_ITEMS``), con respuesta JSON ``[{id, summary}]``
+- Caché por ``content_hash``: las notas sindicadas (mismo snippet) reutilizan
+  el resumen, ya sea de la caché (``AIResultCache``) o del mismo lote
+- Escritura: un solo ``bulk_update`` por lote (un UPDATE; el trigger del
+  ``search_vector`` corre una vez por fila)
+
+Los artículos se reservan con ``summary_status='running'`` mientras su lote
+está en curso, así que un clic en "Resumir" no dispara un trabajo paralelo;
+antes de cada intento de request se renueva la reserva (latido), así que
+``resume_summary_jobs`` no re-encola un lote que espera por cuota. Si la
+request del lote falla se liberan para la próxima corrida.
+
+Uso:
+    python manage.py presummarize_articles --limit 100
+"""
+
+import json
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.ai_client import (ITEMS_MARKER, estimate_tokens, get_ai_client,
+                            get_quota_manager, pack_by_budget)
+from core.utils.bill_analysis import DatabaseResultCache
+from core.utils.keyword_matcher import build_matcher, get_keyword_matcher
+from core.utils.summary_jobs import DONE, FAILED, RUNNING, touch_running
+
+logger = logging.getLogger(__name__)
+
+CACHE_KIND = 'article_summary'
+SNIPPET_CHARS = 1500
+# Tokens de respuesta estimados por resumen (2-3 oraciones)
+OUTPUT_TOKENS_PER_ITEM = 120
+
+PROMPT_TEMPLATE = (
+    "Resume cada noticia para un abogado de Puerto Rico en 2-3 oraciones, en español.\n"
+    "Devuelve SOLO un arreglo JSON con un objeto por noticia, con las claves: "
+    "'id' (el mismo id recibido) y 'summary'.\n"
+    f"{ITEMS_MARKER}\n"
+)
+
+
+def summary_key(article) -> str:
+    """Clave de caché: ``content_hash`` del snippet (o del título si no hay snippet)."""
+    from core.models import Article
+
+    return article.content_hash or Article.compute_content_hash(article.title or '') or ''
+
+
+def priority(article, preset_matcher, keyword_matcher) -> Tuple[int, int]:
+    """(presets que coinciden, monitores que coinciden); mayor = antes."""
+    text = f"{article.title} {article.snippet or ''}"
+    return len(preset_matcher.scan(text)), len(keyword_matcher.scan(text))
+
+
+def prioritize(articles, preset_matcher, keyword_matcher) -> List:
+    """Ordena por coincidencias con presets, luego con monitores, luego por fecha (estable)."""
+    articles = sorted(articles, key=lambda a: a.published_at, reverse=True)
+    return sorted(articles, key=lambda a: priority(a, preset_matcher, keyword_matcher), reverse=True)
+
+
+def build_prompt(items: List[Tuple[str, str, str]]) -> str:
+    payload = [{'id': str(i), 'title': title, 'text': text} for i, (_, title, text) in enumerate(items)]
+    return PROMPT_TEMPLATE + json.dumps(payload, ensure_ascii=False)
+
+
+def parse_summaries(text: str) -> Dict[str, str]:
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [data])
+    return {
+        str(entry['id']): str(entry['summary']).strip()
+        for entry in data
+        if isinstance(entry, dict) and 'id' in entry and str(entry.get('summary') or '').strip()
+    }
+
+
+class BulkSummarizer:
+    """
+    Resume textos por lotes con caché por clave de contenido.
+
+    ``summarize({clave: (título, texto)})`` retorna ``{clave: resumen}`` para
+    lo que se pudo resumir (de la caché o del modelo).
+    """
+
+    def __init__(self, client=None, quota=None, cache=None,
+                 token_budget: Optional[int] = None, max_items: Optional[int] = None):
+        self.client = client or get_ai_client()
+        self.quota = quota or get_quota_manager()
+        self.cache = cache if cache is not None else DatabaseResultCache(CACHE_KIND)
+        self.token_budget = token_budget or getattr(settings, 'AI_BATCH_TOKEN_BUDGET', 6000)
+        self.max_items = max_items or getattr(settings, 'AI_BATCH_MAX_ITEMS', 25)
+        self.stats = {'requests': 0, 'cached': 0, 'summarized': 0, 'failed': 0, 'quota_wait': 0.0}
+
+    def batches(self, pending: Dict[str, Tuple[str, str]]) -> List[List[Tuple[str, str, str]]]:
+        items = [(key, title, (text or '')[:SNIPPET_CHARS]) for key, (title, text) in pending.items()]
+
+        def cost(item):
+            return estimate_tokens(item[1]) + estimate_tokens(item[2]) + 10 + OUTPUT_TOKENS_PER_ITEM
+
+        return pack_by_budget(items, cost, self.token_budget, self.max_items,
+                              base_tokens=estimate_tokens(PROMPT_TEMPLATE))
+
+    def cached(self, keys) -> Dict[str, str]:
+        found = {key: payload.get('summary', '') for key, payload in self.cache.get_many(keys).items()}
+        found = {key: summary for key, summary in found.items() if summary}
+        self.stats['cached'] += len(found)
+        return found
+
+    def summarize_batch(self, batch: List[Tuple[str, str, str]],
+                        on_attempt: Optional[Callable[[], None]] = None) -> Dict[str, str]:
+        """
+        Una request para ``batch``; guarda en caché lo que el modelo contestó.
+        ``on_attempt`` se llama justo antes de cada intento (tras la espera por cuota).
+        """
+        prompt = build_prompt(batch)
+        tokens = estimate_tokens(prompt) + OUTPUT_TOKENS_PER_ITEM * len(batch)
+
+        def request():
+            if on_attempt:
+                on_attempt()
+            return self.client.generate_json(prompt)
+
+        try:
+            answers = parse_summaries(self.quota.call(request, tokens, self.stats))
+        except Exception as e:
+            logger.error(f"AI Summary Error (lote de {len(batch)}): {e}")
+            raise
+        results = {key: answers[str(i)] for i, (key, _, _) in enumerate(batch) if str(i) in answers}
+        self.stats['summarized'] += len(results)
+        self.stats['failed'] += len(batch) - len(results)
+        if results:
+            self.cache.set_many({key: {'summary': s} for key, s in results.items()},
+                                getattr(self.client, 'model_name', ''))
+        return results
+
+    def iter_summaries(self, pending: Dict[str, Tuple[str, str]],
+                       claim: Optional[Callable[[List[str]], List[str]]] = None,
+                       on_attempt: Optional[Callable[[List[str]], None]] = None
+                       ) -> Iterator[Tuple[List[str], Optional[Dict[str, str]]]]:
+        """
+        Genera ``(claves, resúmenes)`` por grupo: primero lo que estaba en
+        caché, luego cada lote (una request). ``resúmenes`` es None si la
+        request del lote falló. ``claim(claves)``, si se pasa, se llama justo
+        antes de cada grupo y retorna las claves que siguen disponibles;
+        ``on_attempt(claves)`` antes de cada intento de request del lote.
+        """
+        cached = self.cached(pending)
+        keys = claim(list(cached)) if claim and cached else list(cached)
+        if keys:
+            yield keys, {key: cached[key] for key in keys}
+        missing = {key: value for key, value in pending.items() if key not in cached}
+        for batch in self.batches(missing):
+            if claim:
+                keys = set(claim([key for key, _, _ in batch]))
+                batch = [item for item in batch if item[0] in keys]
+                if not batch:
+                    continue
+            keys = [key for key, _, _ in batch]
+            try:
+                results = self.summarize_batch(batch, (lambda: on_attempt(keys)) if on_attempt else None)
+            except Exception:
+                self.stats['failed'] += len(batch)
+                results = None
+            yield keys, results
+
+    def summarize(self, pending: Dict[str, Tuple[str, str]]) -> Dict[str, str]:
+        results = {}
+        for _, summaries in self.iter_summaries(pending):
+            results.update(summaries or {})
+        return results
+
+
+def summary_candidates(limit: int, scan: Optional[int] = None) -> List:
+    """
+    Hasta ``limit`` artículos sin resumen ni trabajo activo, en orden de
+    prioridad. Se evalúan los ``scan`` más recientes (default ``AI_PRESUMMARY_SCAN``).
+    """
+    from core.models import Article, NewsPreset
+
+    scan = scan or getattr(settings, 'AI_PRESUMMARY_SCAN', 500)
+    articles = list(
+        Article.objects.filter(Q(ai_summary__isnull=True) | Q(ai_summary=''), summary_status='')
+        .only('id', 'title', 'snippet', 'content_hash', 'published_at')
+        .order_by('-published_at')[:scan]
+    )
+    presets = build_matcher(
+        ('preset', pk, keywords)
+        for pk, keywords in NewsPreset.objects.filter(is_active=True).values_list('id', 'keywords')
+    )
+    return prioritize(articles, presets, get_keyword_matcher())[:limit]
+
+
+def _claim(article_ids) -> set:
+    """Reserva los artículos (''→running) y retorna los que efectivamente se tomaron."""
+    from core.models import Article
+
+    stamp = timezone.now()
+    (Article.objects.filter(pk__in=article_ids, summary_status='')
+     .filter(Q(ai_summary__isnull=True) | Q(ai_summary=''))
+     .update(summary_status=RUNNING, summary_requested_at=stamp))
+    return set(Article.objects.filter(pk__in=article_ids, summary_status=RUNNING, summary_requested_at=stamp)
+               .values_list('id', flat=True))
+
+
+def _release(articles) -> None:
+    """Devuelve a pendientes los artículos de un lote cuya request falló (error transitorio)."""
+    from core.models import Article
+
+    Article.objects.filter(pk__in=[a.id for a in articles], summary_status=RUNNING).update(summary_status='')
+
+
+def _write(articles, summaries: Dict[str, str]) -> int:
+    """Un solo UPDATE para el lote: resumidos → done; omitidos por el modelo → failed."""
+    from core.models import Article
+
+    for article in articles:
+        summary = summaries.get(summary_key(article))
+        article.ai_summary = summary or None
+        article.summary_status = DONE if summary else FAILED
+        article.summary_error = '' if summary else 'Sin resumen en la respuesta por lotes'
+    Article.objects.bulk_update(articles, ['ai_summary', 'summary_status', 'summary_error'], batch_size=len(articles) or 1)
+    return sum(1 for article in articles if article.summary_status == DONE)
+
+
+def presummarize_new_articles(limit: int = 50, summarizer: Optional[BulkSummarizer] = None) -> Dict:
+    """
+    Resume en bloque hasta ``limit`` artículos pendientes. Retorna las
+    estadísticas del ``BulkSummarizer`` más ``updated`` (filas escritas).
+    """
+    summarizer = summarizer or BulkSummarizer()
+    stats = summarizer.stats
+    stats['updated'] = 0
+    if not getattr(summarizer.client, 'available', True):
+        logger.info("Sin API key de IA: se omite el pre-resumen")
+        return stats
+
+    candidates = summary_candidates(limit)
+    if not candidates:
+        return stats
+
+    # Un texto por clave de contenido (las notas sindicadas comparten clave)
+    by_key: Dict[str, List] = {}
+    for article in candidates:
+        by_key.setdefault(summary_key(article), []).append(article)
+    pending = {key: (arts[0].title, arts[0].snippet or '') for key, arts in by_key.items()}
+
+    def claim(keys: List[str]) -> List[str]:
+        # Otro worker pudo tomar parte del grupo: seguir solo con lo reservado aquí
+        claimed = _claim([a.id for key in keys for a in by_key[key]])
+        for key in keys:
+            by_key[key] = [a for a in by_key[key] if a.id in claimed]
+        return [key for key in keys if by_key[key]]
+
+    def heartbeat(keys: List[str]) -> None:
+        # Un lote esperando por cuota sigue siendo de este worker (ver resume_summary_jobs)
+        touch_running(a.id for key in keys for a in by_key[key])
+
+    # Lo que ya está en caché se escribe primero, sin llamar al modelo; luego cada lote
+    for keys, summaries in summarizer.iter_summaries(pending, claim, heartbeat):
+        group = [a for key in keys for a in by_key[key]]
+        if summaries is None:
+            _release(group)
+        else:
+            stats['updated'] += _write(group, summaries)
+
+    return stats
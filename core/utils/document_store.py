@@ -0,0 +1,117 @@
+"""
+Almacenamiento Direccionado por Contenido de Documentos de Medidas
+==================================================================
+
+Los PDF/DOCX de ``BillVersion`` se guardan por su SHA-256:
+
+    bill_documents/ab/ab12…ef.pdf           el archivo (uno por contenido)
+    bill_documents/ab/ab12…ef.pages.jsonl   texto extraído, una página por línea
+
+Subir el mismo archivo otra vez (otra versión, otra medida) no duplica el
+archivo en disco y reutiliza el texto ya extraído: la extracción se omite.
+La última línea del texto en caché indica cuántas páginas trae; un caché
+incompleto (escritura a medias) se ignora y se vuelve a extraer.
+
+Uso:
+    from core.utils.document_store import store_document, cached_pages
+
+    name, digest = store_document(uploaded_file)
+    pages = cached_pages(digest)  # None si aún no se extrajo
+    cached = cached_text(digest)  # (texto, offsets por página) o None
+"""
+
+import hashlib
+import io
+import os
+from typing import List, Optional, Tuple
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+
+from core.document_text import join_pages_jsonl, read_pages_jsonl, write_pages_jsonl
+
+DOCUMENTS_DIR = 'bill_documents'
+
+
+def file_sha256(file) -> str:
+    """SHA-256 de un archivo de Django, leído por bloques."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def document_name(digest: str, extension: str) -> str:
+    return f"{DOCUMENTS_DIR}/{digest[:2]}/{digest}{extension.lower()}"
+
+
+def pages_name(digest: str) -> str:
+    return f"{DOCUMENTS_DIR}/{digest[:2]}/{digest}.pages.jsonl"
+
+
+def store_document(file, storage=None) -> Tuple[str, str]:
+    """
+    Guarda ``file`` bajo su hash (si no estaba ya) y retorna
+    ``(nombre en el storage, sha256)``.
+    """
+    storage = storage or default_storage
+    digest = file_sha256(file)
+    name = document_name(digest, os.path.splitext(file.name or '')[1])
+    if not storage.exists(name):
+        saved = storage.save(name, file)
+        if saved != name:
+            # Otro proceso guardó el mismo contenido a la vez: quedarse con uno
+            storage.delete(saved)
+    return name, digest
+
+
+def cached_pages(digest: str, storage=None) -> Optional[List[str]]:
+    """Texto por página ya extraído para este contenido, o None."""
+    storage = storage or default_storage
+    name = pages_name(digest)
+    if not digest or not storage.exists(name):
+        return None
+    with storage.open(name, 'rb') as handle:
+        return read_pages_jsonl(line.decode('utf-8') for line in handle)
+
+
+def cached_text(digest: str, storage=None) -> Optional[Tuple[str, List[int]]]:
+    """``(texto, offsets por página)`` ya extraído para este contenido, o None."""
+    storage = storage or default_storage
+    name = pages_name(digest)
+    if not digest or not storage.exists(name):
+        return None
+    with storage.open(name, 'rb') as handle:
+        return join_pages_jsonl(line.decode('utf-8') for line in handle)
+
+
+def _replace_incomplete(digest: str, storage) -> bool:
+    """True si ya hay un caché completo; borra uno incompleto (escritura interrumpida)."""
+    name = pages_name(digest)
+    if not storage.exists(name):
+        return False
+    if cached_pages(digest, storage) is not None:
+        return True
+    storage.delete(name)
+    return False
+
+
+def save_pages(digest: str, pages: List[str], storage=None) -> None:
+    """Guarda el texto por página junto al archivo."""
+    storage = storage or default_storage
+    if _replace_incomplete(digest, storage):
+        return
+    buffer = io.StringIO()
+    write_pages_jsonl(pages, buffer)
+    storage.save(pages_name(digest), ContentFile(buffer.getvalue().encode('utf-8')))
+
+
+def save_pages_file(digest: str, path: str, storage=None) -> None:
+    """Guarda como caché un archivo JSON Lines ya escrito (extracción streaming), copiándolo por bloques."""
+    storage = storage or default_storage
+    if _replace_incomplete(digest, storage):
+        return
+    with open(path, 'rb') as handle:
+        storage.save(pages_name(digest), File(handle))
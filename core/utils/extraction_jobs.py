@@ -0,0 +1,158 @@
+"""
+Extracción de Texto de Versiones en Segundo Plano
+=================================================
+
+Subir una versión (PDF/DOCX) ya no bloquea la request: ``BillVersion.save``
+la marca ``extraction_status='pending'`` y, al confirmar la transacción, el
+id se envía a esta cola. El trabajo:
+
+1. Toma la versión (pending → running, UPDATE condicional: un solo worker)
+2. Reutiliza el texto por página ya extraído del mismo archivo
+   (``core.utils.document_store``) o extrae las páginas en paralelo
+   (``core.document_text``, pool de procesos; los PDF muy grandes en modo
+   streaming con techo de memoria: el proceso de extracción decide, el
+   worker no abre el PDF) y lo guarda en caché
+3. Guarda ``full_text`` + ``page_offsets`` y marca done (o failed + error)
+
+Al guardar ``full_text`` se precalculan los diffs contra las demás
+versiones (señal de ``BillVersion``). El scheduler re-encola con
+``resume_extraction_jobs`` los trabajos perdidos por un reinicio.
+
+Estados: '' (sin archivo) | pending → running → done | failed
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.document_text import (DEFAULT_PAGES_PER_TASK, extract_pages, join_pages,
+                                join_pages_jsonl, stream_extract)
+from core.utils.document_store import cached_text, save_pages, save_pages_file
+from core.utils.job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+ACTIVE_STATES = (PENDING, RUNNING)
+
+
+class ExtractionQueue(JobQueue):
+    """Cola de extracciones: una versión ya pendiente en este proceso no se vuelve a encolar."""
+
+    thread_name_prefix = 'extraction'
+
+
+def extraction_processes() -> int:
+    """Procesos por documento (``EXTRACTION_PROCESSES``; default: CPUs, hasta 4)."""
+    return getattr(settings, 'EXTRACTION_PROCESSES', None) or min(4, os.cpu_count() or 1)
+
+
+def extract_version_text(version) -> Tuple[str, List[int]]:
+    """
+    Extrae el archivo de ``version`` y lo deja en caché; retorna
+    ``(texto, offsets por página)``. Los PDF pasan primero por un proceso
+    aparte que cuenta las páginas: si son más de ``EXTRACTION_STREAMING_PAGES``
+    ese mismo proceso los extrae en modo streaming (una página a la vez,
+    techo ``EXTRACTION_MEMORY_LIMIT_MB``) y el texto se arma leyendo el
+    archivo línea por línea; si no, se extraen en paralelo.
+    """
+    path = version.pdf_file.path
+    page_count = None
+    if path.lower().endswith('.pdf'):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, 'pages.jsonl')
+            stats = stream_extract(path, out_path, getattr(settings, 'EXTRACTION_MEMORY_LIMIT_MB', 512),
+                                   min_pages=getattr(settings, 'EXTRACTION_STREAMING_PAGES', 200))
+            if stats['streamed']:
+                logger.info(f"📄 {version.pdf_file.name}: {stats['pages']} páginas en modo streaming "
+                            f"(pico {stats['peak_rss_mb']:.0f} MB)")
+                with open(out_path, encoding='utf-8') as handle:
+                    result = join_pages_jsonl(handle)
+                if result is None:
+                    raise ValueError("Extracción streaming incompleta")
+                if version.content_hash:
+                    save_pages_file(version.content_hash, out_path)
+                return result
+            page_count = stats['pages']
+
+    pages = extract_pages(
+        path,
+        processes=extraction_processes(),
+        pages_per_task=getattr(settings, 'EXTRACTION_PAGES_PER_TASK', DEFAULT_PAGES_PER_TASK),
+        page_count=page_count,
+    )
+    if version.content_hash:
+        save_pages(version.content_hash, pages)
+    return join_pages(pages)
+
+
+def run_extraction_job(version_id: int) -> bool:
+    """Toma una extracción pendiente y la ejecuta. False si otro worker la tomó o falló."""
+    from core.models import BillVersion
+
+    claimed = BillVersion.objects.filter(pk=version_id, extraction_status=PENDING).update(
+        extraction_status=RUNNING, extraction_requested_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    version = BillVersion.objects.get(pk=version_id)
+    try:
+        cached = cached_text(version.content_hash)
+        text, offsets = cached if cached is not None else extract_version_text(version)
+    except Exception as e:
+        logger.error(f"Error leyendo archivo {version.pdf_file.name}: {e}")
+        BillVersion.objects.filter(pk=version_id).update(extraction_status=FAILED, extraction_error=str(e)[:255])
+        return False
+
+    version.full_text = text
+    version.page_offsets = offsets
+    version.extraction_status = DONE
+    version.extraction_error = ''
+    version.save(update_fields=['full_text', 'page_offsets', 'extraction_status', 'extraction_error'])
+    return True
+
+
+_queue: Optional[ExtractionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_extraction_queue() -> ExtractionQueue:
+    """Cola compartida del proceso (``EXTRACTION_JOBS`` documentos a la vez)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ExtractionQueue(run_extraction_job, getattr(settings, 'EXTRACTION_JOBS', 1))
+    return _queue
+
+
+def enqueue_extraction(version_id: int) -> bool:
+    """Envía a la cola una versión pendiente."""
+    return get_extraction_queue().submit(version_id)
+
+
+def resume_extraction_jobs() -> int:
+    """
+    Re-encola extracciones 'running' abandonadas (más viejas que
+    ``EXTRACTION_STALE_SECONDS``) y envía a la cola las 'pending' de la BD.
+    Retorna cuántas se enviaron.
+    """
+    from core.models import BillVersion
+
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'EXTRACTION_STALE_SECONDS', 900))
+    BillVersion.objects.filter(extraction_status=RUNNING, extraction_requested_at__lt=stale_before).update(
+        extraction_status=PENDING
+    )
+    queue = get_extraction_queue()
+    ids = BillVersion.objects.filter(extraction_status=PENDING).values_list('id', flat=True)
+    return sum(queue.submit(version_id) for version_id in ids)
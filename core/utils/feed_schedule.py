@@ -0,0 +1,139 @@
+"""
+Sondeo Adaptativo de Fuentes RSS
+================================
+
+Cada ``NewsSource`` tiene su propio intervalo de sondeo, derivado de su
+tasa de publicación observada: los medios de alto volumen se consultan a
+menudo y los que casi no publican, rara vez.
+
+- La tasa (artículos nuevos/hora) se estima con una media móvil
+  exponencial sobre cada sondeo: ``nuevos / horas desde el sondeo anterior``.
+- El intervalo es el tiempo esperado hasta ``RSS_POLL_TARGET_ARTICLES``
+  artículos nuevos, acotado a ``[RSS_POLL_MIN_MINUTES, RSS_POLL_MAX_MINUTES]``.
+- Fuera del horario intensivo de ``SystemSettings`` el intervalo se
+  multiplica por ``low_freq_interval / high_freq_interval``.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import NewsSource, SystemSettings
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def current_multiplier(now=None) -> float:
+    """Multiplicador de horario según ``SystemSettings`` (1.0 si no hay configuración)."""
+    config = SystemSettings.objects.first()
+    return config.polling_multiplier(now) if config else 1.0
+
+
+def estimate_feed_rate(published: Iterable) -> Optional[float]:
+    """
+    Artículos/hora según las fechas de publicación del propio feed.
+
+    Sirve de estimación inicial en el primer sondeo, cuando aún no hay
+    ventana entre sondeos que observar. None si hay menos de dos fechas.
+    """
+    dates = sorted(d for d in published if d is not None)
+    if len(dates) < 2:
+        return None
+    span_hours = (dates[-1] - dates[0]).total_seconds() / 3600
+    return (len(dates) - 1) / max(span_hours, 1 / 60)
+
+
+def update_rate(previous_rate: float, new_articles: int, elapsed_hours: Optional[float],
+                seed_rate: Optional[float] = None) -> float:
+    """Nueva estimación de artículos/hora (EMA) tras un sondeo."""
+    if not elapsed_hours or elapsed_hours <= 0:
+        # Primer sondeo: sin ventana de tiempo, usar la tasa implícita del feed
+        return seed_rate if seed_rate is not None else previous_rate
+    alpha = _setting('RSS_POLL_SMOOTHING', 0.3)
+    observed = new_articles / elapsed_hours
+    return alpha * observed + (1 - alpha) * previous_rate
+
+
+def compute_interval(rate: float, multiplier: float = 1.0) -> int:
+    """
+    Intervalo de sondeo en minutos para una tasa de ``rate`` artículos/hora.
+
+    Sin publicaciones observadas se usa el máximo.
+    """
+    minimum = _setting('RSS_POLL_MIN_MINUTES', 5)
+    maximum = _setting('RSS_POLL_MAX_MINUTES', 240)
+    target = _setting('RSS_POLL_TARGET_ARTICLES', 1)
+    if rate <= 0:
+        base = maximum
+    else:
+        base = target / rate * 60
+    return int(round(min(maximum, max(minimum, base * multiplier))))
+
+
+def reschedule_sources(sources: Iterable[NewsSource], created: Dict[int, int],
+                       now=None, multiplier: Optional[float] = None,
+                       seed_rates: Optional[Dict[int, float]] = None) -> None:
+    """
+    Actualiza tasa, intervalo y próximo sondeo de las fuentes recién consultadas.
+
+    Args:
+        sources: fuentes sondeadas en esta ronda (con o sin éxito)
+        created: ``{source_id: artículos nuevos}``
+        seed_rates: ``{source_id: artículos/hora}`` estimados del feed, para el primer sondeo
+    """
+    seed_rates = seed_rates or {}
+    now = now or timezone.now()
+    if multiplier is None:
+        multiplier = current_multiplier(now)
+
+    updated: List[NewsSource] = []
+    for source in sources:
+        elapsed = None
+        if source.last_polled_at:
+            elapsed = (now - source.last_polled_at).total_seconds() / 3600
+        source.publish_rate = update_rate(source.publish_rate, created.get(source.id, 0), elapsed,
+                                          seed_rates.get(source.id))
+        source.poll_interval = compute_interval(source.publish_rate, multiplier)
+        source.last_polled_at = now
+        source.next_poll_at = now + timedelta(minutes=source.poll_interval)
+        updated.append(source)
+
+    if updated:
+        NewsSource.objects.bulk_update(
+            updated, ['publish_rate', 'poll_interval', 'last_polled_at', 'next_poll_at']
+        )
+
+
+def due_sources(now=None):
+    """Fuentes activas cuyo próximo sondeo ya venció (o que nunca se han sondeado)."""
+    now = now or timezone.now()
+    return NewsSource.objects.filter(is_active=True).filter(
+        Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now)
+    )
+
+
+def sync_due_sources(max_entries=10) -> int:
+    """
+    Sincroniza solo las fuentes cuyo sondeo venció. Pensado para ejecutarse
+    con un tick corto (``RSS_SCHEDULER_TICK_SECONDS``); si nada venció, cuesta
+    una consulta. Retorna el número de artículos nuevos.
+    """
+    from core.utils.rss_sync import sync_all_rss_sources
+
+    config = SystemSettings.objects.first()
+    if config and not config.is_active:
+        return 0
+
+    sources = list(due_sources())
+    if not sources:
+        return 0
+    logger.info(f"Sondeo adaptativo: {len(sources)} fuentes vencidas")
+    return sync_all_rss_sources(max_entries=max_entries, sources=sources)
@@ -0,0 +1,101 @@
+"""
+Parseo Incremental de Feeds RSS/Atom
+====================================
+
+``feedparser.parse`` construye el documento completo antes de devolver la
+primera entrada. Los feeds vienen ordenados de más nuevo a más viejo, así
+que casi siempre solo interesan las primeras: este módulo entrega las
+entradas una a una con ``lxml.etree.iterparse`` y libera cada elemento al
+terminar, de modo que quien consume puede cortar en cuanto llega a lo ya
+visto sin parsear el resto.
+
+Las entradas son diccionarios con las mismas claves que usa el resto del
+pipeline de feedparser (``title``, ``link``, ``summary``, ``published``,
+``updated``). El HTML del resumen pasa por el mismo sanitizador de
+feedparser para no cambiar lo que se guarda en ``Article.snippet``. Es una
+función privada de feedparser: la versión está fijada en requirements.txt
+(6.0.x) y ``test_feed_stream`` falla si desaparece o deja de coincidir con
+lo que guarda ``feedparser.parse``.
+"""
+
+import io
+from typing import Dict, Iterator
+
+from feedparser.sanitizer import _sanitize_html
+from lxml import etree
+
+ENTRY_TAGS = ('item', 'entry')  # RSS 0.9x/1.0/2.0 y Atom
+
+# Primer elemento hijo con texto, por orden de preferencia
+_FIELD_TAGS = {
+    'title': ('title',),
+    'summary': ('description', 'summary', 'content', 'encoded'),
+    'published': ('pubDate', 'published', 'date', 'issued'),
+    'updated': ('updated', 'modified'),
+}
+
+
+class FeedStreamError(Exception):
+    """El documento no es XML utilizable; usar ``feedparser`` como respaldo."""
+
+
+def _local(tag) -> str:
+    return etree.QName(tag).localname if isinstance(tag, str) else ''
+
+
+def _text(element) -> str:
+    return (element.text or '').strip() if element is not None else ''
+
+
+def _atom_link(element) -> str:
+    """``<link href=...>`` de Atom (rel=alternate o sin rel)."""
+    for child in element:
+        if _local(child.tag) == 'link' and child.get('href') and child.get('rel', 'alternate') == 'alternate':
+            return child.get('href').strip()
+    return ''
+
+
+def _entry_dict(element) -> Dict[str, str]:
+    children = {}
+    for child in element:
+        name = _local(child.tag)
+        if name and name not in children and (child.text or '').strip():
+            children[name] = child
+    entry = {}
+    for key, tags in _FIELD_TAGS.items():
+        for tag in tags:
+            if tag in children:
+                entry[key] = _text(children[tag])
+                break
+    entry['link'] = _text(children.get('link')) or _atom_link(element)
+    if not entry['link'] and 'guid' in children and children['guid'].get('isPermaLink', 'true') == 'true':
+        entry['link'] = _text(children['guid'])
+    if entry.get('summary'):
+        entry['summary'] = _sanitize_html(entry['summary'], 'utf-8', 'text/html')
+    return entry
+
+
+def iter_feed_entries(content: bytes) -> Iterator[Dict[str, str]]:
+    """
+    Entradas del feed en orden de documento, parseadas bajo demanda.
+
+    Raises:
+        FeedStreamError: si el XML está roto antes de la primera entrada
+            (con entradas ya entregadas, simplemente se termina).
+    """
+    yielded = 0
+    try:
+        for _, element in etree.iterparse(io.BytesIO(content), events=('end',),
+                                          resolve_entities=False, no_network=True):
+            if _local(element.tag) not in ENTRY_TAGS:
+                continue
+            entry = _entry_dict(element)
+            # Liberar memoria de lo ya procesado
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            yielded += 1
+            yield entry
+    except etree.XMLSyntaxError as e:
+        if not yielded:
+            raise FeedStreamError(str(e)) from e
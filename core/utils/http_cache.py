@@ -0,0 +1,178 @@
+"""
+Caché HTTP en Disco para el Scraper de SUTRA
+============================================
+
+Adaptador de ``requests`` que guarda cada respuesta GET en disco (cuerpo,
+ETag, Last-Modified, fecha de descarga) bajo una clave derivada de la URL
+normalizada, y la reutiliza de forma transparente:
+
+- Revalidación condicional: envía If-None-Match / If-Modified-Since; un
+  304 se responde con el cuerpo guardado (sin volver a descargarlo)
+- ``max_age``: dentro de ese plazo ni siquiera se consulta al servidor
+- Copia vieja: si SUTRA no responde (timeout, error de conexión, 5xx) se
+  sirve lo último guardado en vez de fallar
+- Modo offline: solo se sirve desde disco, lo que permite reproducir una
+  corrida del robot a partir de respuestas grabadas
+
+Las respuestas servidas desde disco llevan la cabecera ``X-Cache``
+(``HIT``, ``REVALIDATED`` o ``STALE``).
+
+Uso:
+    adapter = CachingAdapter(HttpCache('/ruta/cache'), pool_maxsize=4)
+    session.mount('https://sutra.oslpr.org', adapter)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_HEADER = 'X-Cache'
+# Estados que vale la pena guardar (un 404 también es información: la medida no existe)
+CACHEABLE_STATUS = {200, 404}
+
+
+def normalize_url(url: str) -> str:
+    """Esquema/host en minúsculas, sin fragmento ni '/' final, query ordenada."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+class HttpCache:
+    """Almacén en disco: ``<clave>.json`` (metadatos) + ``<clave>.body`` (cuerpo)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            meta['body'] = body_path.read_bytes()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, data: bytes) -> None:
+        # Escritura atómica: varios workers pueden guardar la misma URL
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def put(self, url: str, response: requests.Response) -> None:
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': normalize_url(url),
+            'status': response.status_code,
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'content_type': response.headers.get('Content-Type', ''),
+            'fetched_at': time.time(),
+        }
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def touch(self, url: str, entry: Dict) -> None:
+        """Marca una entrada como revalidada ahora (tras un 304)."""
+        meta_path, _ = self._paths(url)
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['fetched_at'] = time.time()
+        self._write(meta_path, json.dumps(meta).encode('utf-8'))
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` con caché en disco para GET (el resto pasa directo).
+
+    Args:
+        cache: almacén donde leer/guardar respuestas
+        max_age: segundos durante los que una copia se usa sin revalidar (0 = siempre revalidar)
+        offline: no tocar la red; sin copia guardada se lanza ``ConnectionError``
+    """
+
+    def __init__(self, cache: HttpCache, max_age: float = 0, offline: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.max_age = max_age
+        self.offline = offline
+        self.stats = {'hit': 0, 'revalidated': 0, 'stale': 0, 'miss': 0}
+
+    def _from_cache(self, request, entry: Dict, state: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response._content = entry['body']
+        response._content_consumed = True
+        response.headers = CaseInsensitiveDict({
+            'Content-Type': entry.get('content_type', ''),
+            'ETag': entry.get('etag', ''),
+            'Last-Modified': entry.get('last_modified', ''),
+            CACHE_HEADER: state,
+        })
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if entry['status'] == 200 else 'Not Found'
+        response.connection = self
+        self.stats[state.lower()] += 1
+        return response
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry is not None:
+            age = time.time() - entry.get('fetched_at', 0)
+            if self.offline or age < self.max_age:
+                return self._from_cache(request, entry, 'HIT')
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+        elif self.offline:
+            raise requests.ConnectionError(f"Modo offline: {request.url} no está en la caché")
+
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if entry is None:
+                raise
+            logger.warning(f"SUTRA no responde ({e.__class__.__name__}); sirviendo copia guardada de {request.url}")
+            return self._from_cache(request, entry, 'STALE')
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(request.url, entry)
+            response.close()
+            return self._from_cache(request, entry, 'REVALIDATED')
+        if response.status_code >= 500 and entry is not None:
+            logger.warning(f"SUTRA respondió {response.status_code}; sirviendo copia guardada de {request.url}")
+            response.close()
+            return self._from_cache(request, entry, 'STALE')
+
+        if response.status_code in CACHEABLE_STATUS and not kwargs.get('stream'):
+            self.cache.put(request.url, response)
+        self.stats['miss'] += 1
+        return response
@@ -0,0 +1,56 @@
+"""
+Cola de Trabajos en Segundo Plano
+=================================
+
+Pool acotado de hilos para ``runner(object_id)`` sin duplicados: un id ya
+pendiente en este proceso no se vuelve a encolar. El estado persistente de
+cada trabajo (y la deduplicación entre procesos) vive en la BD; ver
+``core.utils.summary_jobs`` y ``core.utils.extraction_jobs``.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Pool acotado de workers para ``runner(object_id)``, sin duplicados."""
+
+    thread_name_prefix = 'job'
+
+    def __init__(self, runner: Callable[[int], object], workers: int):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.thread_name_prefix)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, object_id: int) -> bool:
+        """Encola ``object_id``; False si ya estaba pendiente."""
+        with self._lock:
+            if object_id in self._pending:
+                return False
+            self._pending.add(object_id)
+        self._executor.submit(self._run, object_id)
+        return True
+
+    def _run(self, object_id: int) -> None:
+        try:
+            self.runner(object_id)
+        except Exception as e:
+            logger.error(f"Job Error ({self.thread_name_prefix} {object_id}): {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._pending.discard(object_id)
+            # Los hilos del pool no pasan por el ciclo request/response de Django
+            close_old_connections()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,228 @@
+"""
+Matcher compilado de palabras clave (Aho–Corasick)
+==================================================
+
+Compila en un único autómata todos los términos activos de ``Keyword``,
+``MonitoredMeasure.keywords`` y ``MonitoredCommission.keywords`` para
+escanear el texto de artículos y medidas en una sola pasada lineal.
+
+El texto y los términos se normalizan igual (sin tildes, ``casefold`` y
+espacios colapsados) y solo se aceptan coincidencias de palabra completa,
+de modo que "ley" no coincide dentro de "leyenda".
+
+Uso:
+    from core.utils.keyword_matcher import get_keyword_matcher
+
+    matcher = get_keyword_matcher()
+    hits = matcher.scan(f"{article.title} {article.snippet}")
+    # {('keyword', 3): {'salud'}, ('commission', 7): {'energia'}}
+
+El matcher se cachea por proceso. Las señales de ``core.signals`` lo
+invalidan al guardar/borrar términos; además, cada
+``MATCHER_RECHECK_SECONDS`` se compara una huella de las tablas para
+detectar cambios hechos desde otros procesos (admin, robot, etc.).
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre verificaciones de huella contra la base de datos
+MATCHER_RECHECK_SECONDS = 60
+
+# (tipo de monitor, id) -> 'keyword' | 'measure' | 'commission'
+MonitorKey = Tuple[str, int]
+
+
+def fold_text(text: str) -> str:
+    """Quita tildes, aplica casefold y colapsa espacios."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def split_terms(raw: str) -> List[str]:
+    """Separa una lista de términos separados por coma, sin vacíos."""
+    if not raw:
+        return []
+    return [t.strip() for t in raw.split(",") if t.strip()]
+
+
+class KeywordMatcher:
+    """
+    Autómata Aho–Corasick sobre términos normalizados.
+
+    Cada término compilado lleva asociado el conjunto de monitores que lo
+    declararon, así un mismo término compartido por varios monitores se
+    evalúa una sola vez.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, MonitorKey]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Por nodo: lista de (longitud del término, término original normalizado)
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        self._monitors: Dict[str, Set[MonitorKey]] = {}
+
+        for term, monitor in terms:
+            self._add(term, monitor)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._monitors)
+
+    def _add(self, term: str, monitor: MonitorKey) -> None:
+        folded = fold_text(term)
+        if not folded:
+            return
+        self._monitors.setdefault(folded, set()).add(monitor)
+
+        node = 0
+        for ch in folded:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if not any(t == folded for _, t in self._out[node]):
+            self._out[node].append((len(folded), folded))
+
+    def _build(self) -> None:
+        """Calcula los enlaces de fallo (BFS) y propaga las salidas."""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[str]:
+        """Genera cada término (normalizado) encontrado como palabra completa."""
+        folded = fold_text(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(folded)
+        node = 0
+        for i, ch in enumerate(folded):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            # Límite de palabra a la derecha
+            if i + 1 < n and folded[i + 1].isalnum():
+                continue
+            for length, term in out[node]:
+                start = i - length + 1
+                if start > 0 and folded[start - 1].isalnum():
+                    continue
+                yield term
+
+    def scan(self, text: str) -> Dict[MonitorKey, Set[str]]:
+        """Retorna ``{(tipo, id): {términos}}`` para los monitores que coinciden."""
+        hits: Dict[MonitorKey, Set[str]] = {}
+        for term in self.iter_matches(text):
+            for monitor in self._monitors[term]:
+                hits.setdefault(monitor, set()).add(term)
+        return hits
+
+
+# --- Construcción desde la base de datos y caché por proceso ---
+
+def _load_term_rows() -> List[Tuple[str, int, str]]:
+    """Lee (tipo, id, términos crudos) de las tablas de monitoreo."""
+    from core.models import Keyword, MonitoredCommission, MonitoredMeasure
+
+    rows: List[Tuple[str, int, str]] = []
+    rows.extend(('keyword', pk, term) for pk, term in Keyword.objects.values_list('id', 'term'))
+    rows.extend(
+        ('measure', pk, kw) for pk, kw in
+        MonitoredMeasure.objects.filter(is_active=True).values_list('id', 'keywords')
+    )
+    rows.extend(
+        ('commission', pk, kw) for pk, kw in
+        MonitoredCommission.objects.filter(is_active=True).values_list('id', 'keywords')
+    )
+    rows.sort()
+    return rows
+
+
+def _fingerprint(rows: List[Tuple[str, int, str]]) -> str:
+    digest = hashlib.sha1()
+    for kind, pk, raw in rows:
+        digest.update(f"{kind}\x1f{pk}\x1f{raw}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_matcher(rows: Iterable[Tuple[str, int, str]]) -> KeywordMatcher:
+    """Compila un matcher a partir de filas (tipo, id, términos separados por coma)."""
+    return KeywordMatcher(
+        (term, (kind, pk))
+        for kind, pk, raw in rows
+        for term in split_terms(raw)
+    )
+
+
+_lock = threading.Lock()
+_matcher: Optional[KeywordMatcher] = None
+_matcher_fingerprint: Optional[str] = None
+_checked_at = 0.0
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """
+    Retorna el matcher compilado, reconstruyéndolo solo si cambiaron los términos.
+    """
+    global _matcher, _matcher_fingerprint, _checked_at
+
+    now = time.monotonic()
+    matcher = _matcher
+    if matcher is not None and now - _checked_at < MATCHER_RECHECK_SECONDS:
+        return matcher
+
+    with _lock:
+        if _matcher is not None and now - _checked_at < MATCHER_RECHECK_SECONDS:
+            return _matcher
+
+        rows = _load_term_rows()
+        fingerprint = _fingerprint(rows)
+        if _matcher is None or fingerprint != _matcher_fingerprint:
+            _matcher = build_matcher(rows)
+            _matcher_fingerprint = fingerprint
+            logger.info(f"Matcher de keywords compilado: {len(_matcher)} términos")
+        _checked_at = now
+        return _matcher
+
+
+def invalidate_keyword_matcher() -> None:
+    """Fuerza la reconstrucción en la próxima llamada a ``get_keyword_matcher``."""
+    global _matcher, _checked_at
+    with _lock:
+        _matcher = None
+        _checked_at = 0.0
+
+
+def describe_hits(hits: Dict[MonitorKey, Set[str]]) -> List[str]:
+    """Formatea coincidencias como ``'tipo#id: term1, term2'`` (para logs/salida)."""
+    return [
+        f"{kind}#{pk}: {', '.join(sorted(terms))}"
+        for (kind, pk), terms in sorted(hits.items())
+    ]
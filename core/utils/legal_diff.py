@@ -0,0 +1,448 @@
+"""
+Diff Estructural de Textos Legales
+==================================
+
+Comparar dos versiones de una medida carácter por carácter con
+``difflib.SequenceMatcher`` es cuadrático: un entirillado de 100 páginas
+tarda minutos. Este motor compara en dos niveles:
+
+1. Estructura: cada texto se divide en unidades (preámbulo, Capítulo,
+   Artículo, Sección, inciso) con una clave normalizada ('artículo 3',
+   'sección 2.1 (a)'). Las unidades se alinean por el texto de su cuerpo,
+   así que insertar o renumerar un artículo no desalinea los siguientes; las
+   que no coinciden se emparejan por clave o, si su texto es parecido, en orden.
+2. Palabras: solo las unidades cuyo texto cambió se comparan palabra por
+   palabra. Unidades largas se alinean antes por anclas de contenido
+   (secuencias de palabras únicas en ambos textos), así que el costo es
+   proporcional al tamaño del cambio y no al del documento.
+
+El resultado (``LegalDiff``) no guarda texto: cada unidad tiene sus rangos
+de caracteres en el texto viejo/nuevo y las operaciones de palabras que no
+son 'equal', de modo que se puede serializar y volver a mostrar a partir de
+los dos textos originales.
+
+Uso:
+    from core.utils.legal_diff import diff_legal_texts
+
+    diff = diff_legal_texts(old_text, new_text)
+    for unit in diff.changed_units():
+        print(unit.label, unit.tag)
+"""
+
+import hashlib
+import html
+import re
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+# Encabezados que abren una unidad estructural (al inicio de línea)
+HEADING_RE = re.compile(
+    r'^[ \t]*(?P<kind>art[íi]culo|secci[óo]n|cap[íi]tulo|t[íi]tulo)[ \t]+'
+    r'(?P<num>[0-9]+(?:[.\-][0-9]+)*(?:[ \t]*-?[ \t]*[A-Z](?![a-z]))?|[IVXLC]+\b)',
+    re.IGNORECASE | re.MULTILINE,
+)
+# Incisos: "(a)", "(1)", "(iv)" al inicio de línea
+INCISO_RE = re.compile(r'^[ \t]*\((?P<num>[a-z]{1,2}|[0-9]{1,3}|[ivxlc]{1,5})\)', re.IGNORECASE | re.MULTILINE)
+TOKEN_RE = re.compile(r'\S+')
+
+CONTAINER_KINDS = {'capitulo', 'titulo'}
+# Unidades con más palabras que esto se alinean por bloques antes del diff de palabras
+LONG_UNIT_TOKENS = 1500
+# Palabras por ancla de alineación (secuencia que debe ser única en ambos textos)
+ANCHOR_WORDS = 4
+# Similitud mínima (0-1) para emparejar unidades renumeradas
+RENUMBER_SIMILARITY = 0.5
+# Cambia cuando el algoritmo produce resultados distintos (invalida diffs guardados)
+ENGINE_VERSION = 2
+# Unidades nuevas que se revisan buscando la pareja de una vieja dentro de un bloque
+PAIR_WINDOW = 8
+# Palabras sin cambios que se muestran alrededor de cada cambio al generar HTML
+CONTEXT_WORDS = 12
+
+Span = Tuple[int, int]
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+@dataclass
+class Unit:
+    """
+    Unidad estructural de un texto: clave de alineación, etiqueta visible,
+    rango de caracteres y dónde empieza el cuerpo (tras el encabezado).
+    """
+    key: str
+    label: str
+    start: int
+    end: int
+    body: int
+
+
+def split_units(text: str) -> List[Unit]:
+    """
+    Divide ``text`` en unidades en orden. Las claves son únicas: los
+    artículos/secciones llevan el capítulo/título que los contiene y las
+    repeticiones reciben un sufijo '#2', '#3'...
+    """
+    text = text or ''
+    marks = []
+    for m in HEADING_RE.finditer(text):
+        kind = _fold(m.group('kind'))
+        num = re.sub(r'[\s-]+', '', m.group('num')).rstrip('.').lower()
+        marks.append((m.start(), m.end(), kind, num, m.group(0).strip()))
+    for m in INCISO_RE.finditer(text):
+        marks.append((m.start(), m.end(), 'inciso', m.group('num').lower(), m.group(0).strip()))
+    marks.sort()
+
+    units: List[Unit] = []
+    seen: Dict[str, int] = {}
+    container = parent = parent_label = ''
+
+    def add(key, label, start, end, body):
+        if end <= start:
+            return
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key} #{seen[key]}"
+        units.append(Unit(key, label, start, end, min(body, end)))
+
+    first = marks[0][0] if marks else len(text)
+    if text[:first].strip():
+        add('preámbulo', 'Preámbulo', 0, first, 0)
+
+    for i, (start, body, kind, num, label) in enumerate(marks):
+        end = marks[i + 1][0] if i + 1 < len(marks) else len(text)
+        if kind in CONTAINER_KINDS:
+            container = f"{kind} {num}"
+            parent = key = container
+            parent_label = label
+        elif kind == 'inciso':
+            key = f"{parent} ({num})" if parent else f"({num})"
+            label = f"{parent_label} {label}".strip()
+        else:
+            parent = key = f"{container} {kind} {num}".strip()
+            parent_label = label
+        add(key, label, start, end, body)
+    return units
+
+
+def tokenize(text: str, offset: int = 0) -> Tuple[List[str], List[Span]]:
+    """Palabras de ``text`` y sus rangos (desplazados por ``offset``)."""
+    words, spans = [], []
+    for m in TOKEN_RE.finditer(text):
+        words.append(m.group(0))
+        spans.append((m.start() + offset, m.end() + offset))
+    return words, spans
+
+
+def _word_opcodes(a: List[str], b: List[str]) -> List[Opcode]:
+    """Opcodes no-'equal' entre dos listas de palabras."""
+    if len(a) > LONG_UNIT_TOKENS or len(b) > LONG_UNIT_TOKENS:
+        return _anchored_opcodes(a, b)
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return [op for op in matcher.get_opcodes() if op[0] != 'equal']
+
+
+def _unique_shingles(words: List[str], lo: int, hi: int) -> Dict[Tuple[str, ...], int]:
+    """Secuencias de ``ANCHOR_WORDS`` palabras que aparecen una sola vez en ``words[lo:hi]`` → posición."""
+    size = ANCHOR_WORDS
+    seen: Dict[Tuple[str, ...], int] = {}
+    for i in range(lo, hi - size + 1):
+        shingle = tuple(words[i:i + size])
+        seen[shingle] = -1 if shingle in seen else i
+    return {shingle: i for shingle, i in seen.items() if i >= 0}
+
+
+def _patience_anchors(a: List[str], alo: int, ahi: int,
+                      b: List[str], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """
+    Anclas ``(i, j)`` para alinear ``a[alo:ahi]`` con ``b[blo:bhi]``: secuencias
+    únicas en ambos lados, la cadena más larga que avanza en los dos (patience).
+    """
+    unique_b = _unique_shingles(b, blo, bhi)
+    pairs = sorted((i, unique_b[shingle]) for shingle, i in _unique_shingles(a, alo, ahi).items()
+                   if shingle in unique_b)
+    # Subsecuencia creciente más larga en j (O(n log n))
+    tails: List[int] = []
+    tail_pos: List[int] = []
+    back: List[int] = []
+    for k, (_, j) in enumerate(pairs):
+        depth = bisect_left(tails, j)
+        if depth == len(tails):
+            tails.append(j)
+            tail_pos.append(k)
+        else:
+            tails[depth] = j
+            tail_pos[depth] = k
+        back.append(tail_pos[depth - 1] if depth else -1)
+    chain: List[Tuple[int, int]] = []
+    k = tail_pos[-1] if tail_pos else -1
+    while k >= 0:
+        chain.append(pairs[k])
+        k = back[k]
+    return chain[::-1]
+
+
+def _anchored_opcodes(a: List[str], b: List[str]) -> List[Opcode]:
+    """
+    Diff de unidades largas: se recortan prefijo y sufijo comunes y el resto se
+    alinea por anclas de contenido (secuencias de ``ANCHOR_WORDS`` palabras
+    únicas en ambos textos, estilo patience diff), así que insertar o borrar
+    palabras no desplaza las anclas siguientes. Los tramos entre anclas se
+    comparan por palabra; uno largo sin anclas se reporta como reemplazo completo.
+    """
+    ops: List[Opcode] = []
+    pending = [(0, len(a), 0, len(b))]
+    while pending:
+        alo, ahi, blo, bhi = pending.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+        if alo == ahi and blo == bhi:
+            continue
+        if alo == ahi or blo == bhi:
+            ops.append(('insert' if alo == ahi else 'delete', alo, ahi, blo, bhi))
+            continue
+        if ahi - alo <= LONG_UNIT_TOKENS and bhi - blo <= LONG_UNIT_TOKENS:
+            matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            ops.extend((tag, i1 + alo, i2 + alo, j1 + blo, j2 + blo)
+                       for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal')
+            continue
+        anchors = _patience_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            ops.append(('replace', alo, ahi, blo, bhi))
+            continue
+        gaps = []
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            if i < prev_a or j < prev_b:  # se solapa con el ancla anterior
+                continue
+            gaps.append((prev_a, i, prev_b, j))
+            prev_a, prev_b = i + ANCHOR_WORDS, j + ANCHOR_WORDS
+        gaps.append((prev_a, ahi, prev_b, bhi))
+        pending.extend(reversed(gaps))  # en orden: el primer tramo sale primero
+    return ops
+
+
+@dataclass
+class UnitDiff:
+    """
+    Comparación de una unidad. ``tag``: 'equal', 'changed', 'added' o
+    'removed'. ``ops`` son opcodes de palabras (índices dentro de la unidad)
+    sin los tramos 'equal'.
+    """
+    key: str
+    label: str
+    tag: str
+    old_span: Optional[Span] = None
+    new_span: Optional[Span] = None
+    ops: List[Opcode] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {'key': self.key, 'label': self.label, 'tag': self.tag,
+                'old': list(self.old_span) if self.old_span else None,
+                'new': list(self.new_span) if self.new_span else None,
+                'ops': [list(op) for op in self.ops]}
+
+    def to_row(self) -> list:
+        """Forma compacta para almacenar: ``[key, label, tag, old, new, ops]``."""
+        return [self.key, self.label, self.tag,
+                list(self.old_span) if self.old_span else None,
+                list(self.new_span) if self.new_span else None,
+                [list(op) for op in self.ops]]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'UnitDiff':
+        key, label, tag, old, new, ops = row
+        return cls(key, label, tag, tuple(old) if old else None, tuple(new) if new else None,
+                   [tuple(op) for op in ops])
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'UnitDiff':
+        return cls(data['key'], data['label'], data['tag'],
+                   tuple(data['old']) if data.get('old') else None,
+                   tuple(data['new']) if data.get('new') else None,
+                   [tuple(op) for op in data.get('ops', [])])
+
+
+@dataclass
+class LegalDiff:
+    """Resultado del diff: todas las unidades en orden (las 'equal' sin opcodes)."""
+    units: List[UnitDiff]
+
+    def changed_units(self) -> List[UnitDiff]:
+        return [u for u in self.units if u.tag != 'equal']
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        counts = {'units': len(self.units), 'equal': 0, 'changed': 0, 'added': 0, 'removed': 0}
+        for unit in self.units:
+            counts[unit.tag] += 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        return {'units': [u.to_dict() for u in self.units]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LegalDiff':
+        return cls([UnitDiff.from_dict(u) for u in data.get('units', [])])
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _similar(a: str, b: str) -> bool:
+    matcher = SequenceMatcher(None, a.split(), b.split(), autojunk=False)
+    return matcher.real_quick_ratio() >= RENUMBER_SIMILARITY and matcher.quick_ratio() >= RENUMBER_SIMILARITY
+
+
+def _compare(old_text: str, new_text: str, old: Unit, new: Unit) -> UnitDiff:
+    label = new.label if old.label == new.label else f"{old.label} → {new.label}"
+    old_slice, new_slice = old_text[old.start:old.end], new_text[new.start:new.end]
+    if _digest(old_slice) == _digest(new_slice):
+        return UnitDiff(new.key, label, 'equal', (old.start, old.end), (new.start, new.end))
+    a, _ = tokenize(old_slice)
+    b, _ = tokenize(new_slice)
+    return UnitDiff(new.key, label, 'changed', (old.start, old.end), (new.start, new.end), _word_opcodes(a, b))
+
+
+def _pair_block(old_text: str, new_text: str, olds: List[Unit], news: List[Unit]) -> List[Tuple[Optional[Unit], Optional[Unit]]]:
+    """
+    Empareja en orden las unidades de un bloque sin coincidencia exacta. Cada
+    unidad vieja toma la primera nueva (dentro de ``PAIR_WINDOW``) con texto
+    parecido (enmendada o renumerada); si no hay ninguna, la de su misma clave
+    (reescrita por completo). Retorna pares ``(vieja, nueva)`` en orden, con
+    None del lado que falta.
+    """
+    by_key = {u.key: j for j, u in enumerate(news)}
+    bodies = [new_text[u.body:u.end] for u in news]
+    match: Dict[int, int] = {}
+    next_j = 0
+    for i, old in enumerate(olds):
+        body = old_text[old.body:old.end]
+        found = next((j for j in range(next_j, min(len(news), next_j + PAIR_WINDOW))
+                      if _similar(body, bodies[j])), None)
+        if found is None:
+            found = by_key.get(old.key)
+            if found is not None and found < next_j:
+                found = None
+        if found is not None:
+            match[i] = found
+            next_j = found + 1
+
+    pairs: List[Tuple[Optional[Unit], Optional[Unit]]] = []
+    j = 0
+    for i, old in enumerate(olds):
+        if i not in match:
+            pairs.append((old, None))
+            continue
+        while j < match[i]:
+            pairs.append((None, news[j]))
+            j += 1
+        pairs.append((old, news[j]))
+        j += 1
+    pairs.extend((None, new) for new in news[j:])
+    return pairs
+
+
+def diff_legal_texts(old_text: str, new_text: str) -> LegalDiff:
+    """
+    Diff estructural + por palabras. Las unidades se alinean por el texto de
+    su cuerpo (así una renumeración no desalinea el resto); los bloques sin
+    coincidencia se emparejan por clave o por similitud.
+    """
+    old_text, new_text = old_text or '', new_text or ''
+    old_units, new_units = split_units(old_text), split_units(new_text)
+    old_bodies = [_digest(old_text[u.body:u.end]) for u in old_units]
+    new_bodies = [_digest(new_text[u.body:u.end]) for u in new_units]
+
+    result: List[UnitDiff] = []
+    matcher = SequenceMatcher(None, old_bodies, new_bodies, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            pairs = list(zip(old_units[i1:i2], new_units[j1:j2]))
+        else:
+            pairs = _pair_block(old_text, new_text, old_units[i1:i2], new_units[j1:j2])
+        for old, new in pairs:
+            if old is None:
+                result.append(UnitDiff(new.key, new.label, 'added', new_span=(new.start, new.end)))
+            elif new is None:
+                result.append(UnitDiff(old.key, old.label, 'removed', old_span=(old.start, old.end)))
+            else:
+                result.append(_compare(old_text, new_text, old, new))
+    return LegalDiff(result)
+
+
+def iter_word_changes(diff: LegalDiff, old_text: str, new_text: str):
+    """
+    Genera ``(unidad, tag, texto_viejo, texto_nuevo, posición_vieja, posición_nueva)``
+    por cada cambio de palabras; las unidades agregadas/eliminadas salen completas.
+    """
+    for unit in diff.changed_units():
+        if unit.tag == 'added':
+            s, e = unit.new_span
+            yield unit, 'insert', '', new_text[s:e].strip(), None, s
+            continue
+        if unit.tag == 'removed':
+            s, e = unit.old_span
+            yield unit, 'delete', old_text[s:e].strip(), '', s, None
+            continue
+        a_words, a_spans = tokenize(old_text[unit.old_span[0]:unit.old_span[1]], unit.old_span[0])
+        b_words, b_spans = tokenize(new_text[unit.new_span[0]:unit.new_span[1]], unit.new_span[0])
+        for tag, i1, i2, j1, j2 in unit.ops:
+            old_pos = a_spans[i1][0] if i1 < len(a_spans) else unit.old_span[1]
+            new_pos = b_spans[j1][0] if j1 < len(b_spans) else unit.new_span[1]
+            yield unit, tag, ' '.join(a_words[i1:i2]), ' '.join(b_words[j1:j2]), old_pos, new_pos
+
+
+def _words_html(words: List[str], css: str) -> str:
+    text = html.escape(' '.join(words))
+    return f'<{css}>{text}</{css}>' if css else text
+
+
+def render_unit_html(unit: UnitDiff, old_text: str, new_text: str, context: int = CONTEXT_WORDS) -> str:
+    """
+    HTML de una unidad: palabras eliminadas en ``<del>``, agregadas en
+    ``<ins>``; tramos sin cambios de más de ``2·context`` palabras se recortan.
+    """
+    label = html.escape(unit.label)
+    if unit.tag in ('added', 'removed'):
+        css, span, text = ('ins', unit.new_span, new_text) if unit.tag == 'added' else ('del', unit.old_span, old_text)
+        body = _words_html(text[span[0]:span[1]].split(), css)
+        return f'<section class="diff-unit diff-{unit.tag}"><h4>{label}</h4><p>{body}</p></section>'
+    if unit.tag == 'equal':
+        return ''
+
+    a = old_text[unit.old_span[0]:unit.old_span[1]].split()
+    b = new_text[unit.new_span[0]:unit.new_span[1]].split()
+    parts, pos = [], 0
+    for tag, i1, i2, j1, j2 in unit.ops:
+        gap = a[pos:i1]
+        if pos == 0 and len(gap) > context:
+            gap = ['…'] + gap[-context:]
+        elif len(gap) > 2 * context:
+            gap = gap[:context] + ['…'] + gap[-context:]
+        if gap:
+            parts.append(_words_html(gap, ''))
+        if i2 > i1:
+            parts.append(_words_html(a[i1:i2], 'del'))
+        if j2 > j1:
+            parts.append(_words_html(b[j1:j2], 'ins'))
+        pos = i2
+    tail = a[pos:]
+    if tail:
+        parts.append(_words_html(tail[:context] + (['…'] if len(tail) > context else []), ''))
+    return f'<section class="diff-unit diff-changed"><h4>{label}</h4><p>{" ".join(parts)}</p></section>'
+
+
+def render_diff_html(diff: LegalDiff, old_text: str, new_text: str) -> str:
+    """HTML de las unidades con cambios (las iguales se omiten)."""
+    return '\n'.join(render_unit_html(unit, old_text, new_text) for unit in diff.changed_units())
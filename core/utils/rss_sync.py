@@ -1,76 +1,506 @@
 import feedparser
+import hashlib
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
 from core.models import Article, NewsSource
 
 logger = logging.getLogger(__name__)
 
-def parse_date(date_str):
-    """
-    Parsea fechas de RSS y asegura que sean 'Timezone Aware' para evitar warnings de Django.
-    """
+FEED_USER_AGENT = 'Mozilla/5.0 (compatible; LegalWatchPR/1.0; +RSS)'
+FEED_CHUNK_SIZE = 64 * 1024
+INGEST_BATCH_SIZE = 500
+
+
+def _parse_datetime(date_str) -> Optional[datetime]:
+    """Fecha RFC 822 (RSS) o ISO 8601 (Atom) como datetime aware, o None si no se reconoce."""
     if not date_str:
-        return timezone.now()
+        return None
+    dt = None
     try:
         # Intento estándar RFC 822
         dt = parsedate_to_datetime(date_str)
-        if dt:
-            # FIX CRÍTICO: Convertir a aware si es naive
-            if timezone.is_naive(dt):
-                return timezone.make_aware(dt)
-            return dt
     except Exception:
-        # Si falla el parseo, usar fecha actual
-        pass
-    return timezone.now()
+        try:
+            dt = datetime.fromisoformat(date_str.strip())
+        except ValueError:
+            return None
+    if dt is None:
+        return None
+    # FIX CRÍTICO: Convertir a aware si es naive
+    if timezone.is_naive(dt):
+        return timezone.make_aware(dt)
+    return dt
+
+
+def parse_date(date_str):
+    """
+    Parsea fechas de RSS y asegura que sean 'Timezone Aware' para evitar warnings de Django.
+    Si no se puede parsear, usa la fecha actual.
+    """
+    return _parse_datetime(date_str) or timezone.now()
+
+
+@dataclass
+class FeedFetchResult:
+    """Resultado de la descarga de un feed (sin parsear)."""
+    source_id: int
+    content: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.content is not None or self.not_modified)
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.content).hexdigest() if self.content is not None else ""
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    """Sesión HTTP con pool de conexiones keep-alive compartido por los workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': FEED_USER_AGENT})
+    return session
+
+
+def _iter_body(response):
+    """
+    Itera el cuerpo a medida que llegan bytes (``read1``) para poder cortar por
+    plazo. requests abre la conexión sin descomprimir: se pide
+    ``decode_content=True`` para que un feed gzip/deflate llegue ya descomprimido.
+    """
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:  # urllib3 < 2
+        yield from response.iter_content(FEED_CHUNK_SIZE)
+        return
+    while True:
+        chunk = read1(FEED_CHUNK_SIZE, decode_content=True)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _conditional_headers(source) -> Dict[str, str]:
+    """Cabeceras If-None-Match / If-Modified-Since según la última descarga."""
+    headers = {}
+    if getattr(source, 'etag', ''):
+        headers['If-None-Match'] = source.etag
+    if getattr(source, 'last_modified', ''):
+        headers['If-Modified-Since'] = source.last_modified
+    return headers
+
 
-def sync_all_rss_sources(max_entries=10, clean_first=False):
+def _download_feed(session, source, host_limits, timeout) -> FeedFetchResult:
     """
-    Descarga noticias de todas las fuentes activas.
+    Descarga un feed respetando el límite por host y un tiempo total por fuente.
+
+    ``timeout`` acota la descarga completa (no solo cada lectura del socket):
+    si un servidor envía bytes lentamente, se aborta al vencer el plazo.
+    Envía GET condicional; un 304 se retorna sin cuerpo.
+    """
+    result = FeedFetchResult(source_id=source.id)
+    started = time.monotonic()
+    deadline = started + timeout
+    with host_limits[urlsplit(source.url).netloc.lower()]:
+        try:
+            with session.get(source.url, headers=_conditional_headers(source),
+                             timeout=(min(5, timeout), timeout), stream=True) as response:
+                result.status_code = response.status_code
+                result.headers = dict(response.headers)
+                if response.status_code == 304:
+                    return result
+                if response.status_code >= 400:
+                    result.error = f"HTTP {response.status_code}"
+                    return result
+                chunks = []
+                for chunk in _iter_body(response):
+                    chunks.append(chunk)
+                    if time.monotonic() > deadline:
+                        result.error = f"Timeout ({timeout}s) descargando feed"
+                        return result
+                result.content = b"".join(chunks)
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.elapsed = time.monotonic() - started
+    return result
+
+
+def fetch_feeds(sources: Iterable[NewsSource], max_workers=None, per_host_limit=None,
+                timeout=None) -> Dict[int, FeedFetchResult]:
+    """
+    Descarga en paralelo los feeds de ``sources``.
+
+    La duración total queda acotada por el feed más lento (y por ``timeout``)
+    en vez de la suma de todos. Retorna ``{source.id: FeedFetchResult}``.
+    """
+    sources = list(sources)
+    if not sources:
+        return {}
+
+    max_workers = max_workers or getattr(settings, 'RSS_FETCH_WORKERS', 8)
+    per_host_limit = per_host_limit or getattr(settings, 'RSS_PER_HOST_LIMIT', 2)
+    timeout = timeout or getattr(settings, 'RSS_FETCH_TIMEOUT', 15)
+    workers = min(max_workers, len(sources))
+
+    host_limits = {}
+    for source in sources:
+        host = urlsplit(source.url).netloc.lower()
+        host_limits.setdefault(host, threading.BoundedSemaphore(per_host_limit))
+
+    session = _build_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rss-fetch') as pool:
+            futures = {
+                source.id: pool.submit(_download_feed, session, source, host_limits, timeout)
+                for source in sources
+            }
+            return {source_id: future.result() for source_id, future in futures.items()}
+    finally:
+        session.close()
+
+
+def _entries(result: FeedFetchResult):
+    """Entradas del feed: incremental con lxml, o ``feedparser`` si el XML está roto."""
+    from core.utils.feed_stream import FeedStreamError, iter_feed_entries
+
+    stream = iter_feed_entries(result.content)
+    try:
+        first = next(stream, None)
+    except FeedStreamError as e:
+        logger.debug(f"Feed {result.source_id} no es XML válido ({e}); usando feedparser")
+        # Ignoramos bozo_exception si logramos sacar entradas
+        yield from feedparser.parse(result.content, response_headers=result.headers).entries
+        return
+    if first is not None:
+        yield first
+        yield from stream
+
+
+def select_new_entries(source, entries, max_entries: int) -> list:
+    """
+    Recorre las entradas (más nuevas primero) y se detiene en lo ya visto.
+
+    Con la marca de agua de la fuente (``last_seen_link`` / ``last_seen_published``)
+    una entrada es conocida si es el último link visto o si se publicó antes
+    de la marca; esas no se devuelven (ni se consultan en la BD). Tras
+    ``RSS_EARLY_STOP_RUN`` conocidas seguidas se deja de parsear el feed, lo
+    que tolera entradas fijadas o reordenadas en la cabeza del feed.
+    """
+    stop_run = getattr(settings, 'RSS_EARLY_STOP_RUN', 3)
+    mark_link = getattr(source, 'last_seen_link', '')
+    mark_date = getattr(source, 'last_seen_published', None)
+
+    selected = []
+    known_run = 0
+    for entry in entries:
+        if len(selected) >= max_entries:
+            break
+        published = _parse_datetime(entry.get('published') or entry.get('updated'))
+        known = ((mark_link and entry.get('link') == mark_link)
+                 or (mark_date is not None and published is not None and published < mark_date))
+        if known:
+            known_run += 1
+            if known_run >= stop_run:
+                break
+            continue
+        known_run = 0
+        selected.append(entry)
+    return selected
+
+
+def _high_water_mark(entries) -> Dict[str, object]:
+    """Nueva marca de agua: link más reciente y fecha de publicación máxima."""
+    if not entries:
+        return {}
+    dates = [d for d in (_parse_datetime(e.get('published') or e.get('updated')) for e in entries) if d]
+    mark = {'last_seen_link': (entries[0].get('link') or '')[:500]}
+    if dates:
+        mark['last_seen_published'] = max(dates)
+    return mark
+
+
+def _record_fetch(source, result: FeedFetchResult, processed: bool, mark=None) -> None:
+    """
+    Actualiza contadores y validadores de la fuente en una sola sentencia.
+
+    Los validadores (ETag, Last-Modified, hash) y la marca de agua solo se
+    guardan cuando el feed se procesó completo, para no saltar un feed cuyo
+    guardado falló.
+    """
+    updates = {'fetch_count': F('fetch_count') + 1}
+    if result.not_modified:
+        updates['not_modified_count'] = F('not_modified_count') + 1
+    elif not processed:
+        updates['unchanged_count'] = F('unchanged_count') + 1
+    else:
+        updates['etag'] = result.headers.get('ETag', '')[:255]
+        updates['last_modified'] = result.headers.get('Last-Modified', '')[:100]
+        updates['content_hash'] = result.content_hash
+        updates.update(mark or {})
+    NewsSource.objects.filter(pk=source.pk).update(**updates)
+
+
+def _record_failed_fetch(sources) -> None:
+    """Cuenta el intento de las fuentes cuya descarga, parseo o guardado falló (sin tocar validadores)."""
+    ids = [source.pk for source in sources]
+    if ids:
+        NewsSource.objects.filter(pk__in=ids).update(fetch_count=F('fetch_count') + 1)
+
+
+def feed_cache_stats():
+    """Tasa de aciertos del GET condicional por fuente (para reportes)."""
+    return [
+        {
+            'name': source.name,
+            'fetches': source.fetch_count,
+            'not_modified': source.not_modified_count,
+            'unchanged': source.unchanged_count,
+            'hit_rate': source.cache_hit_rate,
+            'publish_rate': source.publish_rate,
+            'poll_interval': source.poll_interval,
+        }
+        for source in NewsSource.objects.filter(is_active=True).order_by('name')
+    ]
+
+
+def _entry_to_article(source, entry) -> Optional[Article]:
+    """Construye (sin guardar) el Article correspondiente a una entrada del feed."""
+    link = entry.get('link', '')
+    if not link or len(link) > 500:
+        return None
+    snippet = entry.get('summary', '') or entry.get('description', '')
+    return Article(
+        title=entry.get('title', '')[:500],
+        link=link,
+        snippet=snippet,
+        content_hash=Article.compute_content_hash(snippet),
+        published_at=parse_date(entry.get('published', entry.get('updated'))),
+        source=source,
+        search_vector=None  # Se llenará con el trigger de DB
+    )
+
+
+def _embed_articles(rows: Sequence[Tuple[int, str, str]]) -> int:
+    """
+    Genera embeddings en un solo batch para artículos recién insertados.
+
+    ``bulk_create`` no emite ``post_save``, así que aquí se hace el trabajo
+    de ``core.signals.auto_generate_embedding`` para todo el lote a la vez.
+    """
+    from services.embedding_service import EmbeddingGenerator
+
+    items = [(pk, f"{title} {snippet or ''}".strip()) for pk, title, snippet in rows]
+    items = [(pk, text) for pk, text in items if text]
+    if not items:
+        return 0
+
+    vectors = EmbeddingGenerator().encode_batch([text for _, text in items], normalize=True)
+    articles = [Article(id=pk, embedding=vector) for (pk, _), vector in zip(items, vectors)]
+    Article.objects.bulk_update(articles, ['embedding'], batch_size=INGEST_BATCH_SIZE)
+    return len(articles)
+
+
+def _cluster_near_duplicates(rows: Sequence[Tuple[int, Optional[int]]]) -> int:
+    """Marca ``duplicate_of`` en los artículos nuevos que son notas sindicadas."""
+    from services.near_duplicates import assign_clusters, to_unsigned
+
+    duplicates = assign_clusters(
+        (pk, to_unsigned(fp) if fp is not None else None) for pk, fp in rows
+    )
+    if duplicates:
+        Article.objects.bulk_update(
+            [Article(id=pk, duplicate_of_id=cluster_id) for pk, cluster_id in duplicates.items()],
+            ['duplicate_of'],
+            batch_size=INGEST_BATCH_SIZE,
+        )
+        logger.info(f"{len(duplicates)} casi-duplicados agrupados")
+    return len(duplicates)
+
+
+def _insert_new(articles: List[Article]) -> List[Article]:
+    """
+    Inserta los artículos en bloque y retorna los que insertó esta llamada
+    (con su PK). Si otro proceso insertó alguno de los links entretanto, el
+    índice único de ``link`` rechaza el lote: se revierte su savepoint, se
+    descartan esos links y se reintenta con el resto.
+    """
+    while articles:
+        try:
+            with transaction.atomic():
+                return Article.objects.bulk_create(articles, batch_size=INGEST_BATCH_SIZE)
+        except IntegrityError:
+            taken = set(
+                Article.objects.filter(link__in=[a.link for a in articles]).values_list('link', flat=True)
+            )
+            if not taken:
+                raise
+            articles = [a for a in articles if a.link not in taken]
+            for article in articles:
+                # Los lotes ya insertados antes del error se revirtieron con el savepoint
+                article.pk = None
+                article._state.adding = True
+    return []
+
+
+def ingest_entries(batches: Iterable[Tuple[NewsSource, Sequence]], embed: bool = True) -> Dict[int, int]:
+    """
+    Inserta en bloque las entradas de varios feeds.
+
+    Hace una sola consulta ``link__in`` para deduplicar contra la base de
+    datos, un ``bulk_create`` (reintentado sin los links que otro proceso
+    haya insertado entretanto, ver ``_insert_new``), el agrupamiento de
+    casi-duplicados y un único batch de embeddings.
+
+    Retorna ``{source_id: artículos nuevos}``: solo los que insertó esta
+    llamada, no los de otro proceso.
+    """
+    candidates: Dict[str, Article] = {}
+    for source, entries in batches:
+        for entry in entries:
+            article = _entry_to_article(source, entry)
+            if article is not None and article.link not in candidates:
+                candidates[article.link] = article
+    if not candidates:
+        return {}
+
+    existing = set(
+        Article.objects.filter(link__in=list(candidates)).values_list('link', flat=True)
+    )
+    new_articles = [a for link, a in candidates.items() if link not in existing]
+    if not new_articles:
+        return {}
+
+    from services.near_duplicates import get_near_duplicate_index, simhash, to_signed
+
+    # Cargar el índice (con lo que insertaron otros procesos) antes de insertar,
+    # para que no contenga el propio lote
+    get_near_duplicate_index(refresh=True)
+    for article in new_articles:
+        fingerprint = simhash(f"{article.title} {article.snippet}")
+        article.simhash = to_signed(fingerprint) if fingerprint is not None else None
+
+    inserted = _insert_new(new_articles)
+    created: Dict[int, int] = {}
+    for article in inserted:
+        created[article.source_id] = created.get(article.source_id, 0) + 1
+
+    try:
+        _cluster_near_duplicates([(a.pk, a.simhash) for a in inserted])
+    except Exception as e:
+        logger.error(f"Error agrupando casi-duplicados: {e}", exc_info=True)
+
+    if embed:
+        try:
+            _embed_articles([(a.pk, a.title, a.snippet) for a in inserted])
+        except Exception as e:
+            # Los artículos ya están guardados; backfill_embeddings los completará
+            logger.error(f"Error generando embeddings en batch: {e}", exc_info=True)
+
+    return created
+
+
+def sync_all_rss_sources(max_entries=10, clean_first=False, sources=None):
+    """
+    Descarga noticias de todas las fuentes activas (o solo de ``sources``).
     Retorna el número de artículos nuevos creados.
+
+    Cada fuente consultada se reprograma según su tasa de publicación
+    (ver ``core.utils.feed_schedule``).
     """
-    sources = NewsSource.objects.filter(is_active=True)
-    total_created = 0
-    
+    if sources is None:
+        sources = NewsSource.objects.filter(is_active=True)
+    sources = list(sources)
+    skipped = 0
+
     print(f"\n--- 📡 SINCRONIZACIÓN RSS ({len(sources)} fuentes) ---")
 
+    # Etapa 1: descarga concurrente (red).
+    started = time.monotonic()
+    fetched = fetch_feeds(sources)
+    logger.info(f"Descarga RSS completada en {time.monotonic() - started:.1f}s")
+
+    # Etapa 2: parseo incremental de los feeds que cambiaron.
+    parsed: List[Tuple[NewsSource, FeedFetchResult, list]] = []
+    failed: List[NewsSource] = []
     for source in sources:
         try:
-            feed = feedparser.parse(source.url)
-            # Ignoramos bozo_exception si logramos sacar entradas
-            entries = feed.entries[:max_entries]
-            created_count = 0
-            
-            for entry in entries:
-                link = entry.get('link', '')
-                if not link: continue
-
-                # Deduplicación por URL
-                if Article.objects.filter(link=link).exists():
-                    continue
-                
-                title = entry.get('title', '')[:500]
-                snippet = entry.get('summary', '') or entry.get('description', '')
-                published_at = parse_date(entry.get('published', entry.get('updated')))
-                
-                Article.objects.create(
-                    title=title,
-                    link=link,
-                    snippet=snippet,
-                    published_at=published_at,
-                    source=source,
-                    search_vector=None # Se llenará con el trigger de DB
-                )
-                created_count += 1
-            
-            if created_count > 0:
-                print(f"   ✅ {source.name}: +{created_count} noticias")
-            total_created += created_count
+            result = fetched[source.id]
+            if not result.ok:
+                raise RuntimeError(result.error or "respuesta vacía")
+
+            # Sin cambios: 304 del servidor o mismo contenido que la última vez
+            if result.not_modified or result.content_hash == source.content_hash:
+                _record_fetch(source, result, processed=False)
+                skipped += 1
+                continue
+
+            # Parseo incremental: se detiene en las entradas ya vistas
+            parsed.append((source, result, select_new_entries(source, _entries(result), max_entries)))
 
         except Exception as e:
             print(f"   ❌ Error en {source.name}: {str(e)}")
             logger.error(f"Error syncing {source.name}: {e}")
+            failed.append(source)
+
+    # Etapa 3: deduplicación e inserción en bloque de todo el lote.
+    created = {}
+    try:
+        created = ingest_entries((source, entries) for source, _, entries in parsed)
+    except Exception as e:
+        print(f"   ❌ Error guardando noticias: {str(e)}")
+        logger.error(f"Error ingesting RSS entries: {e}", exc_info=True)
+        failed.extend(source for source, _, _ in parsed)
+        parsed = []
+    _record_failed_fetch(failed)
+
+    for source, result, entries in parsed:
+        _record_fetch(source, result, processed=True, mark=_high_water_mark(entries))
+        if created.get(source.id):
+            print(f"   ✅ {source.name}: +{created[source.id]} noticias")
+
+    try:
+        from core.utils.feed_schedule import estimate_feed_rate, reschedule_sources
+        # Primer sondeo de una fuente: estimar la tasa con las fechas del feed
+        seed_rates = {}
+        for source, _, entries in parsed:
+            if source.last_polled_at is not None:
+                continue
+            dates = [parse_date(e.get('published') or e.get('updated'))
+                     for e in entries if e.get('published') or e.get('updated')]
+            rate = estimate_feed_rate(dates)
+            if rate is not None:
+                seed_rates[source.id] = rate
+        reschedule_sources(sources, created, seed_rates=seed_rates)
+    except Exception as e:
+        logger.error(f"Error reprogramando fuentes RSS: {e}", exc_info=True)
 
+    total_created = sum(created.values())
+    if skipped:
+        print(f"   💾 {skipped}/{len(sources)} fuentes sin cambios (304 o contenido idéntico)")
     print(f"--- FIN: {total_created} noticias nuevas ---\n")
-    return total_created
\ No newline at end of file
+    return total_created
@@ -0,0 +1,178 @@
+"""
+Cola de Trabajos de Resumen con IA
+==================================
+
+Los resúmenes de noticias ya no se generan dentro de la request HTTP: la
+vista encola el artículo y responde de inmediato; el cliente consulta el
+estado (``summary_status``) hasta que el resumen está listo.
+
+- Deduplicación: encolar es un UPDATE condicional (solo si el artículo no
+  tiene resumen ni un trabajo activo), así que clics repetidos o de varios
+  usuarios, incluso desde distintos procesos, producen un solo trabajo
+- Concurrencia: ``AI_SUMMARY_WORKERS`` hilos por proceso; además cada llamada
+  pasa por el ``QuotaManager`` compartido (``GEMINI_RPM`` / ``GEMINI_TPM``)
+- Escritura: solo ``ai_summary`` y los campos de estado (``update_fields``)
+- Recuperación: el scheduler re-encola trabajos perdidos (reinicio del
+  proceso) con ``resume_summary_jobs``. Un trabajo en curso renueva
+  ``summary_requested_at`` antes de cada intento de llamada al modelo
+  (``touch_running``), así que uno que espera por cuota no se toma por
+  abandonado
+
+Estados: '' → queued → running → done | failed
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.ai_client import (MAX_BACKOFF_SECONDS, estimate_tokens, get_ai_client,
+                            get_quota_manager)
+from core.utils.job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+SUMMARY_PROMPT = "Resume esta noticia para un abogado: {title}. Contenido: {snippet}"
+
+
+class SummaryQueue(JobQueue):
+    """Cola de resúmenes: un artículo ya pendiente en este proceso no se vuelve a encolar."""
+
+    thread_name_prefix = 'ai-summary'
+
+
+def stale_seconds() -> float:
+    """Tiempo sin latido tras el que un trabajo 'running' se da por abandonado."""
+    # Entre dos latidos puede haber una pausa completa por 429 más la request
+    return max(getattr(settings, 'AI_SUMMARY_STALE_SECONDS', 900), 2 * MAX_BACKOFF_SECONDS)
+
+
+def touch_running(article_ids) -> None:
+    """Latido: renueva ``summary_requested_at`` de los trabajos en curso."""
+    from core.models import Article
+
+    Article.objects.filter(pk__in=list(article_ids), summary_status=RUNNING).update(
+        summary_requested_at=timezone.now()
+    )
+
+
+def summarize_article(article, client=None, quota=None,
+                      on_attempt: Optional[Callable[[], None]] = None) -> str:
+    """
+    Texto del resumen de ``article`` (reintenta tras 429 respetando la cuota).
+    ``on_attempt`` se llama justo antes de cada intento.
+    """
+    client = client or get_ai_client()
+    quota = quota or get_quota_manager()
+    if not getattr(client, 'available', True):
+        raise ValueError("API Key missing.")
+
+    prompt = SUMMARY_PROMPT.format(title=article.title, snippet=(article.snippet or '')[:2000])
+
+    def request():
+        if on_attempt:
+            on_attempt()
+        return client.generate_text(prompt)
+
+    # Respuesta estimada: ~300 tokens
+    return quota.call(request, estimate_tokens(prompt) + 300)
+
+
+def run_summary_job(article_id: int, client=None, quota=None) -> bool:
+    """Toma un trabajo en cola (queued → running) y lo ejecuta. False si otro worker lo tomó o falló."""
+    from core.models import Article
+
+    claimed = Article.objects.filter(pk=article_id, summary_status=QUEUED).update(
+        summary_status=RUNNING, summary_requested_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    article = Article.objects.only('id', 'title', 'snippet').get(pk=article_id)
+    try:
+        summary = summarize_article(article, client, quota, on_attempt=lambda: touch_running([article_id]))
+    except Exception as e:
+        logger.error(f"AI Summary Error ({article_id}): {e}")
+        Article.objects.filter(pk=article_id).update(summary_status=FAILED, summary_error=str(e)[:255])
+        return False
+
+    article.ai_summary = summary
+    article.summary_status = DONE
+    article.summary_error = ''
+    article.save(update_fields=['ai_summary', 'summary_status', 'summary_error'])
+    return True
+
+
+_queue: Optional[SummaryQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_summary_queue() -> SummaryQueue:
+    """Cola compartida del proceso (``AI_SUMMARY_WORKERS`` hilos)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = SummaryQueue(run_summary_job, getattr(settings, 'AI_SUMMARY_WORKERS', 2))
+    return _queue
+
+
+def summary_state(article_id: int) -> Optional[Dict]:
+    """``{'status', 'summary', 'error'}`` del artículo, o None si no existe."""
+    from core.models import Article
+
+    row = (Article.objects.filter(pk=article_id)
+           .values('ai_summary', 'summary_status', 'summary_error').first())
+    if row is None:
+        return None
+    status = DONE if row['ai_summary'] else row['summary_status']
+    return {'status': status, 'summary': row['ai_summary'] or '', 'error': row['summary_error']}
+
+
+def enqueue_summary(article_id: int, run_inline: bool = False) -> Optional[Dict]:
+    """
+    Encola el resumen de ``article_id`` si hace falta y retorna su estado.
+
+    Un artículo con resumen o con un trabajo activo no se vuelve a encolar;
+    uno fallido sí (reintento manual). ``run_inline`` ejecuta el trabajo en
+    el hilo actual (comandos, scripts).
+    """
+    from core.models import Article
+
+    queued = (Article.objects.filter(pk=article_id)
+              .filter(Q(ai_summary__isnull=True) | Q(ai_summary=''))
+              .exclude(summary_status__in=ACTIVE_STATES)
+              .update(summary_status=QUEUED, summary_requested_at=timezone.now(), summary_error=''))
+    if queued:
+        if run_inline:
+            run_summary_job(article_id)
+        else:
+            get_summary_queue().submit(article_id)
+    return summary_state(article_id)
+
+
+def resume_summary_jobs() -> int:
+    """
+    Re-encola trabajos 'running' abandonados (sin latido en ``stale_seconds()``)
+    y envía a la cola los 'queued' de la BD.
+    Retorna cuántos trabajos se enviaron.
+    """
+    from core.models import Article
+
+    stale_before = timezone.now() - timedelta(seconds=stale_seconds())
+    Article.objects.filter(summary_status=RUNNING, summary_requested_at__lt=stale_before).update(
+        summary_status=QUEUED
+    )
+    queue = get_summary_queue()
+    ids = Article.objects.filter(summary_status=QUEUED).values_list('id', flat=True)
+    return sum(queue.submit(article_id) for article_id in ids)
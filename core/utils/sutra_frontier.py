@@ -0,0 +1,134 @@
+"""
+Descubrimiento de la Frontera de Medidas en SUTRA
+=================================================
+
+Los rangos secuenciales (``--start-id/--count``, ``--start/--limit``)
+gastan requests en 404 más allá de la última medida radicada. Este módulo
+encuentra el número más alto que existe en cada cámara con búsqueda
+exponencial + binaria a partir de la frontera guardada, así que cada
+corrida solo cuesta O(log n) requests más las medidas nuevas.
+
+Tolerancia a huecos: SUTRA tiene números sin página (medidas retiradas,
+numeración reservada). Un número "existe" para la búsqueda si alguna de las
+``SUTRA_FRONTIER_GAP`` posiciones a partir de él existe; se asume que no hay
+huecos más largos que eso.
+
+Solo un 404 cuenta como "no existe": un timeout o un 5xx durante la
+búsqueda lanza ``SutraUnavailable`` y la frontera guardada no cambia (una
+caída de SUTRA no puede bajarla).
+"""
+
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+
+from core.models import SutraFrontier
+from core.scraper import parse_bill_html
+
+logger = logging.getLogger(__name__)
+
+
+class SutraUnavailable(RuntimeError):
+    """SUTRA no respondió (timeout, error de red o 5xx): no se sabe si la medida existe."""
+
+
+def measure_exists(client, measure_id: str) -> bool:
+    """
+    True si la página de la medida existe, False solo con un 404.
+
+    Raises:
+        SutraUnavailable: con cualquier otra respuesta o error de red
+    """
+    url = client.measure_url(measure_id)
+    try:
+        response = client.get(url)
+    except requests.RequestException as e:
+        raise SutraUnavailable(f"{measure_id}: {e}") from e
+    if response.status_code == 404:
+        return False
+    if response.status_code != 200:
+        raise SutraUnavailable(f"{measure_id}: HTTP {response.status_code}")
+    return parse_bill_html(response.content, url) is not None
+
+
+def find_frontier(exists: Callable[[int], bool], start: int = 0, gap: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Número más alto ``n >= start`` para el que ``exists(n)`` es verdadero.
+
+    Args:
+        exists: consulta a SUTRA (True si la medida ``n`` existe)
+        start: frontera conocida (se asume existente; 0 si no hay)
+        gap: largo máximo de un hueco en la numeración
+
+    Returns:
+        ``(frontera, requests usadas)``
+    """
+    gap = max(1, gap or getattr(settings, 'SUTRA_FRONTIER_GAP', 5))
+    seen: Dict[int, bool] = {}
+
+    def check(n: int) -> bool:
+        if n not in seen:
+            seen[n] = bool(exists(n))
+        return seen[n]
+
+    def probe(n: int) -> Optional[int]:
+        """Primer número existente en ``[n, n + gap)``, o None."""
+        for m in range(n, n + gap):
+            if check(m):
+                return m
+        return None
+
+    # Fase 1: exponencial hasta pasar la frontera
+    lo, step = start, 1
+    while True:
+        found = probe(lo + step)
+        if found is None:
+            hi = lo + step
+            break
+        lo, step = found, step * 2
+
+    # Fase 2: binaria en (lo, hi]; invariante: lo existe, [hi, hi + gap) no
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        found = probe(mid)
+        if found is None:
+            hi = mid
+        else:
+            lo = found
+
+    return lo, len(seen)
+
+
+def discover_new_numbers(chamber: str, exists: Callable[[int], bool], max_new: Optional[int] = None) -> range:
+    """
+    Actualiza la frontera guardada de ``chamber`` y retorna los números nuevos
+    (entre la frontera anterior y la actual) que hay que sincronizar.
+
+    ``max_new`` acota cuántos se retornan. Con frontera guardada se toman los
+    primeros y la frontera avanza solo hasta el último retornado, así que el
+    resto se sincroniza en las próximas corridas. En la primera corrida (sin
+    frontera, todo es "nuevo") se toman los últimos ``max_new``.
+
+    Raises:
+        SutraUnavailable: si SUTRA falló durante la búsqueda (la frontera no cambia)
+    """
+    frontier, _ = SutraFrontier.objects.get_or_create(chamber=chamber.upper())
+    previous = frontier.highest_number
+    highest, probes = find_frontier(exists, start=previous)
+
+    first, last = previous + 1, highest
+    if max_new is not None and highest - previous > max_new:
+        if previous:
+            last = previous + max_new
+        else:
+            first = highest - max_new + 1
+
+    frontier.highest_number = last
+    frontier.probes = probes
+    frontier.save(update_fields=['highest_number', 'probes', 'updated_at'])
+
+    pending = f", {highest - last} pendientes para la próxima corrida" if last < highest else ""
+    logger.info(f"Frontera SUTRA ({chamber}): {previous} → {highest} ({probes} requests{pending})")
+    return range(first, last + 1)
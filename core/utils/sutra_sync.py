@@ -4,8 +4,9 @@ SUTRA Legislature Scraper
 
 Scraper para el Sistema Unificado de Trámite Legislativo (SUTRA) de Puerto Rico.
 
-SUTRA es un sistema antiguo con SSL débil y estructura HTML inconsistente.
-Este scraper usa requests + BeautifulSoup4 con estrategia de "Direct ID Fetch".
+Usa el mismo esquema de URL (``/medidas/{id}``), cliente HTTP compartido y
+parser (``core.scraper.parse_bill_html``) que el robot, así que ambos
+caminos guardan exactamente los mismos datos de cada medida.
 
 Uso:
     from core.utils.sutra_sync import sync_sutra_bills
@@ -15,37 +16,18 @@ Uso:
 """
 
 import logging
-import re
-import time
+from functools import partial
 from typing import Dict, List, Optional
 
 import requests
-import urllib3
-from bs4 import BeautifulSoup
-from django.utils import timezone
 
-from core.models import Bill
-
-# Suprimir advertencias de SSL (SUTRA tiene certificados antiguos)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from core.scraper import parse_bill_html
+from core.sutra_client import SutraClient, get_sutra_client, normalize_measure_id
+from core.utils.bill_changes import apply_scraped_bill, notify_bill_change
 
 logger = logging.getLogger(__name__)
 
 
-# Patrones de URL de SUTRA (actualizar según estructura real)
-SUTRA_BASE_URL = "https://sutra.oslpr.org"
-SUTRA_MEASURE_URL = f"{SUTRA_BASE_URL}/osl/esutra/MedidaReg.aspx"
-
-
-def clean_text(text: str) -> str:
-    """Limpia texto eliminando espacios extra y saltos de línea."""
-    if not text:
-        return ""
-    # Reemplazar múltiples espacios/saltos con uno solo
-    cleaned = re.sub(r'\s+', ' ', text)
-    return cleaned.strip()
-
-
 def build_measure_id(chamber: str, number: int) -> str:
     """
     Construye ID de medida según convención SUTRA.
@@ -65,73 +47,36 @@ def build_measure_id(chamber: str, number: int) -> str:
         raise ValueError(f"Chamber debe ser 'C' o 'S', recibido: {chamber}")
 
 
-def fetch_bill_from_sutra(measure_id: str) -> Optional[Dict]:
+def fetch_bill_from_sutra(measure_id: str, client: Optional[SutraClient] = None) -> Optional[Dict]:
     """
     Obtiene datos de una medida específica desde SUTRA.
     
     Args:
         measure_id: ID de la medida (ej: "P. de la C. 1001")
+        client: cliente de SUTRA (por defecto, el compartido del proceso)
     
     Returns:
-        Diccionario con datos de la medida, o None si falla
+        Diccionario de ``parse_bill_html`` (number, title, status,
+        commission, sutra_url), o None si la medida no existe o falla
     """
+    client = client or get_sutra_client()
+    url = client.measure_url(normalize_measure_id(measure_id))
     try:
-        # Estrategia: usar parámetros de búsqueda directos
-        # NOTA: La URL exacta puede variar; ajustar según inspección real de SUTRA
-        params = {
-            'NroMedida': measure_id,
-        }
-        
-        logger.debug(f"Fetching {measure_id} from SUTRA...")
-        
-        response = requests.get(
-            SUTRA_MEASURE_URL,
-            params=params,
-            verify=False,  # SUTRA tiene problemas SSL
-            timeout=15,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; LegalWatchPR/1.0)'}
-        )
-        
+        logger.debug(f"Fetching {measure_id} from {url}...")
+        # Pool, reintentos, límite de tasa y caché los aplica el cliente
+        response = client.get(url)
         if response.status_code != 200:
             logger.warning(f"HTTP {response.status_code} para {measure_id}")
             return None
-        
-        # Parsear HTML con BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # NOTA: Los selectores CSS/XPath dependen de la estructura real de SUTRA.
-        # A continuación, selectores genéricos que deben ajustarse según inspección.
-        
-        # Buscar título (común: <span id="lblTitulo"> o similar)
-        title_elem = soup.find('span', id=re.compile(r'.*[Tt]itulo.*'))
-        title = clean_text(title_elem.get_text()) if title_elem else measure_id
-        
-        # Si no encontramos título específico, intentar con header o bold text
-        if not title or title == measure_id:
-            title_elem = soup.find('h2') or soup.find('strong')
-            title = clean_text(title_elem.get_text()) if title_elem else f"Medida {measure_id}"
-        
-        # Buscar autores
-        authors_elem = soup.find('span', id=re.compile(r'.*[Aa]utor.*'))
-        authors = clean_text(authors_elem.get_text()) if authors_elem else ""
-        
-        # Buscar estado/trámite
-        status_elem = soup.find('span', id=re.compile(r'.*[Ee]stado.*|.*[Tt]ramite.*'))
-        status = clean_text(status_elem.get_text()) if status_elem else "Desconocido"
-        
-        # Si encontramos datos válidos, retornar
-        if title and title != measure_id:
-            logger.info(f"✅ Obtenido: {measure_id} - {title[:50]}...")
-            return {
-                'number': measure_id,
-                'title': title,
-                'authors': authors,
-                'status': status,
-            }
-        else:
+
+        bill_data = parse_bill_html(response.content, url)
+        if bill_data is None:
             logger.warning(f"No se encontró información válida para {measure_id}")
             return None
-    
+        bill_data['number'] = bill_data.get('number') or measure_id
+        logger.info(f"✅ Obtenido: {measure_id} - {bill_data['title'][:50]}...")
+        return bill_data
+
     except requests.exceptions.Timeout:
         logger.error(f"Timeout al obtener {measure_id}")
         return None
@@ -140,11 +85,49 @@ def fetch_bill_from_sutra(measure_id: str) -> Optional[Dict]:
         return None
 
 
+def _sync_measures(measure_ids: List[str]) -> int:
+    """
+    Descarga en paralelo (con límite de tasa global) y guarda las medidas.
+
+    Las requests pasan por el cliente compartido de SUTRA (``SUTRA_RATE_LIMIT``
+    req/s, ``SUTRA_MAX_IN_FLIGHT`` simultáneas); las escrituras a la BD
+    ocurren en este hilo, en el orden de ``measure_ids``.
+    """
+    client = get_sutra_client()
+    synced_count = 0
+    total = len(measure_ids)
+    fetch = partial(fetch_bill_from_sutra, client=client)
+
+    for attempted, (measure_id, bill_data, error) in enumerate(client.map(fetch, measure_ids), 1):
+        logger.info(f"[{attempted}/{total}] Procesando {measure_id}...")
+
+        if error is not None or not bill_data:
+            logger.info(f"  ⏭️ Saltando {measure_id} (no encontrado o inválido)")
+            continue
+
+        # Guardar en base de datos (solo si el contenido cambió)
+        try:
+            change = apply_scraped_bill(bill_data['number'], bill_data)
+            if change.unchanged:
+                logger.info(f"  💤 {measure_id} sin cambios")
+            else:
+                action = "creado" if change.created else f"actualizado ({', '.join(sorted(change.changed))})"
+                logger.info(f"  ✅ {measure_id} {action}")
+                notify_bill_change(change)
+            synced_count += 1
+
+        except Exception as e:
+            logger.error(f"  ❌ Error guardando {measure_id}: {e}")
+
+    return synced_count
+
+
 def sync_sutra_bills(limit: int = 20, chamber: str = 'C', start_number: int = 1000) -> int:
     """
     Sincroniza medidas desde SUTRA a la base de datos.
     
-    Estrategia: Intenta obtener medidas consecutivas desde start_number.
+    Estrategia: Intenta obtener medidas consecutivas desde start_number,
+    en paralelo y respetando el límite de tasa de SUTRA.
     
     Args:
         limit: Número máximo de medidas a intentar obtener
@@ -158,49 +141,11 @@ def sync_sutra_bills(limit: int = 20, chamber: str = 'C', start_number: int = 10
     logger.info(f"Cámara: {'Cámara' if chamber == 'C' else 'Senado'}")
     logger.info(f"Rango: {start_number} - {start_number + limit - 1}")
     
-    synced_count = 0
-    attempted = 0
-    
-    for offset in range(limit):
-        number = start_number + offset
-        measure_id = build_measure_id(chamber, number)
-        
-        attempted += 1
-        logger.info(f"[{attempted}/{limit}] Procesando {measure_id}...")
-        
-        # Obtener datos de SUTRA
-        bill_data = fetch_bill_from_sutra(measure_id)
-        
-        if not bill_data:
-            logger.info(f"  ⏭️ Saltando {measure_id} (no encontrado o inválido)")
-            # Pequeña pausa para no saturar el servidor
-            time.sleep(0.5)
-            continue
-        
-        # Guardar en base de datos
-        try:
-            bill, created = Bill.objects.update_or_create(
-                number=bill_data['number'],
-                defaults={
-                    'title': bill_data['title'],
-                    # Campos opcionales que se pueden expandir:
-                    # 'authors': bill_data.get('authors', ''),
-                    # 'status': bill_data.get('status', ''),
-                }
-            )
-            
-            action = "creado" if created else "actualizado"
-            logger.info(f"  ✅ {measure_id} {action}")
-            synced_count += 1
-        
-        except Exception as e:
-            logger.error(f"  ❌ Error guardando {measure_id}: {e}")
-        
-        # Pausa entre requests para ser amable con el servidor
-        time.sleep(1)
+    measure_ids = [build_measure_id(chamber, start_number + offset) for offset in range(limit)]
+    synced_count = _sync_measures(measure_ids)
     
     logger.info(f"\n--- FIN SINCRONIZACIÓN ---")
-    logger.info(f"Total sincronizadas: {synced_count}/{attempted}")
+    logger.info(f"Total sincronizadas: {synced_count}/{len(measure_ids)}")
     
     return synced_count
 
@@ -217,33 +162,43 @@ def sync_specific_bills(bill_ids: List[str]) -> int:
     """
     logger.info(f"\n--- 📋 SINCRONIZACIÓN ESPECÍFICA DE {len(bill_ids)} MEDIDAS ---")
     
-    synced_count = 0
-    
-    for measure_id in bill_ids:
-        logger.info(f"Procesando {measure_id}...")
-        
-        bill_data = fetch_bill_from_sutra(measure_id)
-        
-        if not bill_data:
-            logger.warning(f"  ⏭️ No se pudo obtener {measure_id}")
-            continue
-        
-        try:
-            bill, created = Bill.objects.update_or_create(
-                number=bill_data['number'],
-                defaults={'title': bill_data['title']}
-            )
-            
-            action = "creado" if created else "actualizado"
-            logger.info(f"  ✅ {measure_id} {action}")
-            synced_count += 1
-        
-        except Exception as e:
-            logger.error(f"  ❌ Error guardando {measure_id}: {e}")
-        
-        time.sleep(1)
+    synced_count = _sync_measures(list(bill_ids))
     
     logger.info(f"\n--- FIN SINCRONIZACIÓN ESPECÍFICA ---")
     logger.info(f"Total: {synced_count}/{len(bill_ids)}")
     
     return synced_count
+
+
+def sync_new_bills(chamber: str = 'C', limit: int = 20) -> int:
+    """
+    Sincroniza solo lo nuevo: descubre la frontera de ``chamber`` (ver
+    ``core.utils.sutra_frontier``), sincroniza los números más allá de la
+    frontera anterior (a lo sumo ``limit``) y las medidas monitoreadas.
+    
+    Returns:
+        Número de medidas sincronizadas
+    """
+    from core.models import MonitoredMeasure
+    from core.utils.sutra_frontier import SutraUnavailable, discover_new_numbers, measure_exists
+
+    client = get_sutra_client()
+
+    def exists(number):
+        return measure_exists(client, build_measure_id(chamber, number))
+
+    try:
+        new_numbers = discover_new_numbers(chamber, exists, max_new=limit)
+    except SutraUnavailable as e:
+        # Una caída no es un 404: la frontera no cambia; se sincronizan solo las monitoreadas
+        logger.error(f"SUTRA no responde, búsqueda de medidas nuevas cancelada: {e}")
+        new_numbers = range(0)
+
+    measure_ids = [build_measure_id(chamber, number) for number in new_numbers]
+    monitored = MonitoredMeasure.objects.filter(is_active=True).values_list('sutra_id', flat=True)
+    measure_ids += [m for m in monitored if m not in measure_ids]
+
+    logger.info(f"\n--- 📋 SINCRONIZACIÓN INCREMENTAL: {len(new_numbers)} nuevas + monitoreadas ---")
+    synced_count = _sync_measures(measure_ids)
+    logger.info(f"Total: {synced_count}/{len(measure_ids)}")
+    return synced_count
@@ -0,0 +1,109 @@
+"""
+Limitación de Tasa para Clientes HTTP Salientes
+===============================================
+
+Token bucket thread-safe compartido por los workers que consultan un mismo
+servidor (p. ej. SUTRA). En vez de dormir un tiempo fijo después de cada
+request, cada worker espera solo lo necesario para no pasar de ``rate``
+requests por segundo, así que la latencia de red se solapa con la espera.
+
+Uso:
+    from core.utils.throttle import run_throttled
+
+    for measure_id, data, error in run_throttled(scraper.scrape_bill, ids, rate=2, max_in_flight=4):
+        ...
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class TokenBucket:
+    """
+    Token bucket: ``rate`` tokens por segundo, hasta ``capacity`` acumulados.
+
+    ``capacity`` controla la ráfaga permitida tras un periodo inactivo; con
+    ``capacity=1`` las requests quedan espaciadas uniformemente.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate debe ser > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Intenta tomar ``tokens``. Retorna 0 si los tomó, o los segundos a
+        esperar antes de que haya suficientes (sin tomarlos).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta tomar ``tokens``; False si vence ``timeout`` antes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+def run_throttled(func: Callable[[T], R], items: Iterable[T], rate: Optional[float],
+                  max_in_flight: int, bucket: Optional[TokenBucket] = None
+                  ) -> Iterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """
+    Aplica ``func`` a cada item en paralelo, con a lo sumo ``max_in_flight``
+    llamadas simultáneas y ``rate`` inicios por segundo en total (``rate=None``
+    cuando ``func`` ya se limita sola, p. ej. ``SutraClient.get``).
+
+    Los resultados se entregan en el orden de ``items`` como
+    ``(item, resultado, excepción)``; el consumidor (p. ej. las escrituras a
+    la BD) corre en el hilo que itera.
+    """
+    items = list(items)
+    if not items:
+        return
+    if bucket is None and rate is not None:
+        bucket = TokenBucket(rate, capacity=1)
+
+    def call(item):
+        if bucket is not None:
+            bucket.acquire()
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(items))),
+                            thread_name_prefix='throttled') as pool:
+        futures = [(item, pool.submit(call, item)) for item in items]
+        try:
+            for item, future in futures:
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+        finally:
+            # Si el consumidor corta antes, no lanzar lo que falta
+            for _, future in futures:
+                future.cancel()
@@ -0,0 +1,119 @@
+"""
+Diffs Precalculados entre Versiones de Medidas
+==============================================
+
+Cada par (versión vieja, versión nueva) de una medida se compara una sola
+vez, cuando llega la versión nueva, y se guarda en ``BillVersionDiff``:
+
+- Compacto: solo las unidades con cambios, como opcodes de palabras sobre
+  los textos originales (sin HTML ni copias del texto)
+- Vigente: ``source_hash`` cubre ambos textos y ``ENGINE_VERSION``; si un
+  texto cambia (re-extracción) el diff se recalcula al pedirlo
+- Render perezoso: el comparador recibe las secciones por páginas
+  (``hunks_page``) a medida que se desplaza, y cada sección se convierte a
+  HTML solo cuando se pide. Una página trae de la BD solo los tramos de
+  texto de sus secciones (``SUBSTR`` con los rangos guardados), no los dos
+  documentos completos
+
+Uso:
+    from core.utils.version_diffs import get_version_diff, hunks_page
+
+    stored = get_version_diff(v1, v2)
+    page = hunks_page(stored, offset=0, limit=20)
+"""
+
+import hashlib
+import logging
+from dataclasses import replace
+from typing import Dict, Optional, Tuple
+
+from core.utils.legal_diff import (ENGINE_VERSION, UnitDiff, diff_legal_texts,
+                                   render_unit_html)
+
+logger = logging.getLogger(__name__)
+
+
+def source_hash(old_text: str, new_text: str) -> str:
+    digest = hashlib.sha256(f"engine:{ENGINE_VERSION}\n".encode())
+    for text in (old_text or '', new_text or ''):
+        data = text.encode('utf-8')
+        digest.update(f"{len(data)}:".encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def get_version_diff(old_version, new_version):
+    """``BillVersionDiff`` del par; se calcula y guarda si falta o quedó viejo."""
+    from core.models import BillVersionDiff
+
+    expected = source_hash(old_version.full_text, new_version.full_text)
+    stored = BillVersionDiff.objects.filter(old_version=old_version, new_version=new_version).first()
+    if stored is not None and stored.source_hash == expected:
+        return stored
+
+    diff = diff_legal_texts(old_version.full_text or '', new_version.full_text or '')
+    stored, _ = BillVersionDiff.objects.update_or_create(
+        old_version=old_version, new_version=new_version,
+        defaults={'source_hash': expected, 'stats': diff.stats,
+                  'units': [unit.to_row() for unit in diff.changed_units()]},
+    )
+    return stored
+
+
+def precompute_version_diffs(version) -> int:
+    """
+    Calcula los diffs de ``version`` contra las demás versiones de su medida
+    (la más antigua del par como 'vieja'). Retorna cuántos pares quedaron listos.
+    """
+    if not version.full_text:
+        return 0
+    others = version.bill.versions.exclude(pk=version.pk).exclude(full_text__isnull=True).exclude(full_text='')
+    done = 0
+    for other in others:
+        older, newer = (other, version) if (other.created_at, other.pk) < (version.created_at, version.pk) else (version, other)
+        try:
+            get_version_diff(older, newer)
+            done += 1
+        except Exception as e:
+            logger.error(f"Diff Error ({older.pk} → {newer.pk}): {e}", exc_info=True)
+    return done
+
+
+def version_slices(version_id: int, spans: Dict[int, Tuple[int, int]]) -> Dict[int, str]:
+    """
+    Tramos ``{i: (inicio, fin)}`` del ``full_text`` de una versión, cortados
+    en la BD en una sola consulta (el texto completo no sale de la BD).
+    """
+    from django.db.models.functions import Substr
+
+    from core.models import BillVersion
+
+    if not spans:
+        return {}
+    row = BillVersion.objects.filter(pk=version_id).values(**{
+        f'slice_{i}': Substr('full_text', start + 1, end - start) for i, (start, end) in spans.items()
+    }).first() or {}
+    return {i: row.get(f'slice_{i}') or '' for i in spans}
+
+
+def hunks_page(stored, offset: int = 0, limit: int = 20) -> Dict:
+    """
+    Página de secciones con cambios: ``{'hunks': [{index, label, tag, html}],
+    'total', 'next_offset'}`` (``next_offset`` None en la última página).
+    Por página se leen solo los tramos de texto de sus secciones.
+    """
+    total = len(stored.units)
+    offset = max(0, offset)
+    end = min(total, offset + max(1, limit))
+    units = {index: UnitDiff.from_row(stored.units[index]) for index in range(offset, end)}
+    old_slices = version_slices(stored.old_version_id, {i: u.old_span for i, u in units.items() if u.old_span})
+    new_slices = version_slices(stored.new_version_id, {i: u.new_span for i, u in units.items() if u.new_span})
+    hunks = []
+    for index, unit in units.items():
+        old_text, new_text = old_slices.get(index, ''), new_slices.get(index, '')
+        # Rangos relativos al tramo leído
+        local = replace(unit, old_span=(0, len(old_text)) if unit.old_span else None,
+                        new_span=(0, len(new_text)) if unit.new_span else None)
+        hunks.append({'index': index, 'label': unit.label, 'tag': unit.tag,
+                      'html': render_unit_html(local, old_text, new_text)})
+    return {'hunks': hunks, 'total': total, 'next_offset': end if end < total else None}
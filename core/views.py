@@ -1,14 +1,17 @@
 import datetime
 import json
 import logging
+import os
 import re
 import icalendar
 
+from django.conf import settings
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -16,23 +19,25 @@ from rest_framework.views import APIView
 
 # Stubs de servicios (se implementarán en P1)
 try:
-    from services import (get_search_stats, search_documents, search_keyword_only,
-                          search_semantic_only)
+    from services import SearchOverloaded, get_search_stats, search_with_admission
 except ImportError:
     # Fallback para pasar el check si services no está listo aún
+    class SearchOverloaded(RuntimeError):
+        retry_after = 1
     def get_search_stats(): return {}
-    def search_documents(*args, **kwargs): return []
-    def search_keyword_only(*args, **kwargs): return []
-    def search_semantic_only(*args, **kwargs): return []
+    def search_with_admission(query, limit=20, method='hybrid', collapse_duplicates=False): return [], method
 
-from .models import (Article, Bill, BillVersion, Event, Keyword,
-                      MonitoredCommission, MonitoredMeasure, NewsPreset,
-                      NewsSource)
+from .models import (Article, Bill, BillVersion, BillVersionDiff, Event,
+                      Keyword, MonitoredCommission, MonitoredMeasure,
+                      NewsPreset, NewsSource)
 from .serializers import ArticleSearchResultSerializer, SearchStatsSerializer
 
 # CORRECCIÓN AQUÍ: Importar desde .helpers en lugar de .utils
 from .helpers import (analyze_legal_diff, check_sutra_status, fetch_latest_news,
-                      generate_ai_summary, generate_diff_html, normalize_text)
+                      generate_diff_html, normalize_text)
+from .utils.summary_jobs import ACTIVE_STATES as ACTIVE_SUMMARY_STATES
+from .utils.summary_jobs import enqueue_summary, summary_state
+from .utils.version_diffs import get_version_diff, hunks_page
 
 logger = logging.getLogger(__name__)
 
@@ -186,19 +191,107 @@ def sync_noticias(request):
 
 @login_required
 def resumir_noticia(request, article_id):
-    """Genera resumen AI y recarga."""
-    generate_ai_summary(article_id)
+    """Encola el resumen AI y recarga (se genera en segundo plano)."""
+    enqueue_summary(article_id)
     return redirect('noticias')
 
+def _summary_response(article_id, state, cached=False):
+    if state is None:
+        return JsonResponse({'success': False, 'error': 'Artículo no encontrado'}, status=404)
+    pending = state['status'] in ACTIVE_SUMMARY_STATES
+    return JsonResponse({
+        'success': state['status'] != 'failed',
+        'status': state['status'],
+        'summary': state['summary'],
+        'error': state['error'],
+        'cached': cached,
+        'status_url': reverse('api_resumen_estado', args=[article_id]),
+    }, status=202 if pending else 200)
+
 @login_required
 def api_resumir_noticia(request, article_id):
-    """API para resumir artículo (AJAX)."""
-    success = generate_ai_summary(article_id)
-    return JsonResponse({'success': success})
+    """API para resumir artículo (AJAX): encola el trabajo y responde 202 mientras se genera."""
+    before = summary_state(article_id)
+    if before is not None and before['status'] == 'done':
+        return _summary_response(article_id, before, cached=True)
+    return _summary_response(article_id, enqueue_summary(article_id))
+
+@login_required
+def api_resumen_estado(request, article_id):
+    """Estado del trabajo de resumen (para polling)."""
+    return _summary_response(article_id, summary_state(article_id))
+
+# Secciones del diff por página (la primera va en el HTML; las demás se piden al desplazarse)
+DIFF_PAGE_SIZE = 20
+DIFF_MAX_PAGE_SIZE = 100
+
+# Formatos aceptados para versiones de medidas: extensión → firma del archivo
+VERSION_UPLOAD_SIGNATURES = {'.pdf': b'%PDF-', '.docx': b'PK\x03\x04'}
+
+
+def validate_version_upload(upload):
+    """Mensaje de error si el archivo no es un PDF/DOCX válido o excede ``BILL_UPLOAD_MAX_SIZE``; None si es aceptable."""
+    extension = os.path.splitext(upload.name or '')[1].lower()
+    signature = VERSION_UPLOAD_SIGNATURES.get(extension)
+    if signature is None:
+        return 'Formato no soportado: sube un archivo .pdf o .docx'
+    max_size = getattr(settings, 'BILL_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+    if upload.size > max_size:
+        return f'El archivo excede el máximo de {max_size // (1024 * 1024)} MB'
+    upload.seek(0)
+    header = upload.read(len(signature))
+    upload.seek(0)
+    if header != signature:
+        return f'El archivo no es un {extension[1:].upper()} válido'
+    return None
+
 
+@login_required
 def comparador(request, bill_id=None):
-    """Página comparador."""
-    return render(request, 'core/comparador.html', {'bill_id': bill_id})
+    """Página comparador: subir versiones y ver el diff precalculado de un par, paginado por secciones."""
+    if bill_id is None:
+        return render(request, 'core/comparador.html', {'bill_id': bill_id})
+
+    bill = get_object_or_404(Bill, pk=bill_id)
+    upload_error = None
+    if request.method == 'POST' and request.FILES.get('pdf_file'):
+        upload = request.FILES['pdf_file']
+        upload_error = validate_version_upload(upload)
+        if upload_error is None:
+            BillVersion.objects.create(bill=bill, version_name=request.POST.get('version_name', '')[:100],
+                                       pdf_file=upload)
+            return redirect('comparador', bill_id=bill.id)
+
+    # El texto completo solo se lee para las dos versiones que se comparan
+    versions = list(bill.versions.defer('full_text', 'page_offsets').order_by('created_at', 'id'))
+    v1 = request.GET.get('v1', '')
+    v2 = request.GET.get('v2', '')
+    v1 = int(v1) if v1.isdigit() else None
+    v2 = int(v2) if v2.isdigit() else None
+    context = {'bill': bill, 'bill_id': bill.id, 'versions': versions, 'upload_error': upload_error,
+               'v1_selected': v1, 'v2_selected': v2, 'diff_page': None, 'ai_analysis': None}
+
+    by_id = {v.id: v for v in versions}
+    if v1 in by_id and v2 in by_id and v1 != v2:
+        if any(by_id[v].extraction_status in ('pending', 'running') for v in (v1, v2)):
+            # El texto aún se está extrayendo en segundo plano
+            context['extraction_pending'] = True
+            return render(request, 'core/comparador.html', context, status=400 if upload_error else 200)
+        stored = get_version_diff(by_id[v1], by_id[v2])
+        context.update({'diff_page': hunks_page(stored, 0, DIFF_PAGE_SIZE), 'diff_stats': stored.stats,
+                        'hunks_url': reverse('api_diff_hunks', args=[stored.id])})
+    return render(request, 'core/comparador.html', context, status=400 if upload_error else 200)
+
+@login_required
+def api_diff_hunks(request, diff_id):
+    """Secciones con cambios de un diff guardado, por páginas (``offset``, ``limit``) para scroll infinito."""
+    stored = get_object_or_404(BillVersionDiff, pk=diff_id)
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+        limit = min(max(1, int(request.GET.get('limit', DIFF_PAGE_SIZE))), DIFF_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'offset y limit deben ser enteros'}, status=400)
+    return JsonResponse(hunks_page(stored, offset, limit))
 
 # Simple endpoints para APIs administrativas
 def api_add_source(request):
@@ -236,7 +329,15 @@ class DocumentSearchView(APIView):
         - q (str, requerido): Texto de búsqueda
         - limit (int, opcional): Número máximo de resultados (default=20)
         - method (str, opcional): Método de búsqueda ['hybrid'|'semantic'|'keyword'] (default='hybrid')
+        - collapse (bool, opcional): Agrupar notas casi duplicadas (solo 'hybrid', default=false)
+
+    La respuesta incluye ``mode``: el método que efectivamente la sirvió. Con
+    el modelo saturado, 'hybrid' y 'semantic' se degradan a
+    ``'keyword_fallback'`` (``degraded=true``); con la BD saturada se
+    responde 503 con Retry-After (ver ``services.search_admission``).
     """
+    SEARCH_METHODS = ('hybrid', 'semantic', 'keyword')
+
     def get(self, request, *args, **kwargs):
         query = request.query_params.get('q', '').strip()
         if not query:
@@ -247,30 +348,37 @@ class DocumentSearchView(APIView):
         
         limit = int(request.query_params.get('limit', 20))
         search_method = request.query_params.get('method', 'hybrid').lower()
+        collapse = request.query_params.get('collapse', '').lower() in ('1', 'true', 'yes')
+        if search_method not in self.SEARCH_METHODS:
+            return Response(
+                {'error': f'Invalid method "{search_method}". Use: hybrid, semantic, or keyword'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         try:
-            # Enrutar a la función correcta según el método
-            if search_method == 'semantic':
-                results = search_semantic_only(query, limit=limit)
-            elif search_method == 'keyword':
-                results = search_keyword_only(query, limit=limit)
-            elif search_method == 'hybrid':
-                results = search_documents(query, limit=limit)
-            else:
-                return Response(
-                    {'error': f'Invalid method "{search_method}". Use: hybrid, semantic, or keyword'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            results, mode = search_with_admission(query, limit=limit, method=search_method,
+                                                  collapse_duplicates=collapse)
             
             # Serializar resultados
             serializer = ArticleSearchResultSerializer(results, many=True)
-            return Response({
+            response = Response({
                 'query': query,
                 'method': search_method,
+                'mode': mode,
+                'degraded': mode != search_method,
                 'count': len(results),
                 'results': serializer.data
             })
+            response['X-Search-Mode'] = mode
+            return response
         
+        except SearchOverloaded as e:
+            response = Response(
+                {'error': 'Search temporarily overloaded', 'retry_after': e.retry_after},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = str(e.retry_after)
+            return response
         except Exception as e:
             logger.error(f"Error en búsqueda: {e}", exc_info=True)
             return Response(
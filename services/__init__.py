@@ -19,6 +19,12 @@ _NAME_TO_MODULE = {
     'SearchMetrics': 'metrics',
     'evaluate_search_quality': 'metrics',
     'format_evaluation_report': 'metrics',
+    'NearDuplicateIndex': 'near_duplicates',
+    'get_near_duplicate_index': 'near_duplicates',
+    'simhash': 'near_duplicates',
+    'SearchOverloaded': 'search_admission',
+    'get_search_admission': 'search_admission',
+    'search_with_admission': 'search_admission',
 }
 
 __all__ = list(_NAME_TO_MODULE.keys())
@@ -18,7 +18,7 @@ Referencias:
 """
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from django.db import connection
 
@@ -35,7 +35,9 @@ def search_documents(
     query: str,
     limit: int = 20,
     k: int = RRF_K,
-    top_k_candidates: int = 100
+    top_k_candidates: int = 100,
+    collapse_duplicates: bool = False,
+    query_embedding: Optional[List[float]] = None
 ) -> List[Dict[str, Any]]:
     """
     Búsqueda híbrida de documentos usando RRF (Reciprocal Rank Fusion).
@@ -48,6 +50,10 @@ def search_documents(
         limit: Número máximo de resultados a retornar (default: 20)
         k: Constante RRF para suavizar rankings (default: 60)
         top_k_candidates: Número de candidatos a considerar de cada método (default: 100)
+        collapse_duplicates: Si True, agrupa notas casi duplicadas (misma nota
+            sindicada en varios medios) y retorna solo la mejor de cada cluster
+        query_embedding: Embedding ya calculado de la query (p. ej. por
+            ``services.search_admission``); si es None se genera aquí
         
     Returns:
         Lista de diccionarios con información de artículos ordenados por relevancia:
@@ -60,7 +66,9 @@ def search_documents(
                 'published_date': datetime,
                 'rrf_score': float,
                 'semantic_rank': int or None,
-                'keyword_rank': int or None
+                'keyword_rank': int or None,
+                'cluster_id': int,
+                'duplicates': int  # solo con collapse_duplicates
             },
             ...
         ]
@@ -88,8 +96,8 @@ def search_documents(
     
     try:
         # Generar embedding para la query
-        generator = EmbeddingGenerator()
-        query_embedding = generator.encode(query)
+        if query_embedding is None:
+            query_embedding = EmbeddingGenerator().encode(query)
         
         # Construir la consulta SQL con CTEs
         sql = """
@@ -141,7 +149,8 @@ def search_documents(
             a.link,
             a.published_at,
             ns.name AS source,
-            a.ai_summary
+            a.ai_summary,
+            COALESCE(a.duplicate_of_id, a.id) AS cluster_id
             
         FROM semantic
         FULL OUTER JOIN keyword ON semantic.id = keyword.id
@@ -166,7 +175,8 @@ def search_documents(
             top_k_candidates,  # keyword CTE: LIMIT
             k,                 # RRF constant (semantic)
             k,                 # RRF constant (keyword)
-            limit              # Final LIMIT
+            # Final LIMIT (con holgura si luego se colapsan duplicados)
+            limit * 3 if collapse_duplicates else limit
         ]
         
         # Ejecutar consulta
@@ -185,6 +195,9 @@ def search_documents(
             if 'published_at' in result:
                 result['published_date'] = result['published_at']  # published_at -> published_date
             results.append(result)
+
+        if collapse_duplicates:
+            results = collapse_near_duplicates(results)[:limit]
         
         logger.info(f"✅ Búsqueda completada: {len(results)} resultados encontrados")
         
@@ -204,9 +217,27 @@ def search_documents(
         raise RuntimeError(f"Error durante la búsqueda: {e}") from e
 
 
+def collapse_near_duplicates(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Conserva el primer resultado (mejor rankeado) de cada cluster de casi-duplicados.
+
+    Agrega ``duplicates`` con el número de resultados colapsados en cada uno.
+    """
+    kept: Dict[Any, Dict[str, Any]] = {}
+    for result in results:
+        cluster_id = result.get('cluster_id', result.get('id'))
+        if cluster_id in kept:
+            kept[cluster_id]['duplicates'] += 1
+        else:
+            result['duplicates'] = 0
+            kept[cluster_id] = result
+    return list(kept.values())
+
+
 def search_semantic_only(
     query: str,
-    limit: int = 20
+    limit: int = 20,
+    query_embedding: Optional[List[float]] = None
 ) -> List[Dict[str, Any]]:
     """
     Búsqueda semántica pura (solo embeddings, sin full-text).
@@ -216,6 +247,7 @@ def search_semantic_only(
     Args:
         query: Texto de búsqueda
         limit: Número de resultados
+        query_embedding: Embedding ya calculado de la query (opcional)
         
     Returns:
         Lista de artículos ordenados por similitud semántica
@@ -231,8 +263,8 @@ def search_semantic_only(
     
     try:
         # Generar embedding
-        generator = EmbeddingGenerator()
-        query_embedding = generator.encode(query)
+        if query_embedding is None:
+            query_embedding = EmbeddingGenerator().encode(query)
         
         # Consulta semántica simple
         sql = """
@@ -323,6 +355,10 @@ def search_keyword_only(
             rows = cursor.fetchall()
         
         results = [dict(zip(columns, row)) for row in rows]
+        for result in results:
+            # Mismos nombres que la búsqueda híbrida (también sirve de respaldo de ella)
+            result['url'] = result['link']
+            result['published_date'] = result['published_at']
         
         logger.info(f"✅ Búsqueda léxica: {len(results)} resultados")
         
@@ -0,0 +1,329 @@
+"""
+Detección de Noticias Casi Duplicadas (SimHash + LSH)
+=====================================================
+
+Los medios de Puerto Rico sindican las mismas notas de agencia bajo URLs
+distintas, así que la unicidad de ``link`` no basta. Este módulo calcula
+una huella SimHash de 64 bits sobre shingles de palabras (título + snippet)
+y la busca en un índice LSH por bandas para agrupar duplicados.
+
+Características:
+- SimHash vectorizado con numpy (decenas de µs por artículo)
+- Índice LSH de 4 bandas × 16 bits: por el principio del palomar, dos
+  huellas a distancia de Hamming ≤ 3 comparten al menos una banda exacta
+- Base en arrays numpy ordenados (compacta para ~1M artículos) más un
+  delta en diccionarios para lo insertado desde la última compactación
+- Persistencia en ``Article.simhash`` / ``Article.duplicate_of``; el índice
+  en memoria se reconstruye desde la BD la primera vez que se usa y, antes
+  de cada ingesta, incorpora las filas que insertaron otros procesos
+  (scheduler, ``servicio_continuo``, ``run_news_bot``)
+
+Uso:
+    from services.near_duplicates import get_near_duplicate_index, simhash
+
+    index = get_near_duplicate_index(refresh=True)   # + filas de otros procesos
+    fingerprint = simhash(f"{title} {snippet}")
+    match = index.find(fingerprint)   # (article_id, cluster_id, distancia) o None
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.utils.keyword_matcher import fold_text
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+MAX_DISTANCE = 3
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+# Tamaño del delta a partir del cual se fusiona con los arrays base
+COMPACT_THRESHOLD = 50_000
+# Ids por debajo del último cargado que se vuelven a leer al refrescar: cubre
+# filas de transacciones que confirmaron tarde y ``duplicate_of`` escritos después
+REFRESH_OVERLAP = 1_000
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'\w+')
+
+
+def to_signed(fingerprint: int) -> int:
+    """Convierte una huella sin signo de 64 bits al rango de ``BigIntegerField``."""
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Shingles de ``size`` palabras sobre el texto normalizado (sin HTML ni tildes)."""
+    words = _WORD_RE.findall(fold_text(_TAG_RE.sub(' ', text or '')))
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Huella SimHash de 64 bits (sin signo) del texto, o None si no hay palabras.
+    """
+    grams = shingles(text)
+    if not grams:
+        return None
+    digests = b''.join(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest() for g in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(grams), 64)
+    # Voto por bit: +1 si el bit está encendido, -1 si no
+    votes = bits.sum(axis=0, dtype=np.int32) * 2 - len(grams)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (BAND_BITS * b)) & BAND_MASK for b in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH de huellas SimHash.
+
+    Cada artículo pertenece a un cluster identificado por el id de su primer
+    artículo (el "canónico"); ``find`` retorna el cluster del vecino más
+    cercano dentro de ``MAX_DISTANCE``.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance debe ser < {BANDS} para garantizar recall con {BANDS} bandas")
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._reset_base()
+        self._delta_bands: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._delta: Dict[int, Tuple[int, int]] = {}  # article_id -> (huella, cluster)
+        # Mayor article_id leído de la BD (punto de partida del próximo ``extend``)
+        self.loaded_through = 0
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._delta)
+
+    def __contains__(self, article_id: int) -> bool:
+        with self._lock:
+            return self._base_position(article_id) is not None or article_id in self._delta
+
+    def _base_position(self, article_id: int) -> Optional[int]:
+        pos = int(np.searchsorted(self._ids, article_id))
+        return pos if pos < len(self._ids) and self._ids[pos] == article_id else None
+
+    def _reset_base(self) -> None:
+        self._ids = np.empty(0, dtype=np.int64)
+        self._fps = np.empty(0, dtype=np.uint64)
+        self._clusters = np.empty(0, dtype=np.int64)
+        self._band_values: List[np.ndarray] = [np.empty(0, dtype=np.uint16) for _ in range(BANDS)]
+        self._band_order: List[np.ndarray] = [np.empty(0, dtype=np.int64) for _ in range(BANDS)]
+
+    def load(self, rows: Iterable[Tuple[int, int, int]]) -> None:
+        """Carga ``(article_id, huella sin signo, cluster_id)`` como base del índice."""
+        ids, fps, clusters = [], [], []
+        for article_id, fingerprint, cluster_id in rows:
+            ids.append(article_id)
+            fps.append(fingerprint)
+            clusters.append(cluster_id)
+        with self._lock:
+            self._build_base(
+                np.array(ids, dtype=np.int64),
+                np.array(fps, dtype=np.uint64),
+                np.array(clusters, dtype=np.int64),
+            )
+            self._delta_bands = [{} for _ in range(BANDS)]
+            self._delta = {}
+            self.loaded_through = max(ids, default=0)
+
+    def extend(self, rows: Iterable[Tuple[int, int, int]]) -> int:
+        """
+        Incorpora ``(article_id, huella sin signo, cluster_id)`` leídos de la BD
+        después de ``load``: agrega los que faltan y corrige el cluster de los
+        que ya estaban. Retorna cuántos agregó.
+        """
+        added = 0
+        with self._lock:
+            for article_id, fingerprint, cluster_id in rows:
+                self.loaded_through = max(self.loaded_through, article_id)
+                pos = self._base_position(article_id)
+                if pos is not None:
+                    self._clusters[pos] = cluster_id
+                elif article_id in self._delta:
+                    self._delta[article_id] = (self._delta[article_id][0], cluster_id)
+                else:
+                    self._add(article_id, fingerprint, cluster_id)
+                    added += 1
+        return added
+
+    def _build_base(self, ids, fps, clusters) -> None:
+        # Ordenada por id para ubicar un artículo con búsqueda binaria
+        order = np.argsort(ids, kind='stable')
+        self._ids, self._fps, self._clusters = ids[order], fps[order], clusters[order]
+        fps = self._fps
+        self._band_values, self._band_order = [], []
+        for b in range(BANDS):
+            values = ((fps >> np.uint64(BAND_BITS * b)) & np.uint64(BAND_MASK)).astype(np.uint16)
+            order = np.argsort(values, kind='stable')
+            self._band_values.append(values[order])
+            self._band_order.append(order)
+
+    def _compact(self) -> None:
+        """Fusiona el delta con la base (O(n log n), ocurre cada ``COMPACT_THRESHOLD`` altas)."""
+        ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+        fps = np.fromiter((fp for fp, _ in self._delta.values()), dtype=np.uint64, count=len(self._delta))
+        clusters = np.fromiter((c for _, c in self._delta.values()), dtype=np.int64, count=len(self._delta))
+        self._build_base(
+            np.concatenate([self._ids, ids]),
+            np.concatenate([self._fps, fps]),
+            np.concatenate([self._clusters, clusters]),
+        )
+        self._delta_bands = [{} for _ in range(BANDS)]
+        self._delta = {}
+
+    def add(self, article_id: int, fingerprint: int, cluster_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._add(article_id, fingerprint, cluster_id or article_id)
+
+    def _add(self, article_id: int, fingerprint: int, cluster_id: int) -> None:
+        self._delta[article_id] = (fingerprint, cluster_id)
+        for b, value in enumerate(_bands(fingerprint)):
+            self._delta_bands[b].setdefault(value, []).append(article_id)
+        if len(self._delta) >= COMPACT_THRESHOLD:
+            self._compact()
+
+    def find(self, fingerprint: int, exclude: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        """
+        Busca el artículo más cercano dentro de ``max_distance``.
+
+        ``exclude`` ignora un article_id (p. ej. el propio artículo si ya
+        estaba en la BD cuando se cargó el índice).
+
+        Returns:
+            ``(article_id, cluster_id, distancia)`` o None si no hay duplicado.
+        """
+        best = None
+        with self._lock:
+            # Candidatos de la base: una búsqueda binaria por banda, distancias vectorizadas
+            candidates = []
+            for b, value in enumerate(_bands(fingerprint)):
+                values = self._band_values[b]
+                # Mismo dtype que el array para que searchsorted no lo convierta (O(n))
+                key = np.uint16(value)
+                lo = np.searchsorted(values, key, side='left')
+                hi = np.searchsorted(values, key, side='right')
+                if hi > lo:
+                    candidates.append(self._band_order[b][lo:hi])
+            if candidates:
+                positions = np.unique(np.concatenate(candidates))
+                xor = self._fps[positions] ^ np.uint64(fingerprint)
+                distances = np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+                if exclude is not None:
+                    distances[self._ids[positions] == exclude] = 64
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.max_distance:
+                    pos = positions[nearest]
+                    best = (int(self._ids[pos]), int(self._clusters[pos]), int(distances[nearest]))
+
+            # Candidatos del delta (insertados desde la última compactación)
+            for b, value in enumerate(_bands(fingerprint)):
+                for article_id in self._delta_bands[b].get(value, ()):
+                    if article_id == exclude:
+                        continue
+                    fp, cluster_id = self._delta[article_id]
+                    distance = hamming(fp, fingerprint)
+                    if distance <= self.max_distance and (best is None or distance < best[2]):
+                        best = (article_id, cluster_id, distance)
+        return best
+
+
+# --- Índice global (por proceso), cargado desde la BD ---
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def _fingerprint_rows(queryset) -> Iterable[Tuple[int, int, int]]:
+    """``(article_id, huella sin signo, cluster_id)`` de los artículos con huella."""
+    rows = (
+        queryset.filter(simhash__isnull=False)
+        .values_list('id', 'simhash', 'duplicate_of_id')
+        .iterator(chunk_size=10_000)
+    )
+    return ((pk, to_unsigned(fp), dup or pk) for pk, fp, dup in rows)
+
+
+def get_near_duplicate_index(refresh: bool = False) -> NearDuplicateIndex:
+    """
+    Retorna el índice del proceso, cargándolo desde ``Article.simhash`` la
+    primera vez.
+
+    Con ``refresh=True`` incorpora además las filas insertadas desde la
+    última lectura (por este u otros procesos), releyendo las últimas
+    ``REFRESH_OVERLAP`` por si confirmaron tarde o cambió su cluster.
+    """
+    global _index
+    if _index is not None and not refresh:
+        return _index
+    from core.models import Article
+
+    with _index_lock:
+        if _index is None:
+            index = NearDuplicateIndex()
+            index.load(_fingerprint_rows(Article.objects.all()))
+            logger.info(f"Índice de casi-duplicados cargado: {len(index)} huellas")
+            _index = index
+        elif refresh:
+            since = _index.loaded_through - REFRESH_OVERLAP
+            added = _index.extend(_fingerprint_rows(Article.objects.filter(id__gt=since).order_by('id')))
+            if added:
+                logger.debug(f"Índice de casi-duplicados: {added} huellas de otros procesos")
+    return _index
+
+
+def reset_near_duplicate_index() -> None:
+    """
+    Descarta el índice en memoria (se recarga desde la BD en el próximo uso).
+    Solo afecta a este proceso: los demás reciben las filas nuevas con
+    ``refresh`` pero conservan las huellas viejas hasta reiniciarse.
+    """
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def assign_clusters(rows: Iterable[Tuple[int, Optional[int]]],
+                    index: Optional[NearDuplicateIndex] = None) -> Dict[int, int]:
+    """
+    Agrupa artículos recién insertados contra el índice y entre sí.
+
+    Args:
+        rows: ``(article_id, huella sin signo)`` en orden de inserción
+        index: índice a usar (por defecto el global)
+
+    Returns:
+        ``{article_id: cluster_id}`` solo para los artículos que resultaron duplicados.
+    """
+    if index is None:
+        index = get_near_duplicate_index()
+    duplicates: Dict[int, int] = {}
+    for article_id, fingerprint in rows:
+        if fingerprint is None:
+            continue
+        match = index.find(fingerprint, exclude=article_id)
+        cluster_id = match[1] if match else article_id
+        if match:
+            duplicates[article_id] = cluster_id
+        index.add(article_id, fingerprint, cluster_id)
+    return duplicates
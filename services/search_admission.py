@@ -0,0 +1,193 @@
+"""
+Control de Admisión para Búsquedas
+==================================
+
+Cada búsqueda híbrida corre el modelo de embeddings y dos escaneos de
+índice. Una ráfaga en ``/api/search/`` sin límite ocupa todos los hilos
+del proceso y deja sin servicio al resto del sitio. Este módulo limita,
+por proceso, cuántas búsquedas están en cada etapa a la vez:
+
+- Encode (``SEARCH_MAX_ENCODES``): inferencia del modelo
+- BD (``SEARCH_MAX_DB_QUERIES``): la consulta SQL (híbrida, semántica o léxica)
+
+Si una etapa está llena, la búsqueda espera en una cola acotada
+(``SEARCH_MAX_WAITING`` por etapa) hasta un plazo (``SEARCH_ENCODE_WAIT`` /
+``SEARCH_DB_WAIT`` segundos). Si la cola está llena o vence el plazo:
+
+- Encode saturado: se degrada a ``search_keyword_only`` (sin modelo) y la
+  respuesta lo indica con ``mode='keyword_fallback'``
+- BD saturada: ``SearchOverloaded`` (la vista responde 503 + Retry-After)
+
+Uso:
+    from services.search_admission import search_with_admission
+
+    results, mode = search_with_admission("ley de permisos", method='hybrid')
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from services.embedding_service import EmbeddingGenerator
+from services.hybrid_search import (search_documents, search_keyword_only,
+                                    search_semantic_only)
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_FALLBACK = 'keyword_fallback'
+
+
+class StageSaturated(Exception):
+    """No hubo lugar en una etapa dentro del plazo (o su cola estaba llena)."""
+
+
+class SearchOverloaded(RuntimeError):
+    """La búsqueda no pudo atenderse ni degradada; reintentar en ``retry_after`` segundos."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Stage:
+    """
+    Semáforo con cola de espera acotada: ``slots`` búsquedas a la vez y
+    hasta ``max_waiting`` esperando; las demás se rechazan de inmediato.
+    """
+
+    def __init__(self, name: str, slots: int, max_waiting: int):
+        self.name = name
+        self.slots = max(1, slots)
+        self.max_waiting = max(0, max_waiting)
+        self.in_use = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Toma un lugar esperando a lo sumo ``timeout`` segundos; False si no hubo."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self.in_use < self.slots:
+                self.in_use += 1
+                return True
+            if self.waiting >= self.max_waiting or timeout <= 0:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            try:
+                while self.in_use >= self.slots:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.in_use += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, timeout: float) -> Iterator[None]:
+        """Ejecuta el bloque con un lugar tomado; ``StageSaturated`` si no lo hubo."""
+        if not self.acquire(timeout):
+            raise StageSaturated(self.name)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'in_use': self.in_use, 'waiting': self.waiting, 'rejected': self.rejected}
+
+
+class SearchAdmission:
+    """Etapas de encode y BD de un proceso, con sus plazos de espera."""
+
+    def __init__(self, max_encodes: int = 2, max_db_queries: int = 4, max_waiting: int = 16,
+                 encode_wait: float = 0.25, db_wait: float = 2.0):
+        self.encode = Stage('encode', max_encodes, max_waiting)
+        self.db = Stage('db', max_db_queries, max_waiting)
+        self.encode_wait = encode_wait
+        self.db_wait = db_wait
+
+    def _embed(self, query: str) -> Optional[List[float]]:
+        """Embedding de la query, o None si el modelo está saturado."""
+        try:
+            with self.encode.slot(self.encode_wait):
+                return EmbeddingGenerator().encode(query)
+        except StageSaturated:
+            return None
+
+    def search(self, query: str, limit: int = 20, method: str = 'hybrid',
+               collapse_duplicates: bool = False) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Ejecuta la búsqueda dentro de los límites del proceso.
+
+        Returns:
+            (resultados, modo): el modo es ``method`` o ``'keyword_fallback'``
+            si el modelo estaba saturado.
+
+        Raises:
+            SearchOverloaded: Si no hubo lugar en la etapa de BD
+        """
+        mode = method
+        query_embedding = None
+        if method in ('hybrid', 'semantic'):
+            query_embedding = self._embed(query)
+            if query_embedding is None:
+                logger.warning(f"Modelo saturado: '{query}' se sirve solo con búsqueda léxica")
+                mode = KEYWORD_FALLBACK
+
+        try:
+            with self.db.slot(self.db_wait):
+                if mode == 'hybrid':
+                    results = search_documents(query, limit=limit, collapse_duplicates=collapse_duplicates,
+                                               query_embedding=query_embedding)
+                elif mode == 'semantic':
+                    results = search_semantic_only(query, limit=limit, query_embedding=query_embedding)
+                else:
+                    results = search_keyword_only(query, limit=limit)
+        except StageSaturated:
+            raise SearchOverloaded("Búsqueda saturada", retry_after=max(1, math.ceil(self.db_wait)))
+        return results, mode
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {'encode': self.encode.stats(), 'db': self.db.stats()}
+
+
+_admission: Optional[SearchAdmission] = None
+_admission_lock = threading.Lock()
+
+
+def get_search_admission() -> SearchAdmission:
+    """Límites compartidos del proceso (configurados con ``SEARCH_*``)."""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = SearchAdmission(
+                    max_encodes=getattr(settings, 'SEARCH_MAX_ENCODES', 2),
+                    max_db_queries=getattr(settings, 'SEARCH_MAX_DB_QUERIES', 4),
+                    max_waiting=getattr(settings, 'SEARCH_MAX_WAITING', 16),
+                    encode_wait=getattr(settings, 'SEARCH_ENCODE_WAIT', 0.25),
+                    db_wait=getattr(settings, 'SEARCH_DB_WAIT', 2.0),
+                )
+    return _admission
+
+
+def search_with_admission(query: str, limit: int = 20, method: str = 'hybrid',
+                          collapse_duplicates: bool = False) -> Tuple[List[Dict[str, Any]], str]:
+    """Atajo a ``get_search_admission().search(...)``."""
+    return get_search_admission().search(query, limit, method, collapse_duplicates)
@@ -0,0 +1,91 @@
+import json
+import time
+
+from core.ai_client import LocalModelClient, QuotaExhausted, QuotaManager
+from core.utils.bill_analysis import (BillRelevanceAnalyzer, MemoryResultCache,
+                                      pack_batches, title_hash)
+
+
+def _analyzer(client=None, **kwargs):
+    return BillRelevanceAnalyzer(client=client or LocalModelClient(), quota=QuotaManager(rpm=6000, tpm=10**9),
+                                 cache=MemoryResultCache(), **kwargs)
+
+
+def test_pack_batches_respects_token_budget_and_item_cap():
+    items = [(str(i), "Para enmendar la Ley " + "x" * 200) for i in range(10)]
+    batches = pack_batches(items, token_budget=500, max_items=3)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert [item for batch in batches for item in batch] == items
+    # Un título que no cabe solo va en su propio lote
+    assert pack_batches([("a", "y" * 10000)], token_budget=100, max_items=5) == [[("a", "y" * 10000)]]
+
+
+def test_titles_are_batched_deduplicated_and_cached():
+    client = LocalModelClient()
+    analyzer = _analyzer(client, max_items=25)
+    titles = [f"Para enmendar la Ley {i} del Código Penal" for i in range(30)]
+    titles += ["  PARA enmendar la Ley 0 del Código Penal. "]  # mismo título normalizado
+
+    results = analyzer.analyze_titles(titles)
+    assert len(results) == 30
+    assert len(client.calls) == 2
+    assert results[title_hash(titles[0])]["score"] == 9  # enmendar, ley, código, penal
+
+    # Segunda corrida: todo sale de la caché
+    again = BillRelevanceAnalyzer(client=client, quota=analyzer.quota, cache=analyzer.cache)
+    assert again.analyze_titles(titles) == results
+    assert len(client.calls) == 2 and again.stats["cached"] == 30
+
+
+def test_omitted_titles_are_retried_alone():
+    class DropsLast(LocalModelClient):
+        def generate_json(self, prompt):
+            answers = json.loads(super().generate_json(prompt))
+            return json.dumps(answers[:-1] if len(answers) > 1 else answers)
+
+    client = DropsLast()
+    analyzer = _analyzer(client)
+    results = analyzer.analyze_titles(["Ley de impuestos", "Para crear un parque", "Para derogar el reglamento"])
+    assert len(results) == 3
+    assert len(client.calls) == 2
+    assert analyzer.stats["failed"] == 0
+
+
+def test_quota_exhaustion_backs_off_and_retries(settings):
+    settings.AI_RETRY_BACKOFF = 0.01
+
+    class RateLimitedOnce(LocalModelClient):
+        def generate_json(self, prompt):
+            if not self.calls:
+                self.calls.append(prompt)
+                raise QuotaExhausted("429")
+            return super().generate_json(prompt)
+
+    analyzer = _analyzer(RateLimitedOnce())
+    assert len(analyzer.analyze_titles(["Ley de presupuesto"])) == 1
+    assert analyzer.stats["requests"] == 2
+
+
+def test_failed_batch_stops_without_retrying_each_title(settings):
+    settings.AI_MAX_RETRIES = 0
+
+    class QuotaOutage(LocalModelClient):
+        def generate_json(self, prompt):
+            self.calls.append(prompt)
+            raise QuotaExhausted("429")
+
+    client = QuotaOutage()
+    analyzer = _analyzer(client, max_items=25)
+    titles = [f"Para enmendar la Ley {i}" for i in range(60)]
+    assert analyzer.analyze_titles(titles) == {}
+    # Una sola request: ni reintentos individuales ni los lotes siguientes
+    assert len(client.calls) == 1
+    assert analyzer.stats["failed"] == 60
+
+
+def test_quota_manager_spaces_requests():
+    quota = QuotaManager(rpm=601, tpm=10**9)  # 10 requests/s
+    started = time.monotonic()
+    for _ in range(4):
+        quota.acquire(100)
+    assert time.monotonic() - started >= 0.28
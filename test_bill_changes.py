@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from core.utils.bill_changes import BillChange, _measure_key, changed_fields, fingerprint, normalize_fields
+
+
+def test_fingerprint_ignores_whitespace_noise():
+    a = normalize_fields({'title': 'Para enmendar  la Ley\n22', 'status': 'Radicado', 'sutra_url': 'x'})
+    b = normalize_fields({'title': ' Para enmendar la Ley 22 ', 'status': 'Radicado'})
+    assert a == b and 'commission' not in a
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint({**a, 'status': 'Aprobado'})
+
+
+def test_only_changed_fields_trigger_work():
+    bill = SimpleNamespace(title='Para enmendar la Ley 22', status='Radicado', commission='', ai_score=80)
+    changed = changed_fields(bill, {'title': 'Para enmendar la Ley 22', 'status': 'Aprobado'})
+    assert changed == {'status'}
+    change = BillChange(bill, changed=changed)
+    assert not change.unchanged and not change.needs_analysis
+    assert BillChange(bill, changed={'title'}).needs_analysis
+
+
+def test_failed_analysis_is_retried_even_if_page_unchanged():
+    bill = SimpleNamespace(title='Para enmendar la Ley 22', status='Radicado', commission='', ai_score=0)
+    change = BillChange(bill)
+    assert change.unchanged and change.needs_analysis
+    bill.ai_score = 75
+    assert not change.needs_analysis
+
+
+def test_measure_key_matches_both_id_styles():
+    assert _measure_key('P. de la C. 1234') == _measure_key('PC1234') == 'pc1234'
+    assert _measure_key('P. del S. 250') == 'ps250'
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import json
+
+from core import models
+from core.ai_client import ITEMS_MARKER, LocalModelClient, QuotaManager
+from core.utils import bulk_summaries
+from core.utils.bill_analysis import MemoryResultCache
+from core.utils.bulk_summaries import (BulkSummarizer, presummarize_new_articles,
+                                       prioritize)
+from core.utils.keyword_matcher import build_matcher
+
+
+def _summarizer(client, **kwargs):
+    return BulkSummarizer(client=client, quota=QuotaManager(rpm=6000, tpm=10**9), cache=MemoryResultCache(), **kwargs)
+
+
+def test_preset_matches_come_first_then_monitors_then_recency():
+    now = datetime(2026, 1, 1)
+
+    def article(pk, title, hours_ago):
+        return SimpleNamespace(id=pk, title=title, snippet="", published_at=now - timedelta(hours=hours_ago))
+
+    articles = [
+        article(1, "Clima del fin de semana", 0),
+        article(2, "Cambios a la ley de permisos", 5),
+        article(3, "Tribunal Supremo y permisos de construcción", 10),
+        article(4, "Resultados del béisbol", 1),
+    ]
+    presets = build_matcher([("preset", 1, "tribunal supremo")])
+    monitors = build_matcher([("keyword", 1, "permisos")])
+    assert [a.id for a in prioritize(articles, presets, monitors)] == [3, 2, 1, 4]
+
+
+def test_snippets_are_batched_and_summaries_reused_from_cache():
+    client = LocalModelClient()
+    summarizer = _summarizer(client, max_items=3)
+    pending = {f"h{i}": (f"Noticia {i}", f"Texto de la noticia número {i}.") for i in range(7)}
+
+    results = summarizer.summarize(pending)
+    assert len(results) == 7 and len(client.calls) == 3
+    assert results["h4"] == "Resumen: Texto de la noticia número 4."
+
+    again = BulkSummarizer(client=client, quota=summarizer.quota, cache=summarizer.cache)
+    assert again.summarize(pending) == results
+    assert len(client.calls) == 3 and again.stats["cached"] == 7
+
+
+class FlakyClient(LocalModelClient):
+    """Falla la request si trae una noticia 'Caída' y omite las 'Omitida'."""
+
+    def generate_json(self, prompt):
+        if "Caída" in prompt:
+            self.calls.append(prompt)
+            raise RuntimeError("503 del modelo")
+        answers = json.loads(super().generate_json(prompt))
+        items = json.loads(prompt.partition(ITEMS_MARKER)[2])
+        return json.dumps([a for a, item in zip(answers, items) if "Omitida" not in item["title"]])
+
+
+def test_presummarize_writes_claims_and_releases_rows(monkeypatch):
+    def article(pk, title, content_hash):
+        return SimpleNamespace(id=pk, title=title, snippet=f"Texto de {title}.", content_hash=content_hash,
+                               published_at=datetime(2026, 1, 1), ai_summary=None, summary_status="")
+
+    articles = [article(1, "Nota sindicada", "hA"), article(2, "Nota sindicada", "hA"),
+                article(3, "Nota en caché", "hB"), article(4, "Nota de otro worker", "hC"),
+                article(5, "Nota Caída", "hD"), article(6, "Nota Omitida", "hE")]
+    claims, released, updates, heartbeats = [], [], [], []
+
+    def claim(ids):
+        claims.append(sorted(ids))
+        return set(ids) - {4}  # otro worker tomó la 4 entre la selección y la reserva
+
+    monkeypatch.setattr(bulk_summaries, "summary_candidates", lambda limit: articles)
+    monkeypatch.setattr(bulk_summaries, "_claim", claim)
+    monkeypatch.setattr(bulk_summaries, "touch_running", lambda ids: heartbeats.append(sorted(ids)))
+    monkeypatch.setattr(bulk_summaries, "_release", lambda group: released.extend(a.id for a in group))
+    monkeypatch.setattr(models.Article.objects, "bulk_update", lambda objs, fields, batch_size: updates.append(
+        ({a.id: (a.ai_summary, a.summary_status) for a in objs}, fields)))
+
+    client = FlakyClient()
+    summarizer = _summarizer(client, max_items=1)
+    summarizer.cache.set_many({"hB": {"summary": "Resumen guardado."}})
+    stats = presummarize_new_articles(limit=10, summarizer=summarizer)
+
+    # Caché primero, luego un lote por clave; la nota sindicada va una vez al modelo
+    assert claims == [[3], [1, 2], [4], [5], [6]]
+    assert len(client.calls) == 3 and sum("Nota sindicada" in call for call in client.calls) == 1
+    summary = "Resumen: Texto de Nota sindicada."
+    assert updates == [
+        ({3: ("Resumen guardado.", "done")}, ["ai_summary", "summary_status", "summary_error"]),
+        ({1: (summary, "done"), 2: (summary, "done")}, ["ai_summary", "summary_status", "summary_error"]),
+        ({6: (None, "failed")}, ["ai_summary", "summary_status", "summary_error"]),
+    ]
+    assert released == [5] and articles[3].summary_status == ""
+    # Cada intento de request renueva la reserva de su lote (la caché no llama al modelo)
+    assert heartbeats == [[1, 2], [5], [6]]
+    assert stats["updated"] == 3 and stats["cached"] == 1
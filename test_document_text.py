@@ -0,0 +1,149 @@
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from core.document_text import (MemoryLimitExceeded, extract_document,
+                                iter_pdf_pages, join_pages, join_pages_jsonl,
+                                read_pages_jsonl, stream_extract)
+from core.utils.document_store import (cached_pages, pages_name, save_pages,
+                                       store_document)
+from core.utils.extraction_jobs import extract_version_text
+
+
+def write_pdf(path, page_lines):
+    """PDF mínimo (Helvetica, una línea de texto por renglón) para pruebas de extracción."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in page_lines:
+        ops = ["BT /F1 10 Tf 50 780 Td 12 TL"] + [f"({line}) '" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as handle:
+        handle.write(out)
+
+
+def test_join_pages_records_page_offsets():
+    text, offsets = join_pages(["Artículo 1", "", "Artículo 2"])
+    assert text == "Artículo 1\nArtículo 2\n"
+    assert offsets == [0, 11, 11]
+    assert text[offsets[2]:].startswith("Artículo 2")
+
+
+def test_parallel_extraction_matches_sequential_and_keeps_page_order(tmp_path):
+    path = str(tmp_path / "proyecto.pdf")
+    write_pdf(path, [[f"Pagina {n} Articulo {n}", "Texto de la medida"] for n in range(1, 11)])
+
+    sequential = extract_document(path, processes=1, pages_per_task=3)
+    parallel = extract_document(path, processes=2, pages_per_task=3)
+    assert parallel == sequential
+    text, offsets = parallel
+    assert len(offsets) == 10
+    assert text[offsets[6]:].startswith("Pagina 7 Articulo 7")
+
+
+def test_identical_uploads_share_one_file_and_page_cache(tmp_path):
+    storage = FileSystemStorage(location=str(tmp_path))
+    first, digest = store_document(ContentFile(b"%PDF-1.4 proyecto", name="v1.pdf"), storage)
+    again, same = store_document(ContentFile(b"%PDF-1.4 proyecto", name="otra_medida.PDF"), storage)
+    assert (again, same) == (first, digest)
+    assert first.endswith(f"{digest}.pdf")
+    assert len(list((tmp_path / "bill_documents" / digest[:2]).iterdir())) == 1
+
+    assert cached_pages(digest, storage) is None
+    save_pages(digest, ["Página 1", "Página 2"], storage)
+    assert cached_pages(digest, storage) == ["Página 1", "Página 2"]
+
+    # Un caché escrito a medias se ignora (y se reemplaza al volver a extraer)
+    with storage.open(pages_name(digest), "wb") as handle:
+        handle.write(b'"Pagina 1"\n')
+    assert cached_pages(digest, storage) is None
+    save_pages(digest, ["Página 1", "Página 2"], storage)
+    assert cached_pages(digest, storage) == ["Página 1", "Página 2"]
+
+
+# Extracción sin streaming (todas las páginas en memoria) en un proceso nuevo; imprime su pico de RSS en MB
+WHOLE_FILE = """
+import sys
+from core.document_text import extract_pdf_pages, join_pages, peak_rss_mb
+text, offsets = join_pages(extract_pdf_pages(sys.argv[1]))
+print(peak_rss_mb())
+"""
+
+
+def test_streaming_extraction_stays_under_memory_ceiling(tmp_path):
+    path, out = str(tmp_path / "presupuesto.pdf"), str(tmp_path / "pages.jsonl")
+    filler = "texto legislativo " * 100
+    write_pdf(path, [[f"Pagina {n} linea {line} {filler}" for line in range(9)] for n in range(500)])
+
+    # Pico de un proceso de extracción que solo contó las páginas: el punto de partida de ambos caminos
+    baseline = stream_extract(path, out, min_pages=500)["peak_rss_mb"]
+    stats = stream_extract(path, out, memory_limit_mb=200)
+    with open(out, encoding="utf-8") as handle:
+        text, offsets = join_pages_jsonl(handle)
+    assert stats["pages"] == len(offsets) == 500
+    assert text[offsets[499]:].startswith("Pagina 499 linea 0")
+
+    whole = subprocess.run([sys.executable, "-c", WHOLE_FILE, path], cwd=Path(__file__).parent,
+                           capture_output=True, text=True, check=True)
+    text_mb = len(text) / 2 ** 20
+    # Con todo el documento en memoria el pico crece varias veces el tamaño del texto...
+    assert float(whole.stdout) - baseline > 4 * text_mb
+    # ...y en streaming ni siquiera alcanza para tener todas las páginas a la vez
+    assert stats["peak_rss_mb"] - baseline < text_mb
+
+
+def test_streaming_extraction_stops_over_the_ceiling(tmp_path):
+    path = str(tmp_path / "proyecto.pdf")
+    write_pdf(path, [[f"Pagina {n}"] for n in range(3)])
+    pages = iter_pdf_pages(path, memory_limit_mb=100, rss=lambda: 150.0)
+    assert next(pages).startswith("Pagina 0")
+    with pytest.raises(MemoryLimitExceeded):
+        next(pages)
+
+
+def test_low_ceiling_stops_the_extraction_process(tmp_path):
+    path, out = str(tmp_path / "proyecto.pdf"), str(tmp_path / "pages.jsonl")
+    write_pdf(path, [[f"Pagina {n} linea {line}" for line in range(20)] for n in range(30)])
+
+    # El proceso de extracción ya ocupa más que esto tras la primera página
+    with pytest.raises(MemoryLimitExceeded):
+        stream_extract(path, out, memory_limit_mb=8)
+    with open(out, encoding="utf-8") as handle:
+        assert join_pages_jsonl(handle) is None  # archivo sin cerrar: no se usa
+
+
+def test_worker_builds_text_from_the_streamed_file(tmp_path, settings):
+    path = str(tmp_path / "proyecto.pdf")
+    write_pdf(path, [[f"Pagina {n} Articulo {n}"] if n % 4 else [] for n in range(12)])
+    version = SimpleNamespace(pdf_file=SimpleNamespace(path=path, name="proyecto.pdf"), content_hash="")
+    expected = extract_document(path)
+
+    settings.EXTRACTION_STREAMING_PAGES = 5
+    assert extract_version_text(version) == expected
+    settings.EXTRACTION_STREAMING_PAGES, settings.EXTRACTION_PROCESSES = 200, 1
+    assert extract_version_text(version) == expected
+
+    # El proceso aparte decide: con pocas páginas no escribe nada
+    out = str(tmp_path / "pages.jsonl")
+    assert stream_extract(path, out, min_pages=12)["streamed"] is False
+    assert not (tmp_path / "pages.jsonl").exists()
@@ -0,0 +1,39 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+
+from core.models import SystemSettings
+from core.utils.feed_schedule import compute_interval, estimate_feed_rate, update_rate
+
+
+def test_busy_source_polled_often_dormant_rarely(settings):
+    settings.RSS_POLL_MIN_MINUTES = 5
+    settings.RSS_POLL_MAX_MINUTES = 240
+    settings.RSS_POLL_TARGET_ARTICLES = 1
+    assert compute_interval(30.0) == 5      # 1 artículo cada 2 min -> mínimo
+    assert compute_interval(2.0) == 30
+    assert compute_interval(0.0) == 240     # sin publicaciones -> máximo
+    assert compute_interval(2.0, multiplier=4) == 120
+
+
+def test_rate_is_smoothed_and_first_poll_keeps_estimate(settings):
+    settings.RSS_POLL_SMOOTHING = 0.5
+    assert update_rate(4.0, 10, None) == 4.0
+    assert update_rate(4.0, 6, 0.5) == 8.0  # observado 12/h
+
+
+def test_business_hours_multiplier():
+    config = SystemSettings(active_days="0,1,2,3,4", high_freq_start=time(8), high_freq_end=time(17),
+                            high_freq_interval=15, low_freq_interval=120)
+    monday_noon = timezone.make_aware(datetime(2026, 10, 19, 12, 0))
+    sunday_noon = timezone.make_aware(datetime(2026, 10, 18, 12, 0))
+    assert config.polling_multiplier(monday_noon) == 1.0
+    assert config.polling_multiplier(sunday_noon) == 8.0
+    assert config.current_interval(sunday_noon) == 120
+
+
+def test_first_poll_rate_from_feed_dates():
+    base = timezone.make_aware(datetime(2026, 10, 19, 8, 0))
+    dates = [base.replace(hour=8 + h) for h in range(5)]  # 5 artículos en 4 horas
+    assert estimate_feed_rate(dates) == 1.0
+    assert estimate_feed_rate(dates[:1]) is None
@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.utils.http_cache import CachingAdapter, HttpCache, normalize_url
+
+URL = "https://sutra.oslpr.org/medidas/pc1234"
+
+
+def _response(status, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+def _session(tmp_path, **kwargs):
+    session = requests.Session()
+    adapter = CachingAdapter(HttpCache(tmp_path), **kwargs)
+    session.mount("https://", adapter)
+    return session, adapter
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Sutra.OSLPR.org/medidas/pc1/?b=2&a=1#x") == \
+        "https://sutra.oslpr.org/medidas/pc1?a=1&b=2"
+
+
+def test_revalidates_with_etag_and_reuses_body_on_304(tmp_path):
+    session, adapter = _session(tmp_path)
+    with mock.patch.object(HTTPAdapter, "send", return_value=_response(200, b"<h1>PC1234</h1>", {"ETag": '"v1"'})):
+        assert session.get(URL).content == b"<h1>PC1234</h1>"
+
+    with mock.patch.object(HTTPAdapter, "send", return_value=_response(304)) as send:
+        response = session.get(URL + "/")
+    assert send.call_args[0][0].headers["If-None-Match"] == '"v1"'
+    assert response.status_code == 200 and response.content == b"<h1>PC1234</h1>"
+    assert response.headers["X-Cache"] == "REVALIDATED"
+    assert adapter.stats == {"hit": 0, "revalidated": 1, "stale": 0, "miss": 1}
+
+
+def test_serves_stale_copy_when_sutra_is_down_and_replays_offline(tmp_path):
+    session, _ = _session(tmp_path)
+    with mock.patch.object(HTTPAdapter, "send", return_value=_response(200, b"ok")):
+        session.get(URL)
+    with mock.patch.object(HTTPAdapter, "send", side_effect=requests.Timeout()):
+        assert session.get(URL).headers["X-Cache"] == "STALE"
+
+    offline, _ = _session(tmp_path, offline=True)
+    with mock.patch.object(HTTPAdapter, "send") as send:
+        assert offline.get(URL).content == b"ok"
+        with pytest.raises(requests.ConnectionError):
+            offline.get(URL.replace("1234", "9999"))
+    send.assert_not_called()
@@ -0,0 +1,35 @@
+from core.utils.keyword_matcher import build_matcher, fold_text
+
+
+def _matcher():
+    return build_matcher([
+        ('keyword', 1, 'Educación'),
+        ('keyword', 2, 'ley'),
+        ('measure', 5, 'energía renovable, AEE'),
+        ('commission', 9, 'salud mental,educacion'),
+    ])
+
+
+def test_fold_text_removes_accents_case_and_extra_spaces():
+    assert fold_text('  Energía   RENOVABLE ') == 'energia renovable'
+
+
+def test_scan_reports_every_monitor_in_one_pass():
+    hits = _matcher().scan('La EDUCACION y la Energia Renovable; informe de la aee')
+    assert hits == {
+        ('keyword', 1): {'educacion'},
+        ('commission', 9): {'educacion'},
+        ('measure', 5): {'energia renovable', 'aee'},
+    }
+
+
+def test_scan_requires_whole_words():
+    matcher = _matcher()
+    assert matcher.scan('Una leyenda sobre saludmental') == {}
+    assert ('keyword', 2) in matcher.scan('Nueva ley aprobada')
+
+
+def test_overlapping_terms_are_all_reported():
+    matcher = build_matcher([('keyword', 1, 'salud'), ('keyword', 2, 'salud mental'),
+                             ('keyword', 3, 'mental')])
+    assert set(matcher.scan('plan de salud mental')) == {('keyword', 1), ('keyword', 2), ('keyword', 3)}
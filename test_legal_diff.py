@@ -0,0 +1,86 @@
+import random
+
+from core.helpers import analyze_legal_diff
+from core.utils.legal_diff import (LegalDiff, diff_legal_texts, render_diff_html,
+                                   split_units)
+
+OLD = """LEY PARA ENMENDAR LA LEY DE PRUEBA
+Exposición de motivos.
+Artículo 1.- Título
+Esta Ley se conocerá como la Ley de Prueba.
+Artículo 2.- Definiciones
+(a) Secretario significa el Secretario de Hacienda.
+(b) Persona significa cualquier individuo.
+Artículo 3.- Penalidades
+Toda persona que viole esta Ley incurrirá en delito menos grave.
+Artículo 4.- Vigencia
+Esta Ley entrará en vigor inmediatamente."""
+
+NEW = """LEY PARA ENMENDAR LA LEY DE PRUEBA
+Exposición de motivos.
+Artículo 1.- Título
+Esta Ley se conocerá como la Ley de Prueba.
+Artículo 2.- Definiciones
+(a) Secretario significa el Secretario de Justicia.
+(b) Persona significa cualquier individuo.
+Artículo 3.- Multas
+Se impondrá una multa de mil dólares.
+Artículo 4.- Penalidades
+Toda persona que viole esta Ley incurrirá en delito grave.
+Artículo 5.- Vigencia
+Esta Ley entrará en vigor inmediatamente."""
+
+
+def test_split_units_keys_nest_incisos_under_articles():
+    keys = [unit.key for unit in split_units(OLD)]
+    assert keys == ['preámbulo', 'articulo 1', 'articulo 2', 'articulo 2 (a)',
+                    'articulo 2 (b)', 'articulo 3', 'articulo 4']
+
+
+def test_inserted_article_does_not_misalign_renumbered_ones():
+    diff = diff_legal_texts(OLD, NEW)
+    by_tag = {}
+    for unit in diff.changed_units():
+        by_tag.setdefault(unit.tag, []).append(unit.label)
+    assert by_tag['added'] == ['Artículo 3']
+    # El viejo Artículo 3 se compara con el nuevo Artículo 4 (mismo texto enmendado)
+    assert 'Artículo 3 → Artículo 4' in by_tag['changed']
+    assert 'removed' not in by_tag
+    assert diff.stats['equal'] == 4
+
+
+def test_word_level_changes_and_html_only_for_changed_units():
+    result = analyze_legal_diff(OLD, NEW)
+    assert {'from': 'Hacienda.', 'to': 'Justicia.', 'pos_from': OLD.index('Hacienda.'),
+            'unit': 'Artículo 2 (a)'} in result['changed']
+    assert any(item['text'] == 'menos' for item in result['removed'])
+    assert '<del>Hacienda.</del> <ins>Justicia.</ins>' in result['html']
+    assert 'Ley de Prueba.' not in result['html']  # el Artículo 1 no cambió
+
+
+def test_long_unit_diff_is_anchored_and_serializable():
+    words = [f"palabra{i}" for i in range(20000)]
+    old = "Artículo 1.- Largo\n" + ' '.join(words)
+    words[12345] = 'cambio'
+    new = "Artículo 1.- Largo\n" + ' '.join(words)
+    diff = diff_legal_texts(old, new)
+    (unit,) = diff.changed_units()
+    # Índices de palabra dentro de la unidad ("Artículo", "1.-", "Largo" van primero)
+    assert unit.ops == [('replace', 12348, 12349, 12348, 12349)]
+    assert LegalDiff.from_dict(diff.to_dict()) == diff
+    assert '<ins>cambio</ins>' in render_diff_html(diff, old, new)
+
+
+def test_insertion_and_deletion_do_not_shift_a_long_unit():
+    rng = random.Random(7)
+    vocabulary = "ley persona multa delito secretario agencia término servicio público conforme".split()
+    words = [rng.choice(vocabulary) for _ in range(4000)]
+    old = "Artículo 1.- Largo\n" + ' '.join(words)
+    new_words = words[:10] + ['nueva'] + words[10:3000] + words[3001:]
+    new = "Artículo 1.- Largo\n" + ' '.join(new_words)
+
+    (unit,) = diff_legal_texts(old, new).changed_units()
+    changed_old = sum(i2 - i1 for _, i1, i2, _, _ in unit.ops)
+    changed_new = sum(j2 - j1 for _, _, _, j1, j2 in unit.ops)
+    assert changed_old <= 2 and changed_new <= 2
+    assert unit.ops[0][0] == 'insert' and unit.ops[-1][0] == 'delete'
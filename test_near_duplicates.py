@@ -0,0 +1,71 @@
+from services.hybrid_search import collapse_near_duplicates
+from services.near_duplicates import (NearDuplicateIndex, assign_clusters, hamming,
+                                      simhash, to_signed, to_unsigned)
+
+WIRE = ("La Cámara de Representantes aprobó el proyecto que enmienda la Ley de Energía "
+        "para extender el plazo de transición a fuentes renovables hasta 2035.")
+
+
+def test_syndicated_copy_has_same_fingerprint():
+    copy = f"<p>{WIRE.upper()}</p>"
+    assert hamming(simhash(WIRE), simhash(copy)) == 0
+
+
+def test_unrelated_story_is_far_away():
+    other = "El Departamento de Educación anunció el calendario escolar y nuevas plazas de maestros."
+    assert hamming(simhash(WIRE), simhash(other)) > 3
+
+
+def test_signed_roundtrip_for_bigintegerfield():
+    fingerprint = simhash(WIRE) | (1 << 63)
+    assert to_signed(fingerprint) < 0
+    assert to_unsigned(to_signed(fingerprint)) == fingerprint
+
+
+def test_index_finds_neighbour_in_base_and_delta():
+    fingerprint = simhash(WIRE)
+    index = NearDuplicateIndex()
+    index.load([(1, fingerprint ^ 0b101, 1), (2, fingerprint ^ (0xFFFF << 8), 2)])
+    assert index.find(fingerprint) == (1, 1, 2)
+
+    index.add(3, fingerprint, 1)
+    assert index.find(fingerprint) == (3, 1, 0)
+
+
+def test_assign_clusters_groups_batch_against_canonical():
+    fingerprint = simhash(WIRE)
+    index = NearDuplicateIndex()
+    index.load([(10, fingerprint, 10)])
+    duplicates = assign_clusters([(11, fingerprint ^ 1), (12, fingerprint ^ (1 << 40)), (13, None)], index)
+    assert duplicates == {11: 10, 12: 10}
+
+
+def test_assign_clusters_ignores_article_already_in_index():
+    fingerprint = simhash(WIRE)
+    index = NearDuplicateIndex()
+    index.load([(10, fingerprint, 10)])
+    assert assign_clusters([(10, fingerprint)], index) == {}
+
+
+def test_extend_adds_rows_from_other_processes_once():
+    fingerprint = simhash(WIRE)
+    index = NearDuplicateIndex()
+    index.load([(10, fingerprint, 10)])
+    index.add(12, fingerprint ^ 1, 10)   # insertado por este proceso
+
+    # Otro proceso insertó 11 (aún sin duplicate_of) y luego lo agrupó en 10
+    assert index.extend([(11, fingerprint ^ 2, 11), (12, fingerprint ^ 1, 10)]) == 1
+    assert index.extend([(10, fingerprint, 10), (11, fingerprint ^ 2, 10)]) == 0
+    assert len(index) == 3 and index.loaded_through == 12
+    assert 11 in index and 13 not in index
+    assert assign_clusters([(13, fingerprint ^ 2)], index) == {13: 10}
+
+
+def test_collapse_keeps_best_ranked_per_cluster():
+    results = [
+        {'id': 5, 'cluster_id': 1, 'rrf_score': 0.9},
+        {'id': 1, 'cluster_id': 1, 'rrf_score': 0.8},
+        {'id': 7, 'cluster_id': 7, 'rrf_score': 0.5},
+    ]
+    collapsed = collapse_near_duplicates(results)
+    assert [(r['id'], r['duplicates']) for r in collapsed] == [(5, 1), (7, 0)]
@@ -0,0 +1,103 @@
+import threading
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory
+
+from core.middleware.rate_limit import LeasedLimiter, SlidingWindowLimiter
+from core.middleware.security import RateLimitMiddleware
+
+
+def make_cache(name):
+    return LocMemCache(name, {})
+
+
+class CountingCache:
+    """Caché compartida que cuenta los viajes (incr/add/get)."""
+
+    def __init__(self, cache):
+        self.cache, self.trips, self.lock = cache, 0, threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args, **kwargs):
+            with self.lock:
+                self.trips += 1
+            return method(*args, **kwargs)
+        return call
+
+
+def test_concurrent_hits_never_lose_counts():
+    limiter = SlidingWindowLimiter(make_cache('concurrent'), clock=lambda: 1000.0)
+    admitted, lock = [0], threading.Lock()
+
+    def worker():
+        for _ in range(100):
+            allowed, _ = limiter.hit('ip', limit=500, window=60)
+            if allowed:
+                with lock:
+                    admitted[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert admitted[0] == 500
+
+
+def test_previous_window_weighs_into_the_estimate():
+    now = [60.0]
+    limiter = SlidingWindowLimiter(make_cache('sliding'), clock=lambda: now[0])
+    assert all(limiter.hit('ip', limit=10, window=60)[0] for _ in range(10))
+    assert limiter.hit('ip', limit=10, window=60) == (False, 60)
+
+    # A mitad de la siguiente ventana la anterior (11) cuenta la mitad: 5.5 + nuevas
+    now[0] = 150.0
+    assert all(limiter.hit('ip', limit=10, window=60)[0] for _ in range(4))
+    allowed, retry_after = limiter.hit('ip', limit=10, window=60)
+    assert not allowed and 0 < retry_after <= 30
+
+
+def test_search_route_has_its_own_tighter_limit(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                   'LOCATION': 'test-routes'}}
+    settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW = 5, 60
+    settings.RATE_LIMIT_ROUTES = {'/api/search/': (2, 60)}
+    middleware = RateLimitMiddleware(lambda request: None)
+    factory = RequestFactory()
+
+    search = factory.get('/api/search/?q=multa', REMOTE_ADDR='203.0.113.7')
+    assert middleware.process_request(search) is None
+    assert middleware.process_request(search) is None
+    blocked = middleware.process_request(search)
+    assert blocked.status_code == 429 and int(blocked['Retry-After']) >= 1
+
+    # El resto del sitio conserva su propio cupo
+    other = factory.get('/api/bills/', REMOTE_ADDR='203.0.113.7')
+    assert all(middleware.process_request(other) is None for _ in range(5))
+    assert middleware.process_request(other).status_code == 429
+
+
+def test_leased_limiter_never_over_admits_across_processes():
+    shared = CountingCache(make_cache('leases'))
+    processes = [LeasedLimiter(shared, clock=lambda: 1000.0, lease_size=10) for _ in range(4)]
+    admitted, lock = [0], threading.Lock()
+
+    def worker(offset):
+        for n in range(250):
+            allowed, _ = processes[(offset + n) % 4].hit('ip', limit=500, window=60)
+            if allowed:
+                with lock:
+                    admitted[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Nunca más que el límite; a lo sumo (P - 1) * (lote - 1) de menos
+    assert 500 - 3 * 9 <= admitted[0] <= 500
+    # ~1 viaje por lote de 10 (más los rechazos, que se recuerdan localmente)
+    assert shared.trips < 2000 / 5
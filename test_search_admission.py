@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from services import search_admission
+from services.search_admission import SearchAdmission, SearchOverloaded, Stage
+
+
+def test_stage_queue_is_bounded_and_waits_expire():
+    stage = Stage('db', slots=1, max_waiting=1)
+    assert stage.acquire(timeout=0)
+
+    started = time.monotonic()
+    assert not stage.acquire(timeout=0.05)  # esperó su plazo y se rindió
+    assert time.monotonic() - started >= 0.05
+
+    waiter = threading.Thread(target=lambda: stage.acquire(timeout=1))
+    waiter.start()
+    while stage.stats()['waiting'] == 0:
+        time.sleep(0.001)
+    assert not stage.acquire(timeout=1)  # cola llena: rechazo inmediato
+    stage.release()
+    waiter.join()
+    assert stage.stats() == {'in_use': 1, 'waiting': 0, 'rejected': 2}
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    calls = []
+
+    class Generator:
+        def encode(self, query):
+            calls.append('encode')
+            return [0.0] * 3
+
+    monkeypatch.setattr(search_admission, 'EmbeddingGenerator', Generator)
+    monkeypatch.setattr(search_admission, 'search_documents',
+                        lambda query, limit, collapse_duplicates, query_embedding: calls.append('hybrid') or [])
+    monkeypatch.setattr(search_admission, 'search_keyword_only',
+                        lambda query, limit: calls.append('keyword') or [])
+    return calls
+
+
+def test_saturated_model_degrades_to_keyword_search(fake_search):
+    admission = SearchAdmission(max_encodes=1, max_db_queries=1, encode_wait=0.01, db_wait=0.01)
+    assert admission.search("ley de permisos") == ([], 'hybrid')
+    assert fake_search == ['encode', 'hybrid']
+
+    admission.encode.acquire(0)  # otra búsqueda ocupa el modelo
+    assert admission.search("ley de permisos") == ([], 'keyword_fallback')
+    assert fake_search[2:] == ['keyword']
+
+    admission.db.acquire(0)  # y la BD también: ni degradada se puede servir
+    with pytest.raises(SearchOverloaded) as excinfo:
+        admission.search("ley de permisos", method='keyword')
+    assert excinfo.value.retry_after == 1
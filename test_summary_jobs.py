@@ -0,0 +1,82 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.ai_client import MAX_BACKOFF_SECONDS, LocalModelClient, QuotaExhausted, QuotaManager
+from core.utils.summary_jobs import SummaryQueue, stale_seconds, summarize_article
+
+
+def _wait(queue, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while queue.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_queue_deduplicates_pending_articles():
+    release = threading.Event()
+    ran = []
+
+    def runner(article_id):
+        release.wait(1)
+        ran.append(article_id)
+
+    queue = SummaryQueue(runner, workers=2)
+    assert queue.submit(1)
+    assert not queue.submit(1)  # clic repetido mientras está pendiente
+    assert queue.submit(2)
+    release.set()
+    _wait(queue)
+    assert sorted(ran) == [1, 2]
+    assert queue.submit(1)  # ya terminó: se puede volver a encolar
+    _wait(queue)
+
+
+def test_queue_caps_concurrent_workers():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def runner(article_id):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    queue = SummaryQueue(runner, workers=2)
+    for article_id in range(8):
+        queue.submit(article_id)
+    _wait(queue)
+    assert peak[0] == 2
+
+
+def test_summarize_article_retries_after_quota_error(settings):
+    settings.AI_RETRY_BACKOFF = 0.01
+
+    class RateLimitedOnce(LocalModelClient):
+        def generate_text(self, prompt):
+            if not self.calls:
+                self.calls.append(prompt)
+                raise QuotaExhausted("429")
+            return super().generate_text(prompt)
+
+    article = SimpleNamespace(title="Nueva ley", snippet="El Senado aprobó la reforma al Código Civil de Puerto Rico.")
+    attempts = []
+    summary = summarize_article(article, RateLimitedOnce(), QuotaManager(rpm=6000, tpm=10**9),
+                                on_attempt=lambda: attempts.append(time.monotonic()))
+    assert summary.startswith("Resumen: El Senado aprobó")
+    assert len(attempts) == 2  # el latido se renueva también tras la espera por el 429
+
+
+def test_stale_threshold_outlasts_the_longest_quota_wait(settings):
+    settings.AI_SUMMARY_STALE_SECONDS = 60
+    assert stale_seconds() >= 2 * MAX_BACKOFF_SECONDS
+    settings.AI_SUMMARY_STALE_SECONDS = 3600
+    assert stale_seconds() == 3600
+
+
+def test_summarize_article_requires_api_key():
+    client = SimpleNamespace(available=False)
+    with pytest.raises(ValueError):
+        summarize_article(SimpleNamespace(title="t", snippet=""), client, QuotaManager(rpm=6000, tpm=10**9))
@@ -0,0 +1,84 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import sutra_client
+from core.sutra_client import SutraClient, normalize_measure_id
+
+
+def _response(status, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def sutra_settings(settings, tmp_path):
+    settings.SUTRA_HTTP_CACHE_DIR = str(tmp_path)
+    settings.SUTRA_HTTP_CACHE_OFFLINE = False
+    return settings
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("PC160071", "pc160071"),
+    ("P. de la C. 1234", "pc1234"),
+    ("P. del S. 250", "ps250"),
+    ("160071", "160071"),
+])
+def test_normalize_measure_id(raw, expected):
+    assert normalize_measure_id(raw) == expected
+
+
+def test_map_caps_in_flight_and_rate(sutra_settings):
+    client = SutraClient(rate=50, max_in_flight=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_send(*args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return _response(200, b"<h1>ok</h1>")
+
+    started = time.monotonic()
+    with mock.patch.object(HTTPAdapter, "send", side_effect=slow_send):
+        results = list(client.map(lambda m: client.get_measure(m).status_code, [f"PC{i}" for i in range(10)]))
+    elapsed = time.monotonic() - started
+
+    assert [r for _, r, _ in results] == [200] * 10
+    assert peak[0] <= 2
+    assert elapsed >= 9 / 50  # 10 requests a 50/s: al menos 9 intervalos
+    metrics = client.metrics.snapshot()
+    assert metrics["requests"] == 10 and metrics["errors"] == 0
+    assert metrics["peak_in_flight"] <= 2
+    assert metrics["cache"] == {"MISS": 10}
+
+
+def test_network_errors_are_counted_and_raised(sutra_settings):
+    sutra_settings.SUTRA_HTTP_CACHE = False
+    client = SutraClient(rate=100)
+    with mock.patch.object(HTTPAdapter, "send", side_effect=requests.ConnectionError("down")):
+        with pytest.raises(requests.ConnectionError):
+            client.get_measure("PC1")
+    assert client.metrics.snapshot()["errors"] == 1
+
+
+def test_status_check_reports_stale_copy_as_offline(sutra_settings, monkeypatch):
+    from core.helpers import check_sutra_status
+
+    client = SutraClient(rate=100)
+    monkeypatch.setattr(sutra_client, "get_sutra_client", lambda: client)
+    with mock.patch.object(HTTPAdapter, "send", return_value=_response(200, b"<h1>PC1</h1>")):
+        assert check_sutra_status("P. de la C. 1") == (True, "En línea")
+    with mock.patch.object(HTTPAdapter, "send", side_effect=requests.ConnectionError("down")):
+        online, message = check_sutra_status("P. de la C. 1")
+    assert not online and "copia guardada" in message
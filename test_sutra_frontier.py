@@ -0,0 +1,92 @@
+import math
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from core.sutra_client import SutraClient
+from core.utils.sutra_frontier import (SutraUnavailable, discover_new_numbers, find_frontier,
+                                       measure_exists)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "sutra"
+
+
+def _sutra(highest, holes=()):
+    calls = []
+
+    def exists(n):
+        calls.append(n)
+        return 1 <= n <= highest and n not in holes
+    return exists, calls
+
+
+def test_finds_frontier_from_scratch_in_log_requests():
+    exists, calls = _sutra(1873, holes={1870, 1871, 900, 901, 902})
+    frontier, probes = find_frontier(exists, start=0, gap=5)
+    assert frontier == 1873
+    assert probes == len(set(calls))
+    assert probes < 5 * 2 * math.log2(1873)  # un barrido serían ~1900
+
+
+def test_incremental_run_only_probes_beyond_known_frontier():
+    exists, calls = _sutra(1205)
+    frontier, probes = find_frontier(exists, start=1200, gap=3)
+    assert frontier == 1205
+    assert min(calls) > 1200 and probes <= 12
+
+
+def test_no_new_measures_keeps_frontier():
+    exists, _ = _sutra(500)
+    assert find_frontier(exists, start=500, gap=3) == (500, 3)
+
+
+def test_only_a_404_means_the_measure_does_not_exist():
+    page = (FIXTURES / "pc1234.html").read_bytes()
+    answers = {"pc1234": (200, page), "pc1235": (404, b""), "pc1236": (503, b""), "pc1237": None}
+
+    class FakeClient:
+        measure_url = SutraClient.measure_url
+
+        def get(self, url):
+            answer = answers[url.rsplit("/", 1)[1]]
+            if answer is None:
+                raise requests.Timeout("read timeout")
+            return SimpleNamespace(status_code=answer[0], content=answer[1])
+
+    client = FakeClient()
+    assert measure_exists(client, "PC1234") is True
+    assert measure_exists(client, "PC1235") is False
+    for measure_id in ("PC1236", "PC1237"):
+        with pytest.raises(SutraUnavailable):
+            measure_exists(client, measure_id)
+
+
+def test_discovery_caps_new_numbers_without_skipping_any(database):
+    from core.models import SutraFrontier
+
+    exists, _ = _sutra(130)
+    # Primera corrida: sin frontera, solo los últimos
+    assert discover_new_numbers("C", exists, max_new=10) == range(121, 131)
+
+    # Tras una caída o un día de muchas radicaciones: los primeros, y el resto después
+    SutraFrontier.objects.filter(chamber="C").update(highest_number=100)
+    assert discover_new_numbers("C", exists, max_new=10) == range(101, 111)
+    assert discover_new_numbers("C", exists, max_new=10) == range(111, 121)
+    assert discover_new_numbers("C", exists, max_new=10) == range(121, 131)
+    assert discover_new_numbers("C", exists, max_new=10) == range(131, 131)
+
+
+def test_outage_aborts_discovery_and_keeps_the_frontier(database):
+    from core.models import SutraFrontier
+
+    SutraFrontier.objects.create(chamber="S", highest_number=500)
+
+    def exists(number):
+        if number > 502:
+            raise SutraUnavailable(f"HTTP 503 en {number}")
+        return True
+
+    with pytest.raises(SutraUnavailable):
+        discover_new_numbers("S", exists, max_new=10)
+    assert SutraFrontier.objects.get(chamber="S").highest_number == 500
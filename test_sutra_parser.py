@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from core.management.commands._sutra_reference import parse_bill_html_bs4
+from core.scraper import parse_bill_html
+from core.sutra_client import SutraClient
+from core.utils.sutra_sync import fetch_bill_from_sutra
+
+FIXTURES = Path(__file__).parent / "fixtures" / "sutra"
+EXPECTED = json.loads((FIXTURES / "expected.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_lxml_parser_matches_recorded_pages(name):
+    content = (FIXTURES / name).read_bytes()
+    parsed = parse_bill_html(content, url="https://sutra.oslpr.org/medidas/x")
+    if EXPECTED[name] is None:
+        assert parsed is None
+        return
+    assert parsed.pop("sutra_url") == "https://sutra.oslpr.org/medidas/x"
+    assert parsed == EXPECTED[name]
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_lxml_parser_agrees_with_previous_beautifulsoup_parser(name):
+    content = (FIXTURES / name).read_bytes()
+    assert parse_bill_html(content) == parse_bill_html_bs4(content)
+
+
+def test_sync_fetches_the_robot_url_and_parses_like_the_robot():
+    content = (FIXTURES / "pc1234.html").read_bytes()
+    requested = []
+
+    class FakeClient:
+        measure_url = SutraClient.measure_url
+
+        def get(self, url):
+            requested.append(url)
+            return SimpleNamespace(status_code=200, content=content)
+
+    data = fetch_bill_from_sutra("P. de la C. 1234", client=FakeClient())
+    assert requested == ["https://sutra.oslpr.org/medidas/pc1234"]
+    assert data == parse_bill_html(content, requested[0])
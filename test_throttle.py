@@ -0,0 +1,38 @@
+import threading
+import time
+
+from core.utils.throttle import TokenBucket, run_throttled
+
+
+def test_bucket_spaces_requests_at_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # 1 inmediato + 10 a 50/s ≈ 0.2 s
+    assert 0.15 < time.monotonic() - started < 0.5
+    assert not TokenBucket(rate=1, capacity=1).acquire(2, timeout=0.05)
+
+
+def test_run_throttled_overlaps_latency_and_caps_in_flight():
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def slow_fetch(n):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.1)
+        with lock:
+            in_flight[0] -= 1
+        if n == 3:
+            raise ValueError("404")
+        return n * 2
+
+    started = time.monotonic()
+    results = list(run_throttled(slow_fetch, range(8), rate=100, max_in_flight=4))
+    elapsed = time.monotonic() - started
+
+    assert [r[0] for r in results] == list(range(8))
+    assert results[2][1] == 4 and isinstance(results[3][2], ValueError)
+    assert peak[0] == 4
+    assert elapsed < 0.5  # secuencial serían 0.8 s
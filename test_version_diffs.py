@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory
+
+from core.utils import version_diffs
+from core.utils.legal_diff import UnitDiff, diff_legal_texts
+from core.utils.version_diffs import hunks_page, source_hash
+from core.views import api_diff_hunks, comparador, validate_version_upload
+
+OLD = "Artículo 1.- Multa\nLa multa será de cien dólares.\nArtículo 2.- Vigencia\nInmediata."
+NEW = "Artículo 1.- Multa\nLa multa será de mil dólares.\nArtículo 2.- Vigencia\nInmediata."
+
+
+def test_source_hash_tracks_both_texts_and_their_boundary():
+    assert source_hash(OLD, NEW) == source_hash(OLD, NEW)
+    assert source_hash(OLD, NEW) != source_hash(NEW, OLD)
+    assert source_hash("ab", "c") != source_hash("a", "bc")
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Textos por id de versión; ``hunks_page`` solo puede pedir tramos (como el SUBSTR de la BD)."""
+    texts, requested = {}, []
+
+    def slices(version_id, spans):
+        requested.append((version_id, dict(spans)))
+        return {i: texts[version_id][start:end] for i, (start, end) in spans.items()}
+
+    monkeypatch.setattr(version_diffs, 'version_slices', slices)
+    return texts, requested
+
+
+def test_stored_rows_hold_only_changed_units_and_render_lazily(versions):
+    diff = diff_legal_texts(OLD, NEW)
+    rows = [unit.to_row() for unit in diff.changed_units()]
+    assert [row[1] for row in rows] == ['Artículo 1']
+    assert UnitDiff.from_row(rows[0]) == diff.changed_units()[0]
+    # Sin texto ni HTML en lo guardado: solo rangos y opcodes
+    assert 'cien' not in repr(rows)
+
+    texts, _ = versions
+    texts.update({1: OLD, 2: NEW})
+    stored = SimpleNamespace(units=rows, old_version_id=1, new_version_id=2)
+    page = hunks_page(stored, 0, 20)
+    assert '<del>cien</del> <ins>mil</ins>' in page['hunks'][0]['html']
+    assert hunks_page(stored, 1, 20)['hunks'] == []
+
+
+def test_hunks_page_reads_only_the_sections_on_the_page(versions):
+    old = "\n".join(f"Artículo {n}.- Texto original del artículo {n}." for n in range(1, 51))
+    new = old.replace("original", "enmendado") + "\nArtículo 51.- Nuevo."
+    diff = diff_legal_texts(old, new)
+    texts, requested = versions
+    texts.update({1: old, 2: new})
+    stored = SimpleNamespace(units=[unit.to_row() for unit in diff.changed_units()], old_version_id=1, new_version_id=2)
+
+    first = hunks_page(stored, 0, 20)
+    assert [h['index'] for h in first['hunks']] == list(range(20))
+    assert (first['total'], first['next_offset']) == (51, 20)
+    # Una consulta por versión con los 20 tramos de la página, no el documento completo
+    assert [(version, len(spans)) for version, spans in requested] == [(1, 20), (2, 20)]
+    assert sum(end - start for start, end in requested[1][1].values()) < len(new) / 2
+
+    last = hunks_page(stored, 40, 20)
+    assert len(last['hunks']) == 11 and last['next_offset'] is None
+    assert '<ins>enmendado</ins>' in last['hunks'][-2]['html']
+    assert last['hunks'][-1]['tag'] == 'added' and '<ins>Artículo 51.- Nuevo.</ins>' in last['hunks'][-1]['html']
+    assert len(requested[-2][1]) == 10  # la unidad agregada no tiene tramo viejo
+
+
+def test_comparador_requires_login_and_valid_uploads(settings):
+    factory = RequestFactory()
+    for view, args in ((comparador, (1,)), (api_diff_hunks, (1,))):
+        request = factory.post('/comparador/1/')
+        request.user = AnonymousUser()
+        assert view(request, *args).status_code == 302
+
+    settings.BILL_UPLOAD_MAX_SIZE = 1024
+    assert validate_version_upload(SimpleUploadedFile("v1.pdf", b"%PDF-1.4 ...")) is None
+    assert validate_version_upload(SimpleUploadedFile("v1.docx", b"PK\x03\x04...")) is None
+    assert 'Formato' in validate_version_upload(SimpleUploadedFile("v1.exe", b"MZ"))
+    assert 'válido' in validate_version_upload(SimpleUploadedFile("v1.pdf", b"<html>"))
+    assert 'máximo' in validate_version_upload(SimpleUploadedFile("v1.pdf", b"%PDF-" + b"0" * 2048))